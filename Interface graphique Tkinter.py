@@ -1,18 +1,26 @@
 import tkinter as tk
-from tkinter import filedialog, messagebox
+from tkinter import filedialog, messagebox, ttk
 import os
+import queue
 import sys
-from generateur_qcm import GenerateurQCM
+import threading
+
+# Intervalle (en millisecondes) entre deux lectures de la file de progression
+INTERVALLE_SUIVI = 100
 
 class InterfaceQCM(tk.Tk):
     """
     Interface graphique pour le générateur de QCM.
+    
+    La génération s'exécute dans un thread de travail ; son avancement remonte
+    par une file lue périodiquement depuis la boucle Tk, de sorte que la
+    fenêtre reste réactive et que la génération peut être annulée.
     """
     def __init__(self):
         super().__init__()
         
         self.title("Générateur de QCM")
-        self.geometry("600x400")
+        self.geometry("600x510")
         
         # Variables
         self.fichier_questions = tk.StringVar()
@@ -20,6 +28,18 @@ class InterfaceQCM(tk.Tk):
         self.nb_questions = tk.IntVar(value=10)
         self.graine = tk.IntVar(value=42)
         self.format_sortie = tk.StringVar(value="both")
+        self.etat = tk.StringVar()
+        
+        # Mesures de la dernière génération
+        self.metriques = None
+        
+        # Génération en cours : thread de travail, file de progression, demande
+        # d'annulation, avancement et format
+        self.travail = None
+        self.file_progression = None
+        self.annulation = None
+        self.avancement = 0
+        self.format_en_cours = None
         
         # Création de l'interface
         self._creer_widgets()
@@ -37,7 +57,7 @@ class InterfaceQCM(tk.Tk):
         
         # Nombre d'élèves
         tk.Label(main_frame, text="Nombre d'élèves :").grid(row=1, column=0, sticky=tk.W, pady=5)
-        tk.Spinbox(main_frame, from_=1, to=100, textvariable=self.nb_eleves, width=5).grid(row=1, column=1, sticky=tk.W, pady=5)
+        tk.Spinbox(main_frame, from_=1, to=1000000, textvariable=self.nb_eleves, width=8).grid(row=1, column=1, sticky=tk.W, pady=5)
         
         # Nombre de questions
         tk.Label(main_frame, text="Nombre de questions par élève :").grid(row=2, column=0, sticky=tk.W, pady=5)
@@ -51,14 +71,27 @@ class InterfaceQCM(tk.Tk):
         tk.Label(main_frame, text="Format de sortie :").grid(row=4, column=0, sticky=tk.W, pady=5)
         tk.Radiobutton(main_frame, text="TXT", variable=self.format_sortie, value="txt").grid(row=4, column=1, sticky=tk.W)
         tk.Radiobutton(main_frame, text="DOCX", variable=self.format_sortie, value="docx").grid(row=5, column=1, sticky=tk.W)
-        tk.Radiobutton(main_frame, text="Les deux", variable=self.format_sortie, value="both").grid(row=6, column=1, sticky=tk.W)
+        tk.Radiobutton(main_frame, text="PDF", variable=self.format_sortie, value="pdf").grid(row=6, column=1, sticky=tk.W)
+        tk.Radiobutton(main_frame, text="TXT et DOCX", variable=self.format_sortie, value="both").grid(row=7, column=1, sticky=tk.W)
+        
+        # Avancement
+        self.barre = ttk.Progressbar(main_frame, mode='determinate', length=420)
+        self.barre.grid(row=8, column=0, columnspan=3, sticky=tk.W, pady=(15, 0))
+        tk.Label(main_frame, textvariable=self.etat).grid(row=9, column=0, columnspan=3, sticky=tk.W)
         
         # Boutons
         boutons_frame = tk.Frame(main_frame)
-        boutons_frame.grid(row=7, column=0, columnspan=3, pady=20)
+        boutons_frame.grid(row=10, column=0, columnspan=3, pady=20)
         
-        tk.Button(boutons_frame, text="Générer QCM", command=self._generer_qcm, padx=10, pady=5).pack(side=tk.LEFT, padx=10)
-        tk.Button(boutons_frame, text="Quitter", command=self.destroy, padx=10, pady=5).pack(side=tk.LEFT)
+        self.bouton_generer = tk.Button(boutons_frame, text="Générer QCM", command=self._generer_qcm, padx=10, pady=5)
+        self.bouton_generer.pack(side=tk.LEFT, padx=10)
+        self.bouton_annuler = tk.Button(boutons_frame, text="Annuler", command=self._annuler,
+                                        padx=10, pady=5, state=tk.DISABLED)
+        self.bouton_annuler.pack(side=tk.LEFT, padx=10)
+        self.bouton_details = tk.Button(boutons_frame, text="Détails...", command=self._afficher_details,
+                                        padx=10, pady=5, state=tk.DISABLED)
+        self.bouton_details.pack(side=tk.LEFT, padx=10)
+        tk.Button(boutons_frame, text="Quitter", command=self._quitter, padx=10, pady=5).pack(side=tk.LEFT)
     
     def _parcourir_fichier(self):
         """Ouvre une boîte de dialogue pour sélectionner le fichier de questions."""
@@ -69,8 +102,23 @@ class InterfaceQCM(tk.Tk):
         if fichier:
             self.fichier_questions.set(fichier)
     
+    def _afficher_details(self):
+        """Affiche les mesures de la dernière génération (durée des étapes, compteurs)."""
+        if self.metriques is None:
+            return
+        
+        fenetre = tk.Toplevel(self)
+        fenetre.title("Détails de la génération")
+        
+        texte = tk.Text(fenetre, width=80, height=24, font=("Courier", 10))
+        texte.insert(tk.END, self.metriques.rapport())
+        texte.config(state=tk.DISABLED)
+        texte.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        
+        tk.Button(fenetre, text="Fermer", command=fenetre.destroy, padx=10, pady=5).pack(pady=(0, 10))
+    
     def _generer_qcm(self):
-        """Génère les QCM avec les paramètres spécifiés."""
+        """Lance la génération des QCM en arrière-plan avec les paramètres spécifiés."""
         # Vérification des entrées
         if not self.fichier_questions.get():
             messagebox.showerror("Erreur", "Veuillez sélectionner un fichier de questions.")
@@ -80,42 +128,150 @@ class InterfaceQCM(tk.Tk):
             messagebox.showerror("Erreur", "Le fichier de questions n'existe pas.")
             return
         
+        # Les variables Tk ne sont lues que depuis le thread principal
+        try:
+            parametres = (self.fichier_questions.get(), self.nb_eleves.get(), self.nb_questions.get(),
+                          self.graine.get(), self.format_sortie.get())
+        except tk.TclError:
+            messagebox.showerror("Erreur", "Le nombre d'élèves et la graine doivent être des nombres entiers.")
+            return
+        
+        # Chaque rendu parcourt tous les sujets : une passe pour les deux
+        # fichiers texte, une pour chaque fichier DOCX ou PDF
+        format_sortie = self.format_en_cours = parametres[4]
+        nb_passes = (format_sortie in ['txt', 'both']) + 2 * (format_sortie in ['docx', 'pdf', 'both'])
+        self.barre.config(maximum=max(1, nb_passes * parametres[1]), value=0)
+        self.avancement = 0
+        self.etat.set("Génération en cours...")
+        
+        self.bouton_generer.config(state=tk.DISABLED)
+        self.bouton_annuler.config(state=tk.NORMAL)
+        self.bouton_details.config(state=tk.DISABLED)
+        
+        self.file_progression = queue.Queue()
+        self.annulation = threading.Event()
+        self.travail = threading.Thread(target=self._generer_en_arriere_plan, args=parametres, daemon=True)
+        self.travail.start()
+        self.after(INTERVALLE_SUIVI, self._suivre_progression)
+    
+    def _generer_en_arriere_plan(self, fichier_questions, nb_eleves, nb_questions, graine, format_sortie):
+        """
+        Génère les fichiers (thread de travail).
+        
+        Toute communication avec l'interface passe par la file de progression.
+        En cas d'annulation, les fichiers déjà écrits sont supprimés.
+        """
+        # Importé à la première génération : la fenêtre s'ouvre sans attendre
+        # le chargement du générateur et des moteurs de rendu
+        from generateur_qcm import GenerateurQCM, GenerationAnnulee
+        
+        file_progression = self.file_progression
+        annulation = self.annulation
+        fichiers_ecrits = []
+        
+        def progression(evenement, valeur):
+            if evenement == 'fichier':
+                fichiers_ecrits.append(valeur)
+            file_progression.put((evenement, valeur))
+            if annulation.is_set():
+                raise GenerationAnnulee()
+        
         try:
             # Créer le générateur
-            generateur = GenerateurQCM(
-                self.fichier_questions.get(),
-                self.nb_eleves.get(),
-                self.nb_questions.get(),
-                self.graine.get()
-            )
-            
-            # Générer les sujets
-            sujets = generateur.generer_sujets()
-            
-            # Générer les fichiers
-            format_sortie = self.format_sortie.get()
+            generateur = GenerateurQCM(fichier_questions, nb_eleves, nb_questions, graine, progression=progression)
             
+            # Générer les fichiers (les sujets sont produits au fil de l'écriture)
             if format_sortie in ['txt', 'both']:
-                generateur.generer_fichier_txt(sujets)
-                generateur.generer_fichier_correction(sujets)
+                generateur.generer_fichiers_txt(generateur.iterer_sujets())
             
             if format_sortie in ['docx', 'both']:
-                generateur.generer_fichier_docx(sujets)
-                generateur.generer_fichier_correction_docx(sujets)
+                generateur.generer_fichier_docx(generateur.iterer_sujets())
+                generateur.generer_fichier_correction_docx(generateur.iterer_sujets())
+            
+            if format_sortie == 'pdf':
+                generateur.generer_fichier_pdf(generateur.iterer_sujets())
+                generateur.generer_fichier_correction_pdf(generateur.iterer_sujets())
+            
+            file_progression.put(('termine', generateur.metriques))
+        
+        except GenerationAnnulee:
+            for nom in fichiers_ecrits:
+                if os.path.exists(nom):
+                    os.remove(nom)
+            file_progression.put(('annule', None))
+        
+        except Exception as e:
+            file_progression.put(('erreur', str(e)))
+    
+    def _suivre_progression(self):
+        """Traite les messages du thread de travail puis se replanifie tant que la génération dure."""
+        while True:
+            try:
+                evenement, valeur = self.file_progression.get_nowait()
+            except queue.Empty:
+                break
             
+            if evenement == 'sujet':
+                self.avancement += 1
+            elif evenement == 'fichier':
+                self.etat.set(f"Fichier écrit : {valeur}")
+            else:
+                self._terminer(evenement, valeur)
+                return
+        
+        self.barre.config(value=self.avancement)
+        self.after(INTERVALLE_SUIVI, self._suivre_progression)
+    
+    def _terminer(self, evenement, valeur):
+        """
+        Affiche l'issue de la génération et réactive les boutons.
+        
+        Args:
+            evenement (str): 'termine', 'annule' ou 'erreur'
+            valeur: Mesures de la génération, ou message d'erreur
+        """
+        self.bouton_generer.config(state=tk.NORMAL)
+        self.bouton_annuler.config(state=tk.DISABLED)
+        
+        if evenement == 'termine':
+            self.barre.config(value=self.barre['maximum'])
+            self.etat.set("Génération terminée")
+            self.metriques = valeur
+            self.bouton_details.config(state=tk.NORMAL)
+            
+            formats = ['txt', 'docx'] if self.format_en_cours == 'both' else [self.format_en_cours]
             messagebox.showinfo(
                 "Succès",
                 f"QCM générés avec succès !\n\n"
                 f"Fichiers créés dans le répertoire courant :\n"
-                f"- {'qcm_sujets.txt, ' if format_sortie in ['txt', 'both'] else ''}"
-                f"{'qcm_corrections.txt' if format_sortie in ['txt', 'both'] else ''}\n"
-                f"- {'qcm_sujets.docx, ' if format_sortie in ['docx', 'both'] else ''}"
-                f"{'qcm_corrections.docx' if format_sortie in ['docx', 'both'] else ''}"
+                + '\n'.join(f"- qcm_sujets.{extension}, qcm_corrections.{extension}" for extension in formats)
             )
-            
-        except Exception as e:
-            messagebox.showerror("Erreur", f"Une erreur s'est produite : {str(e)}")
+        elif evenement == 'annule':
+            self.barre.config(value=0)
+            self.etat.set("Génération annulée, fichiers partiels supprimés")
+        else:
+            self.etat.set("Échec de la génération")
+            messagebox.showerror("Erreur", f"Une erreur s'est produite : {valeur}")
+    
+    def _annuler(self):
+        """Demande l'arrêt de la génération en cours."""
+        if self.annulation is not None:
+            self.annulation.set()
+            self.bouton_annuler.config(state=tk.DISABLED)
+            self.etat.set("Annulation en cours...")
+    
+    def _quitter(self):
+        """
+        Ferme l'application, en interrompant une éventuelle génération.
+        
+        Le thread de travail est attendu avant la fermeture : il supprime
+        lui-même les fichiers partiels une fois l'annulation reçue.
+        """
+        self._annuler()
+        if self.travail is not None and self.travail.is_alive():
+            self.travail.join()
+        self.destroy()
 
 if __name__ == "__main__":
     app = InterfaceQCM()
-    app.mainloop()
\ No newline at end of file
+    app.mainloop()
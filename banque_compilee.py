@@ -0,0 +1,453 @@
+import hashlib
+import io
+import json
+import mmap
+import os
+import struct
+import sys
+import tempfile
+from array import array
+from collections.abc import Sequence
+
+# Signature et version du format compilé
+MAGIC = b'QCMB'
+VERSION = 1
+
+# En-tête : signature, version, ordre des octets, nombre de questions,
+# nombre d'erreurs et taille de la table des chaînes (32 octets)
+ENTETE = struct.Struct('<4sHHQQQ')
+
+# Nombre de chaînes par question : l'énoncé et les 4 réponses
+CHAINES_PAR_QUESTION = 5
+
+# Taille maximale du cache (en octets) au-delà de laquelle les entrées les
+# plus anciennes sont supprimées
+TAILLE_MAX_CACHE = 256 * 1024 * 1024
+
+EXTENSION = '.qcmb'
+FICHIER_INDEX = 'index.json'
+
+
+def _ordre_octets():
+    """Code de l'ordre des octets natif, stocké dans l'en-tête."""
+    return 0 if sys.byteorder == 'little' else 1
+
+
+def _alignement(position, taille=8):
+    """Nombre d'octets de bourrage pour aligner une position."""
+    return -position % taille
+
+
+class BanqueCompilee(Sequence):
+    """
+    Banque de questions compilée, lue au travers d'une projection mémoire.
+
+    Les questions ne sont décodées qu'au moment où elles sont demandées : le
+    chargement d'une banque se résume à la projection du fichier.
+    """
+    def __init__(self, chemin):
+        """
+        Ouvre une banque compilée.
+
+        Args:
+            chemin (str): Chemin vers le fichier compilé
+        """
+        self.chemin = chemin
+
+        with open(chemin, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        try:
+            self._lire_sections()
+        except Exception:
+            self.fermer()
+            raise
+
+    def _lire_sections(self):
+        """Découpe le fichier projeté en ses différentes sections."""
+        vue = memoryview(self._mmap)
+        if len(vue) < ENTETE.size:
+            raise ValueError(f"Fichier compilé tronqué : {self.chemin}")
+
+        magic, version, ordre, nb_questions, nb_erreurs, taille_table = ENTETE.unpack_from(vue)
+        if magic != MAGIC or version != VERSION or ordre != _ordre_octets():
+            raise ValueError(f"Format de banque compilée non reconnu : {self.chemin}")
+
+        self._nb_questions = nb_questions
+        position = ENTETE.size
+
+        # Décalages des chaînes dans la table (une entrée de plus que de chaînes)
+        nb_chaines = nb_questions * CHAINES_PAR_QUESTION + nb_erreurs
+        fin = position + (nb_chaines + 1) * 8
+        self._decalages = vue[position:fin].cast('Q')
+        position = fin
+
+        # Numéros de ligne des blocs rejetés
+        fin = position + nb_erreurs * 4
+        self._lignes_erreurs = vue[position:fin].cast('I')
+        position = fin + _alignement(fin)
+
+        # Solutions (1 octet par question)
+        fin = position + nb_questions
+        self._solutions = vue[position:fin]
+        position = fin + _alignement(fin)
+
+        # Table des chaînes encodées en UTF-8
+        self._table = vue[position:position + taille_table]
+        if len(self._table) != taille_table:
+            raise ValueError(f"Fichier compilé tronqué : {self.chemin}")
+
+    def _chaine(self, i):
+        """Décode la i-ème chaîne de la table."""
+        return str(self._table[self._decalages[i]:self._decalages[i + 1]], 'utf-8')
+
+    def __len__(self):
+        return self._nb_questions
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            return [self[i] for i in range(*idx.indices(len(self)))]
+
+        if idx < 0:
+            idx += self._nb_questions
+        if not 0 <= idx < self._nb_questions:
+            raise IndexError("indice de question hors limites")
+
+        base = idx * CHAINES_PAR_QUESTION
+        return {
+            'question': self._chaine(base),
+            'reponses': [self._chaine(base + j) for j in range(1, CHAINES_PAR_QUESTION)],
+            'solution': self._solutions[idx]
+        }
+
+    @property
+    def solutions(self):
+        """
+        Solutions (1-4) de toutes les questions, sans copie.
+
+        Returns:
+            memoryview: Un octet par question
+        """
+        return self._solutions
+
+    @property
+    def erreurs(self):
+        """
+        Blocs rejetés lors de la compilation.
+
+        Returns:
+            list: Liste de tuples (numéro de ligne, message)
+        """
+        base = self._nb_questions * CHAINES_PAR_QUESTION
+        return [(ligne, self._chaine(base + i)) for i, ligne in enumerate(self._lignes_erreurs)]
+
+    def fermer(self):
+        """Libère la projection mémoire."""
+        for nom in ('_decalages', '_lignes_erreurs', '_solutions', '_table'):
+            vue = self.__dict__.pop(nom, None)
+            if vue is not None:
+                vue.release()
+        self._mmap.close()
+
+    def __reduce__(self):
+        # La projection n'est pas transmissible : on rouvre le fichier
+        return (BanqueCompilee, (self.chemin,))
+
+    @property
+    def empreinte(self):
+        """
+        Empreinte du fichier de questions d'origine, pour une banque du cache.
+
+        Returns:
+            str: Empreinte SHA-256 hexadécimale (nom du fichier compilé)
+        """
+        return os.path.splitext(os.path.basename(self.chemin))[0]
+
+
+class BanqueMemoire(Sequence):
+    """
+    Banque de questions en mémoire, rangée comme une banque compilée.
+
+    Chaque chaîne distincte (énoncé ou réponse) n'est conservée qu'une fois
+    dans une table partagée ; une question se réduit à CHAINES_PAR_QUESTION
+    rangs dans cette table et à un octet de solution. Sert lorsque la banque
+    ne passe pas par le cache compilé.
+    """
+    def __init__(self, questions, erreurs=None):
+        """
+        Args:
+            questions: Itérable de questions (dictionnaires)
+            erreurs (list): Liste de tuples (numéro de ligne, message), complétée
+                pendant le parcours de `questions`
+        """
+        self.chaines = []
+        self.rangs = array('I')
+        self._solutions = bytearray()
+        self.erreurs = erreurs if erreurs is not None else []
+
+        table = {}
+        for question in questions:
+            for chaine in (question['question'], *question['reponses']):
+                rang = table.get(chaine)
+                if rang is None:
+                    rang = table[chaine] = len(self.chaines)
+                    self.chaines.append(chaine)
+                self.rangs.append(rang)
+            self._solutions.append(question['solution'])
+
+    def __len__(self):
+        return len(self._solutions)
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            return [self[i] for i in range(*idx.indices(len(self)))]
+
+        if idx < 0:
+            idx += len(self)
+        if not 0 <= idx < len(self):
+            raise IndexError("indice de question hors limites")
+
+        base = idx * CHAINES_PAR_QUESTION
+        return {
+            'question': self.chaines[self.rangs[base]],
+            'reponses': [self.chaines[rang] for rang in self.rangs[base + 1:base + CHAINES_PAR_QUESTION]],
+            'solution': self._solutions[idx]
+        }
+
+    @property
+    def solutions(self):
+        """
+        Solutions (1-4) de toutes les questions, sans copie.
+
+        Returns:
+            memoryview: Un octet par question
+        """
+        return memoryview(self._solutions)
+
+
+def compiler_banque(questions, erreurs, chemin):
+    """
+    Écrit une banque compilée à partir d'un flux de questions.
+
+    Les chaînes sont écrites au fil de l'eau dans un fichier temporaire : seuls
+    les décalages et les solutions sont conservés en mémoire.
+
+    Args:
+        questions: Itérable de questions (dictionnaires)
+        erreurs (list): Liste de tuples (numéro de ligne, message), complétée
+            pendant le parcours de `questions`
+        chemin (str): Chemin du fichier compilé à créer
+    """
+    decalages = array('Q', [0])
+    solutions = bytearray()
+    repertoire = os.path.dirname(os.path.abspath(chemin))
+
+    with tempfile.TemporaryFile(dir=repertoire) as table:
+        taille = 0
+
+        def ajouter(chaine):
+            nonlocal taille
+            donnees = chaine.encode('utf-8')
+            table.write(donnees)
+            taille += len(donnees)
+            decalages.append(taille)
+
+        for question in questions:
+            ajouter(question['question'])
+            for reponse in question['reponses']:
+                ajouter(reponse)
+            solutions.append(question['solution'])
+
+        for _, message in erreurs:
+            ajouter(message)
+
+        lignes_erreurs = array('I', (ligne for ligne, _ in erreurs))
+
+        # Écriture dans un fichier temporaire puis renommage atomique
+        descripteur, chemin_tmp = tempfile.mkstemp(dir=repertoire, suffix='.tmp')
+        try:
+            with os.fdopen(descripteur, 'wb') as f:
+                f.write(ENTETE.pack(MAGIC, VERSION, _ordre_octets(), len(solutions), len(lignes_erreurs), taille))
+                f.write(decalages.tobytes())
+                f.write(lignes_erreurs.tobytes())
+                f.write(b'\0' * _alignement(f.tell()))
+                f.write(solutions)
+                f.write(b'\0' * _alignement(f.tell()))
+
+                table.seek(0)
+                while True:
+                    bloc = table.read(1 << 20)
+                    if not bloc:
+                        break
+                    f.write(bloc)
+            os.replace(chemin_tmp, chemin)
+        except BaseException:
+            if os.path.exists(chemin_tmp):
+                os.remove(chemin_tmp)
+            raise
+
+
+def repertoire_cache():
+    """
+    Répertoire du cache des banques compilées.
+
+    Returns:
+        str: Valeur de la variable d'environnement QCM_CACHE_DIR ou, à défaut,
+            ~/.cache/generateur_qcm
+    """
+    return os.environ.get('QCM_CACHE_DIR') or os.path.join(os.path.expanduser('~'), '.cache', 'generateur_qcm')
+
+
+def empreinte_fichier(chemin):
+    """
+    Calcule l'empreinte SHA-256 du contenu d'un fichier.
+
+    Args:
+        chemin (str): Chemin du fichier
+
+    Returns:
+        str: Empreinte hexadécimale
+    """
+    h = hashlib.sha256()
+    with open(chemin, 'rb') as f:
+        for bloc in iter(lambda: f.read(1 << 20), b''):
+            h.update(bloc)
+    return h.hexdigest()
+
+
+def _lire_index(repertoire):
+    """Lit l'index chemin source -> (date, taille, empreinte) du cache."""
+    try:
+        with open(os.path.join(repertoire, FICHIER_INDEX), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _ecrire_index(repertoire, index):
+    """Écrit l'index du cache de façon atomique."""
+    descripteur, chemin_tmp = tempfile.mkstemp(dir=repertoire, suffix='.tmp')
+    with os.fdopen(descripteur, 'w', encoding='utf-8') as f:
+        json.dump(index, f)
+    os.replace(chemin_tmp, os.path.join(repertoire, FICHIER_INDEX))
+
+
+def evincer(repertoire, taille_max=TAILLE_MAX_CACHE, a_conserver=None):
+    """
+    Supprime les banques compilées les moins récemment utilisées tant que la
+    taille totale du cache dépasse la limite.
+
+    Args:
+        repertoire (str): Répertoire du cache
+        taille_max (int): Taille maximale du cache en octets
+        a_conserver (str): Chemin d'une entrée à ne jamais supprimer
+    """
+    entrees = []
+    for nom in os.listdir(repertoire):
+        if nom.endswith(EXTENSION):
+            chemin = os.path.join(repertoire, nom)
+            try:
+                infos = os.stat(chemin)
+            except OSError:
+                continue
+            entrees.append((infos.st_mtime, infos.st_size, chemin))
+
+    total = sum(taille for _, taille, _ in entrees)
+    for _, taille, chemin in sorted(entrees):
+        if total <= taille_max:
+            break
+        if a_conserver and os.path.samefile(chemin, a_conserver):
+            continue
+        try:
+            os.remove(chemin)
+            total -= taille
+        except OSError:
+            pass
+
+
+def charger_banque(chemin_source, repertoire=None, taille_max=TAILLE_MAX_CACHE):
+    """
+    Charge une banque de questions en passant par le cache compilé.
+
+    La banque compilée est réutilisée tant que la date de modification et la
+    taille du fichier source n'ont pas changé, ou que son contenu a la même
+    empreinte. Sinon, elle est reconstruite à partir du fichier texte.
+
+    Args:
+        chemin_source (str): Chemin du fichier de questions au format texte
+        repertoire (str): Répertoire du cache (par défaut repertoire_cache())
+        taille_max (int): Taille maximale du cache en octets
+
+    Returns:
+        BanqueCompilee: Banque projetée en mémoire
+    """
+    # Import local : generateur_qcm importe ce module
+    from generateur_qcm import lire_questions
+
+    repertoire = repertoire or repertoire_cache()
+    os.makedirs(repertoire, exist_ok=True)
+
+    chemin_source = os.path.abspath(chemin_source)
+    infos = os.stat(chemin_source)
+    index = _lire_index(repertoire)
+
+    entree = index.get(chemin_source)
+    if entree and entree['mtime'] == infos.st_mtime_ns and entree['taille'] == infos.st_size:
+        empreinte = entree['empreinte']
+    else:
+        empreinte = empreinte_fichier(chemin_source)
+
+    chemin_compile = os.path.join(repertoire, empreinte + EXTENSION)
+
+    if not os.path.exists(chemin_compile):
+        erreurs = []
+        compiler_banque(lire_questions(chemin_source, erreurs), erreurs, chemin_compile)
+        evincer(repertoire, taille_max, a_conserver=chemin_compile)
+    else:
+        # Marquer l'entrée comme récemment utilisée pour l'éviction
+        os.utime(chemin_compile)
+
+    if entree != {'mtime': infos.st_mtime_ns, 'taille': infos.st_size, 'empreinte': empreinte}:
+        index[chemin_source] = {'mtime': infos.st_mtime_ns, 'taille': infos.st_size, 'empreinte': empreinte}
+        _ecrire_index(repertoire, index)
+
+    try:
+        return BanqueCompilee(chemin_compile)
+    except ValueError:
+        # Fichier d'une autre version ou corrompu : le reconstruire
+        os.remove(chemin_compile)
+        return charger_banque(chemin_source, repertoire, taille_max)
+
+
+def charger_contenu(donnees, repertoire=None, taille_max=TAILLE_MAX_CACHE):
+    """
+    Charge une banque de questions transmise sous forme d'octets (contenu d'un
+    fichier de questions encodé en UTF-8) en passant par le cache compilé.
+
+    La banque compilée porte l'empreinte du contenu : elle est partagée avec
+    celle d'un fichier de questions identique chargé par charger_banque.
+
+    Args:
+        donnees (bytes): Contenu du fichier de questions
+        repertoire (str): Répertoire du cache (par défaut repertoire_cache())
+        taille_max (int): Taille maximale du cache en octets
+
+    Returns:
+        BanqueCompilee: Banque projetée en mémoire
+    """
+    from generateur_qcm import lire_questions
+
+    repertoire = repertoire or repertoire_cache()
+    os.makedirs(repertoire, exist_ok=True)
+
+    chemin_compile = os.path.join(repertoire, hashlib.sha256(donnees).hexdigest() + EXTENSION)
+
+    if not os.path.exists(chemin_compile):
+        erreurs = []
+        source = io.StringIO(donnees.decode('utf-8'), newline=None)
+        compiler_banque(lire_questions(source, erreurs), erreurs, chemin_compile)
+        evincer(repertoire, taille_max, a_conserver=chemin_compile)
+    else:
+        os.utime(chemin_compile)
+
+    return BanqueCompilee(chemin_compile)
@@ -0,0 +1,290 @@
+"""
+Base SQLite de questions, étiquetées par thème, difficulté et fichier d'origine.
+
+Les fichiers de questions (.txt) sont importés dans une table indexée sur
+(theme, difficulte). Un générateur peut ensuite tirer chaque sujet dans
+plusieurs strates, par exemple 5 questions difficiles de cinéma et 5
+questions faciles de culture générale : seuls les identifiants des questions
+retenues par les critères sont lus au chargement, et le texte d'une question
+n'est lu que lorsqu'un sujet l'utilise.
+"""
+import os
+import sqlite3
+from array import array
+from collections.abc import Sequence
+from functools import lru_cache
+
+from generateur_qcm import lire_questions
+
+# Difficulté attribuée aux questions importées sans précision
+DIFFICULTE_DEFAUT = 'moyen'
+
+# Nombre de questions gardées en mémoire après lecture dans la base
+TAILLE_CACHE = 4096
+
+# Valeur d'un critère acceptant tous les thèmes ou toutes les difficultés
+TOUS = '*'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS questions (
+    id INTEGER PRIMARY KEY,
+    theme TEXT NOT NULL,
+    difficulte TEXT NOT NULL,
+    source TEXT NOT NULL,
+    question TEXT NOT NULL,
+    reponse1 TEXT NOT NULL,
+    reponse2 TEXT NOT NULL,
+    reponse3 TEXT NOT NULL,
+    reponse4 TEXT NOT NULL,
+    solution INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS questions_etiquettes ON questions (theme, difficulte, id);
+CREATE INDEX IF NOT EXISTS questions_source ON questions (source);
+"""
+
+
+def theme_du_fichier(fichier_questions):
+    """
+    Thème par défaut d'un fichier de questions, tiré de son nom
+    (QCM_cinema.txt -> cinema).
+
+    Args:
+        fichier_questions (str): Chemin du fichier
+
+    Returns:
+        str: Thème
+    """
+    nom = os.path.splitext(os.path.basename(fichier_questions))[0]
+    return nom[4:] if nom.lower().startswith('qcm_') else nom
+
+
+def ouvrir_base(chemin_base):
+    """
+    Ouvre une base de questions, en créant le schéma si nécessaire.
+
+    Args:
+        chemin_base (str): Chemin du fichier SQLite
+
+    Returns:
+        sqlite3.Connection: Connexion à la base
+    """
+    connexion = sqlite3.connect(chemin_base)
+    connexion.executescript(SCHEMA)
+    return connexion
+
+
+def importer_fichier(chemin_base, fichier_questions, theme=None, difficulte=DIFFICULTE_DEFAUT, source=None):
+    """
+    Importe un fichier de questions dans la base.
+
+    Les questions déjà importées depuis la même source sont remplacées, de
+    sorte qu'un fichier corrigé peut être importé à nouveau.
+
+    Args:
+        chemin_base (str): Chemin du fichier SQLite
+        fichier_questions (str): Fichier de questions au format texte
+        theme (str): Thème des questions (par défaut, tiré du nom du fichier)
+        difficulte (str): Difficulté des questions
+        source (str): Nom de la source (par défaut, nom du fichier)
+
+    Returns:
+        tuple: (nombre de questions importées, blocs rejetés sous forme de
+               couples (numéro de ligne, message))
+    """
+    theme = theme or theme_du_fichier(fichier_questions)
+    source = source or os.path.basename(fichier_questions)
+    erreurs = []
+
+    connexion = ouvrir_base(chemin_base)
+    try:
+        with connexion:
+            connexion.execute("DELETE FROM questions WHERE source = ?", (source,))
+            curseur = connexion.executemany(
+                "INSERT INTO questions (theme, difficulte, source, question, reponse1, reponse2, reponse3, "
+                "reponse4, solution) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                ((theme, difficulte, source, q['question'], *q['reponses'], q['solution'])
+                 for q in lire_questions(fichier_questions, erreurs)))
+            nb_importees = curseur.rowcount
+    finally:
+        connexion.close()
+
+    return nb_importees, erreurs
+
+
+def decrire_base(chemin_base):
+    """
+    Nombre de questions de la base par thème et par difficulté.
+
+    Args:
+        chemin_base (str): Chemin du fichier SQLite
+
+    Returns:
+        list: Triplets (thème, difficulté, nombre de questions)
+    """
+    connexion = ouvrir_base(chemin_base)
+    try:
+        return connexion.execute(
+            "SELECT theme, difficulte, COUNT(*) FROM questions GROUP BY theme, difficulte ORDER BY theme, difficulte"
+        ).fetchall()
+    finally:
+        connexion.close()
+
+
+def analyser_criteres(texte):
+    """
+    Analyse des critères de tirage, par exemple « cinema:difficile:5,culture_generale:facile:5 ».
+
+    Chaque critère donne un thème, une difficulté (TOUS pour n'importe
+    lequel) et le nombre de questions à tirer dans cette strate pour chaque
+    sujet.
+
+    Args:
+        texte (str): Critères séparés par des virgules
+
+    Returns:
+        list: Triplets (thème, difficulté, nombre)
+
+    Raises:
+        ValueError: Si un critère est mal formé
+    """
+    criteres = []
+    for morceau in texte.split(','):
+        morceau = morceau.strip()
+        if not morceau:
+            continue
+        champs = morceau.split(':')
+        try:
+            theme, difficulte, nombre = champs
+            nombre = int(nombre)
+        except ValueError:
+            raise ValueError(f"Critère invalide : {morceau} (attendu : theme:difficulte:nombre)") from None
+        if nombre < 1:
+            raise ValueError(f"Critère invalide : {morceau} (le nombre doit être positif)")
+        criteres.append((theme, difficulte, nombre))
+
+    if not criteres:
+        raise ValueError("Aucun critère de tirage")
+    return criteres
+
+
+class BanqueSQLite(Sequence):
+    """
+    Questions d'une base SQLite retenues par des critères de tirage.
+
+    La banque se comporte comme une séquence de questions : les strates sont
+    placées bout à bout, et self.strates indique pour chacune la plage
+    d'indices et le nombre de questions à tirer par sujet (voir
+    GenerateurQCM.tirer_sujet). Seuls les identifiants sont chargés ; une
+    question n'est lue dans la base qu'à sa première utilisation.
+    """
+    def __init__(self, chemin_base, criteres):
+        """
+        Args:
+            chemin_base (str): Chemin du fichier SQLite
+            criteres (list): Triplets (thème, difficulté, nombre), par exemple
+                issus de analyser_criteres
+
+        Raises:
+            ValueError: Si une strate contient moins de questions que demandé,
+                ou si deux critères retiennent une même question
+        """
+        if not os.path.exists(chemin_base):
+            raise FileNotFoundError(f"Base de questions introuvable : {chemin_base}")
+
+        self.chemin = chemin_base
+        self.criteres = [tuple(critere) for critere in criteres]
+        self.erreurs = []
+        self._connexion = ouvrir_base(chemin_base)
+        self._lire = lru_cache(maxsize=TAILLE_CACHE)(self._lire_question)
+
+        self.ids = array('q')
+        self.strates = []
+        deja_retenus = set()
+        for theme, difficulte, nombre in self.criteres:
+            conditions, valeurs = [], []
+            for colonne, valeur in (('theme', theme), ('difficulte', difficulte)):
+                if valeur != TOUS:
+                    conditions.append(f"{colonne} = ?")
+                    valeurs.append(valeur)
+            requete = "SELECT id FROM questions"
+            if conditions:
+                requete += " WHERE " + " AND ".join(conditions)
+
+            debut = len(self.ids)
+            self.ids.extend(ligne[0] for ligne in self._connexion.execute(requete + " ORDER BY id", valeurs))
+            # Une question retenue par deux critères pourrait figurer deux fois dans un sujet
+            nouveaux = set(self.ids[debut:])
+            if not deja_retenus.isdisjoint(nouveaux):
+                raise ValueError(f"Le critère {theme}:{difficulte} retient des questions déjà retenues "
+                                 f"par un critère précédent : les critères ne doivent pas se recouvrir.")
+            deja_retenus |= nouveaux
+            if len(self.ids) - debut < nombre:
+                raise ValueError(f"La base ne contient que {len(self.ids) - debut} questions pour "
+                                 f"{theme}:{difficulte}, mais {nombre} sont demandées par sujet.")
+            self.strates.append((debut, len(self.ids), nombre))
+
+    @property
+    def nb_questions_sujet(self):
+        """Nombre de questions de chaque sujet (somme des nombres des critères)."""
+        return sum(nombre for _, _, nombre in self.strates)
+
+    def _lire_question(self, identifiant):
+        """Lit une question dans la base."""
+        question, r1, r2, r3, r4, solution = self._connexion.execute(
+            "SELECT question, reponse1, reponse2, reponse3, reponse4, solution FROM questions WHERE id = ?",
+            (identifiant,)).fetchone()
+        return {'question': question, 'reponses': [r1, r2, r3, r4], 'solution': solution}
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            return [self[i] for i in range(*idx.indices(len(self)))]
+        return self._lire(self.ids[idx])
+
+    def identifiant(self, idx):
+        """
+        Identifiant dans la base d'une question de la banque.
+
+        Args:
+            idx (int): Indice de la question dans la banque
+
+        Returns:
+            int: Identifiant de la ligne
+        """
+        return self.ids[idx]
+
+    def fermer(self):
+        """Ferme la connexion à la base."""
+        self._connexion.close()
+
+    def __reduce__(self):
+        # La connexion n'est pas transmissible : on rouvre la base
+        return (BanqueSQLite, (self.chemin, self.criteres))
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Base SQLite de questions étiquetées")
+    parser.add_argument('base', help="Fichier SQLite (créé s'il n'existe pas)")
+    parser.add_argument('fichiers', nargs='*', help="Fichiers de questions à importer")
+    parser.add_argument('--theme', help="Thème des questions importées (par défaut, tiré du nom de chaque fichier)")
+    parser.add_argument('--difficulte', default=DIFFICULTE_DEFAUT,
+                        help=f"Difficulté des questions importées (par défaut : {DIFFICULTE_DEFAUT})")
+
+    args = parser.parse_args()
+
+    try:
+        for fichier in args.fichiers:
+            nb_importees, erreurs = importer_fichier(args.base, fichier, args.theme, args.difficulte)
+            for numero_ligne, message in erreurs:
+                print(f"Avertissement : {fichier} : ligne {numero_ligne} : {message}")
+            print(f"{fichier} : {nb_importees} questions importées")
+
+        for theme, difficulte, nombre in decrire_base(args.base):
+            print(f"{theme:24} {difficulte:12} {nombre:>8}")
+
+    except Exception as e:
+        print(f"Erreur : {e}")
@@ -0,0 +1,375 @@
+import gc
+import importlib.util
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+from generateur_qcm import GenerateurQCM
+
+# Tailles de banque (nombre de questions) et de classe (nombre d'élèves) par profil
+PROFILS = {
+    'rapide': {'banques': [1000], 'classes': [10, 1000]},
+    'complet': {'banques': [1000, 100000, 1000000], 'classes': [10, 1000, 100000]},
+}
+
+# Au-delà de ce nombre d'élèves, le rendu python-docx n'est mesuré qu'avec --tout
+LIMITE_PYTHON_DOCX = 100
+
+# Hausse relative (temps ou mémoire) au-delà de laquelle une mesure est
+# signalée comme une régression
+SEUIL_REGRESSION = 0.20
+
+# Écart absolu minimal (en secondes) pour signaler une régression de temps :
+# les mesures très courtes sont trop bruitées pour être comparées en relatif
+ECART_MINIMAL = 0.01
+
+# Nombre d'exécutions pour la mesure de durée (la meilleure est retenue)
+REPETITIONS = 3
+
+NB_QUESTIONS = 20
+
+# Nombre de sujets par fichier pour la mesure du rendu partitionné
+TAILLE_PARTITION = 500
+
+MOTS = ("question", "film", "auteur", "pays", "année", "réponse", "histoire", "science", "musique",
+        "capitale", "roman", "peintre", "océan", "montagne", "planète", "langue", "siècle", "prix")
+
+
+def banque_synthetique(chemin, nb_questions, graine=0):
+    """
+    Écrit une banque de questions synthétique au format texte.
+
+    Args:
+        chemin (str): Chemin du fichier à créer
+        nb_questions (int): Nombre de questions
+        graine (int): Graine pour la génération du texte
+    """
+    rng = random.Random(graine)
+    with open(chemin, 'w', encoding='utf-8') as f:
+        for i in range(nb_questions):
+            f.write(f"Question {i} : " + ' '.join(rng.choices(MOTS, k=8)) + " ?\n")
+            for _ in range(4):
+                f.write(' '.join(rng.choices(MOTS, k=3)) + "\n")
+            f.write(f"{rng.randint(1, 4)}\n\n")
+
+
+def mesurer(fonction, memoire=True, repetitions=REPETITIONS):
+    """
+    Mesure la durée et, si demandé, le pic de mémoire allouée d'une fonction.
+
+    La durée (meilleure de plusieurs exécutions) est mesurée sans suivi des
+    allocations ; le pic de mémoire l'est lors d'une exécution supplémentaire
+    sous tracemalloc.
+
+    Args:
+        fonction: Fonction sans argument à mesurer
+        memoire (bool): Mesurer aussi le pic de mémoire
+        repetitions (int): Nombre d'exécutions pour la mesure de durée
+
+    Returns:
+        dict: Durée en secondes et pic de mémoire en octets (ou None)
+    """
+    duree = float('inf')
+    for _ in range(repetitions):
+        gc.collect()
+        debut = time.perf_counter()
+        fonction()
+        duree = min(duree, time.perf_counter() - debut)
+
+    pic = None
+    if memoire:
+        gc.collect()
+        tracemalloc.start()
+        try:
+            fonction()
+            pic = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    return {'temps': round(duree, 6), 'memoire_pic': pic}
+
+
+def mesurer_demarrage(fichier, dossier, repetitions=REPETITIONS):
+    """
+    Mesure le démarrage à froid d'une génération au format texte.
+
+    La ligne de commande est lancée dans un nouvel interpréteur avec
+    `python -X importtime` : on retient la durée totale des imports (meilleure
+    de plusieurs exécutions) et la durée totale du processus. Une génération
+    texte ne doit importer aucun moteur de rendu DOCX.
+
+    Chaque exécution dispose d'un cache des banques compilées vide, propre à
+    la mesure : le cache de l'utilisateur n'est ni lu ni modifié.
+
+    Args:
+        fichier (str): Banque de questions
+        dossier (str): Répertoire des fichiers produits
+        repetitions (int): Nombre d'exécutions
+
+    Returns:
+        tuple: (durée des imports, durée du processus, modules importés)
+    """
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'generateur_qcm.py')
+    commande = [sys.executable, '-X', 'importtime', script, fichier, '--format', 'txt', '--nb_eleves', '1',
+                '--nb_questions', '5', '--dossier-sortie', dossier]
+
+    duree_imports = duree_processus = float('inf')
+    for rang in range(repetitions):
+        environnement = {**os.environ, 'QCM_CACHE_DIR': os.path.join(dossier, f'cache_demarrage_{rang}')}
+        debut = time.perf_counter()
+        resultat = subprocess.run(commande, capture_output=True, text=True, check=True, env=environnement)
+        duree_processus = min(duree_processus, time.perf_counter() - debut)
+
+        # Lignes « import time: propre | cumulé | module », les modules
+        # importés directement n'étant pas indentés
+        total = 0
+        modules = set()
+        for ligne in resultat.stderr.splitlines():
+            if not ligne.startswith('import time:') or 'self [us]' in ligne:
+                continue
+            _, cumule, module = ligne.split('|')
+            modules.add(module.strip())
+            if not module.startswith('  '):
+                total += int(cumule)
+        duree_imports = min(duree_imports, total / 1e6)
+
+    return round(duree_imports, 6), round(duree_processus, 6), modules
+
+
+def cas_de_mesure(generateur, dossier, tout=False):
+    """
+    Liste les étapes à mesurer pour un générateur.
+
+    Args:
+        generateur (GenerateurQCM): Générateur configuré
+        dossier (str): Répertoire des fichiers produits
+        tout (bool): Mesurer aussi le rendu python-docx des grandes classes
+
+    Returns:
+        list: Couples (nom de l'étape, fonction sans argument)
+    """
+    sortie = lambda nom: os.path.join(dossier, nom)
+    sujets = generateur.generer_sujets()
+
+    cas = [
+        ('generer_sujets', generateur.generer_sujets),
+        ('generer_fichier_txt', lambda: generateur.generer_fichier_txt(sujets, sortie('sujets.txt'))),
+        ('generer_fichier_correction', lambda: generateur.generer_fichier_correction(sujets, sortie('corrections.txt'))),
+        ('generer_fichiers_txt (flux)',
+         lambda: generateur.generer_fichiers_txt(generateur.iterer_sujets(), sortie('sujets.txt'),
+                                                 sortie('corrections.txt'))),
+        ('generer_fichier_docx (fast)',
+         lambda: generateur.generer_fichier_docx(sujets, sortie('sujets.docx'), moteur='fast')),
+        ('generer_fichier_correction_docx (fast)',
+         lambda: generateur.generer_fichier_correction_docx(sujets, sortie('corrections.docx'), moteur='fast')),
+        ('generer_fichiers_docx_partitionnes (fast)',
+         lambda: generateur.generer_fichiers_docx_partitionnes(os.path.join(dossier, 'partitions'),
+                                                               TAILLE_PARTITION, moteur='fast')),
+        ('generer_fichier_pdf', lambda: generateur.generer_fichier_pdf(sujets, sortie('sujets.pdf'))),
+        ('generer_fichier_correction_pdf',
+         lambda: generateur.generer_fichier_correction_pdf(sujets, sortie('corrections.pdf'))),
+        ('generer_fichier_cles', lambda: generateur.generer_fichier_cles(sujets, sortie('cles.bin'))),
+    ]
+
+    if importlib.util.find_spec('numpy') is not None:
+        cas.insert(1, ('generer_sujets (numpy)', lambda: generateur.generer_sujets(moteur='numpy')))
+
+    if tout or generateur.nb_eleves <= LIMITE_PYTHON_DOCX:
+        cas += [
+            ('generer_fichier_docx (python-docx)',
+             lambda: generateur.generer_fichier_docx(sujets, sortie('sujets.docx'))),
+            ('generer_fichier_correction_docx (python-docx)',
+             lambda: generateur.generer_fichier_correction_docx(sujets, sortie('corrections.docx'))),
+        ]
+
+    return cas
+
+
+def executer(banques, classes, memoire=True, tout=False, repetitions=REPETITIONS, afficher=print):
+    """
+    Exécute toutes les mesures.
+
+    Args:
+        banques (list): Tailles de banque à mesurer
+        classes (list): Tailles de classe à mesurer
+        memoire (bool): Mesurer aussi le pic de mémoire
+        tout (bool): Mesurer aussi le rendu python-docx des grandes classes
+        repetitions (int): Nombre d'exécutions par mesure de durée
+        afficher: Fonction d'affichage de la progression
+
+    Returns:
+        list: Résultats (étape, banque, élèves, temps, pic de mémoire)
+    """
+    resultats = []
+
+    def noter(cas, nb_banque, nb_eleves, mesure):
+        resultat = {'cas': cas, 'banque': nb_banque, 'eleves': nb_eleves, **mesure}
+        resultats.append(resultat)
+        memoire_mo = f"{mesure['memoire_pic'] / 1e6:9.1f} Mo" if mesure['memoire_pic'] is not None else ''
+        afficher(f"{cas:48} banque={nb_banque:<8} eleves={nb_eleves or '-':<7} {mesure['temps']:9.3f} s {memoire_mo}")
+
+    # Les banques synthétiques sont compilées dans un cache temporaire, et non
+    # dans celui de l'utilisateur, rétabli à la fin des mesures
+    ancien_cache = os.environ.get('QCM_CACHE_DIR')
+    with tempfile.TemporaryDirectory() as dossier:
+        os.environ['QCM_CACHE_DIR'] = os.path.join(dossier, 'cache')
+        try:
+            for nb_banque in banques:
+                fichier = os.path.join(dossier, f"banque_{nb_banque}.txt")
+                banque_synthetique(fichier, nb_banque)
+
+                if nb_banque == banques[0]:
+                    duree_imports, duree_processus, modules = mesurer_demarrage(fichier, dossier, repetitions)
+                    # Une génération texte ne doit pas importer python-docx : voir regressions_demarrage
+                    noter('demarrage txt (imports)', nb_banque, None,
+                          {'temps': duree_imports, 'memoire_pic': None,
+                           'imports_docx': 'docx' in modules or 'lxml' in modules})
+                    noter('demarrage txt (processus)', nb_banque, None,
+                          {'temps': duree_processus, 'memoire_pic': None})
+
+                noter('charger_questions', nb_banque, None,
+                      mesurer(lambda: GenerateurQCM(fichier, 1, NB_QUESTIONS, 0, cache=False), memoire, repetitions))
+
+                # Première lecture : compilation de la banque, puis lecture depuis le cache
+                GenerateurQCM(fichier, 1, NB_QUESTIONS, 0)
+                noter('charger_questions (cache)', nb_banque, None,
+                      mesurer(lambda: GenerateurQCM(fichier, 1, NB_QUESTIONS, 0), memoire, repetitions))
+
+                for nb_eleves in classes:
+                    generateur = GenerateurQCM(fichier, nb_eleves, NB_QUESTIONS, 42)
+                    for cas, fonction in cas_de_mesure(generateur, dossier, tout):
+                        noter(cas, nb_banque, nb_eleves, mesurer(fonction, memoire, repetitions))
+        finally:
+            if ancien_cache is None:
+                os.environ.pop('QCM_CACHE_DIR', None)
+            else:
+                os.environ['QCM_CACHE_DIR'] = ancien_cache
+
+    return resultats
+
+
+def comparer(resultats, reference, seuil=SEUIL_REGRESSION, ecart_minimal=ECART_MINIMAL):
+    """
+    Compare des résultats à une référence.
+
+    Args:
+        resultats (list): Résultats de la série courante
+        reference (list): Résultats de la série de référence
+        seuil (float): Hausse relative tolérée
+        ecart_minimal (float): Hausse absolue tolérée pour les temps (secondes)
+
+    Returns:
+        list: Messages décrivant les régressions
+    """
+    cle = lambda r: (r['cas'], r['banque'], r['eleves'])
+    references = {cle(r): r for r in reference}
+
+    regressions = []
+    for resultat in resultats:
+        ancien = references.get(cle(resultat))
+        if ancien is None:
+            continue
+        for mesure in ('temps', 'memoire_pic'):
+            if resultat[mesure] is None or not ancien.get(mesure):
+                continue
+            if mesure == 'temps' and resultat[mesure] - ancien[mesure] < ecart_minimal:
+                continue
+            hausse = resultat[mesure] / ancien[mesure] - 1
+            if hausse > seuil:
+                regressions.append(f"{resultat['cas']} (banque={resultat['banque']}, eleves={resultat['eleves']}) : "
+                                   f"{mesure} {ancien[mesure]} -> {resultat[mesure]} (+{hausse:.0%})")
+    return regressions
+
+
+def regressions_demarrage(resultats):
+    """
+    Vérifie qu'une génération texte n'importe pas python-docx au démarrage.
+
+    Args:
+        resultats (list): Résultats de la série courante
+
+    Returns:
+        list: Messages décrivant les régressions
+    """
+    return [f"{resultat['cas']} (banque={resultat['banque']}) : une génération texte importe python-docx"
+            for resultat in resultats if resultat.get('imports_docx')]
+
+
+def _lire_json(chemin, defaut):
+    """Lit un fichier JSON, ou renvoie une valeur par défaut s'il n'existe pas."""
+    if not os.path.exists(chemin):
+        return defaut
+    with open(chemin, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _ecrire_json(chemin, donnees):
+    """Écrit un fichier JSON."""
+    with open(chemin, 'w', encoding='utf-8') as f:
+        json.dump(donnees, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Mesures de performance du générateur de QCM')
+    parser.add_argument('--profil', choices=sorted(PROFILS), default='rapide',
+                        help='Tailles de banques et de classes mesurées (rapide ou complet)')
+    parser.add_argument('--banques', type=int, nargs='+', help='Tailles de banque, à la place du profil')
+    parser.add_argument('--classes', type=int, nargs='+', help='Tailles de classe, à la place du profil')
+    parser.add_argument('--repetitions', type=int, default=REPETITIONS,
+                        help='Nombre d\'exécutions par mesure de durée (la meilleure est retenue)')
+    parser.add_argument('--sans-memoire', action='store_true', help='Ne pas mesurer le pic de mémoire')
+    parser.add_argument('--tout', action='store_true',
+                        help=f'Mesurer aussi le rendu python-docx au-delà de {LIMITE_PYTHON_DOCX} élèves')
+    parser.add_argument('--historique', default='benchmark_historique.json',
+                        help='Fichier JSON auquel chaque série de mesures est ajoutée')
+    parser.add_argument('--reference', default='benchmark_reference.json',
+                        help='Série de référence pour la détection des régressions')
+    parser.add_argument('--enregistrer-reference', action='store_true',
+                        help='Enregistrer cette série comme nouvelle référence')
+    parser.add_argument('--seuil', type=float, default=SEUIL_REGRESSION,
+                        help='Hausse relative tolérée avant de signaler une régression (0.2 = 20 %%)')
+
+    args = parser.parse_args()
+
+    banques = args.banques or PROFILS[args.profil]['banques']
+    classes = args.classes or PROFILS[args.profil]['classes']
+
+    serie = {
+        'date': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'machine': platform.platform(),
+        'resultats': executer(banques, classes, memoire=not args.sans_memoire,
+                              tout=args.tout, repetitions=args.repetitions)
+    }
+
+    historique = _lire_json(args.historique, [])
+    historique.append(serie)
+    _ecrire_json(args.historique, historique)
+    print(f"Mesures ajoutées à {args.historique}")
+
+    # Les imports au démarrage ne dépendent pas de la référence
+    regressions = regressions_demarrage(serie['resultats'])
+
+    if args.enregistrer_reference:
+        _ecrire_json(args.reference, serie)
+        print(f"Référence enregistrée dans {args.reference}")
+    else:
+        reference = _lire_json(args.reference, None)
+        if reference is not None:
+            regressions += comparer(serie['resultats'], reference['resultats'], args.seuil)
+            if not regressions:
+                print("Aucune régression par rapport à la référence")
+
+    for message in regressions:
+        print(f"Régression : {message}")
+    if regressions:
+        sys.exit(1)
@@ -0,0 +1,145 @@
+import mmap
+import struct
+import sys
+from array import array
+
+from index_croise import IndexCroise
+
+# Signature et version du format des clés de correction
+MAGIC = b'QCMK'
+VERSION = 1
+
+# En-tête : signature, version, options, nombre de sujets, nombre de
+# questions par sujet et position de l'index croisé dans le fichier (32 octets)
+ENTETE = struct.Struct('<4sHHQQQ')
+
+# Option : une table des identifiants des questions dans la base (entiers
+# 64 bits petit-boutistes, un par question de la banque) sépare les
+# enregistrements de l'index croisé
+OPTION_IDENTIFIANTS = 1
+
+# Chaque enregistrement : numéro du sujet (entier 64 bits petit-boutiste)
+# suivi d'un octet par question (bonne réponse, 0 pour 'a' à 3 pour 'd')
+NUMERO = struct.Struct('<q')
+
+
+def ecrire_cles(generateur, sujets, nom_fichier):
+    """
+    Écrit les clés de correction dans un fichier binaire compact.
+
+    Les sujets sont écrits au fur et à mesure ; l'index croisé du générateur
+    (questions de la banque intégrées dans chaque sujet) est ajouté à la fin,
+    une fois tous les sujets produits. Pour une banque SQLite, dont les
+    indices dépendent des critères, il est précédé des identifiants des
+    questions dans la base.
+
+    Args:
+        generateur (GenerateurQCM): Générateur des sujets
+        sujets: Couples (numéro, sujet), par exemple issus de GenerateurQCM.iterer_sujets
+        nom_fichier (str): Nom du fichier à générer
+    """
+    with open(nom_fichier, 'wb') as f:
+        f.write(bytes(ENTETE.size))  # En-tête complété à la fin
+
+        nb_sujets = 0
+        for num_sujet, (_, reponses) in sujets:
+            f.write(NUMERO.pack(num_sujet))
+            f.write(bytes(ord(lettre) - 97 for lettre in reponses))
+            nb_sujets += 1
+
+        options = 0
+        identifiant = getattr(generateur.questions, 'identifiant', None)
+        if identifiant is not None:
+            options |= OPTION_IDENTIFIANTS
+            identifiants = array('q', (identifiant(idx) for idx in range(generateur.index.nb_questions_banque)))
+            if sys.byteorder == 'big':
+                identifiants.byteswap()
+            f.write(identifiants.tobytes())
+
+        position_index = f.tell()
+        f.write(generateur.index.to_bytes())
+
+        f.seek(0)
+        f.write(ENTETE.pack(MAGIC, VERSION, options, nb_sujets, generateur.nb_questions, position_index))
+
+
+class FichierCles:
+    """
+    Clés de correction lues au travers d'une projection mémoire.
+    """
+    def __init__(self, chemin):
+        """
+        Args:
+            chemin (str): Chemin du fichier de clés
+        """
+        self.chemin = chemin
+
+        with open(chemin, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, options, self.nb_sujets, self.nb_questions, position_index = ENTETE.unpack_from(self._mmap)
+        if magic != MAGIC or version != VERSION:
+            self._mmap.close()
+            raise ValueError(f"Format de fichier de clés non reconnu : {chemin}")
+
+        self.taille_enregistrement = NUMERO.size + self.nb_questions
+        self.index = IndexCroise.from_bytes(self._mmap[position_index:])
+        self._lignes = None
+
+        # Identifiants des questions dans la base, pour une banque SQLite
+        self.identifiants = None
+        if options & OPTION_IDENTIFIANTS:
+            debut = ENTETE.size + self.nb_sujets * self.taille_enregistrement
+            self.identifiants = array('q', self._mmap[debut:position_index])
+            if sys.byteorder == 'big':
+                self.identifiants.byteswap()
+
+    @property
+    def enregistrements(self):
+        """
+        Enregistrements (numéro, clés) de tous les sujets, sans copie.
+
+        Returns:
+            memoryview: Zone du fichier contenant les enregistrements
+        """
+        return memoryview(self._mmap)[ENTETE.size:ENTETE.size + self.nb_sujets * self.taille_enregistrement]
+
+    def identifiant(self, idx):
+        """
+        Numéro d'une question de la banque, comme dans les informations pour le correcteur.
+
+        Args:
+            idx (int): Indice de la question dans la banque
+
+        Returns:
+            int: L'indice lui-même, ou l'identifiant de la question dans la base
+                 pour une banque SQLite
+        """
+        return idx if self.identifiants is None else self.identifiants[idx]
+
+    def _ligne(self, num_sujet):
+        """Rang d'un sujet dans le fichier."""
+        if self._lignes is None:
+            self._lignes = {}
+            for ligne in range(self.nb_sujets):
+                debut = ENTETE.size + ligne * self.taille_enregistrement
+                self._lignes[NUMERO.unpack_from(self._mmap, debut)[0]] = ligne
+        return self._lignes[num_sujet]
+
+    def cles_du_sujet(self, num_sujet):
+        """
+        Bonnes réponses d'un sujet.
+
+        Args:
+            num_sujet (int): Numéro du sujet
+
+        Returns:
+            str: Lettres des bonnes réponses, dans l'ordre des questions
+        """
+        debut = ENTETE.size + self._ligne(num_sujet) * self.taille_enregistrement + NUMERO.size
+        return ''.join(chr(97 + c) for c in self._mmap[debut:debut + self.nb_questions])
+
+    def fermer(self):
+        """Libère la projection mémoire."""
+        self._mmap.close()
+
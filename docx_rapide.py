@@ -0,0 +1,368 @@
+"""
+Rendu DOCX rapide : le document est écrit directement en WordprocessingML,
+fragment par fragment, dans l'archive zip.
+
+La mise en page reproduit celle du rendu python-docx (rendu_docx) : mêmes
+paragraphes, mêmes sections, sans construire l'arbre du document en
+mémoire et sans dépendre de python-docx.
+"""
+import zipfile
+from xml.sax.saxutils import escape
+
+ENTETE_XML = "<?xml version='1.0' encoding='UTF-8' standalone='yes'?>\n"
+
+NS_W = 'http://schemas.openxmlformats.org/wordprocessingml/2006/main'
+NS_R = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
+
+CONTENT_TYPES = ENTETE_XML + (
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/word/document.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>'
+    '<Override PartName="/word/styles.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.styles+xml"/>'
+    '<Override PartName="/word/settings.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.settings+xml"/>'
+    '<Override PartName="/docProps/core.xml" '
+    'ContentType="application/vnd.openxmlformats-package.core-properties+xml"/>'
+    '</Types>'
+)
+
+RELATIONS = ENTETE_XML + (
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="word/document.xml"/>'
+    '<Relationship Id="rId2" Type="http://schemas.openxmlformats.org/package/2006/relationships/metadata/core-properties" '
+    'Target="docProps/core.xml"/>'
+    '</Relationships>'
+)
+
+RELATIONS_DOCUMENT = ENTETE_XML + (
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" '
+    'Target="styles.xml"/>'
+    '<Relationship Id="rId2" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/settings" '
+    'Target="settings.xml"/>'
+    '</Relationships>'
+)
+
+# Valeurs par défaut du modèle de python-docx : Calibri 11 pt, 10 pt après
+# chaque paragraphe, interligne 1,15
+STYLES = ENTETE_XML + (
+    f'<w:styles xmlns:w="{NS_W}">'
+    '<w:docDefaults><w:rPrDefault><w:rPr>'
+    '<w:rFonts w:ascii="Calibri" w:eastAsia="Calibri" w:hAnsi="Calibri" w:cs="Times New Roman"/>'
+    '<w:sz w:val="22"/><w:szCs w:val="22"/><w:lang w:val="en-US" w:eastAsia="en-US" w:bidi="ar-SA"/>'
+    '</w:rPr></w:rPrDefault>'
+    '<w:pPrDefault><w:pPr><w:spacing w:after="200" w:line="276" w:lineRule="auto"/></w:pPr></w:pPrDefault>'
+    '</w:docDefaults>'
+    '<w:style w:type="paragraph" w:default="1" w:styleId="Normal"><w:name w:val="Normal"/><w:qFormat/></w:style>'
+    '</w:styles>'
+)
+
+PARAMETRES = ENTETE_XML + (
+    f'<w:settings xmlns:w="{NS_W}">'
+    '<w:defaultTabStop w:val="720"/>'
+    '<w:characterSpacingControl w:val="doNotCompress"/>'
+    '<w:compat><w:compatSetting w:name="compatibilityMode" w:uri="http://schemas.microsoft.com/office/word" '
+    'w:val="14"/></w:compat>'
+    '</w:settings>'
+)
+
+PROPRIETES = ENTETE_XML + (
+    '<cp:coreProperties xmlns:cp="http://schemas.openxmlformats.org/package/2006/metadata/core-properties" '
+    'xmlns:dc="http://purl.org/dc/elements/1.1/"><dc:title>QCM</dc:title></cp:coreProperties>'
+)
+
+DEBUT_DOCUMENT = ENTETE_XML + f'<w:document xmlns:w="{NS_W}" xmlns:r="{NS_R}"><w:body>'
+FIN_DOCUMENT = '</w:body></w:document>'
+
+PARAGRAPHE_VIDE = '<w:p/>'
+SAUT_DE_PAGE = '<w:p><w:r><w:br w:type="page"/></w:r></w:p>'
+
+# Dimensions en vingtièmes de point : page Letter, 1,5 cm, 0,5 pouce, 1 pouce
+LARGEUR_PAGE, HAUTEUR_PAGE = 12240, 15840
+MARGE_1_5_CM = 850
+MARGE_0_5_POUCE = 720
+
+# Nombre de fragments XML accumulés avant chaque écriture dans l'archive
+TAILLE_TAMPON = 512
+
+
+def section(largeur, hauteur, haut, droite, bas, gauche, colonnes=1, paysage=False):
+    """
+    Construit les propriétés (w:sectPr) d'une section.
+
+    Args:
+        largeur, hauteur (int): Dimensions de la page
+        haut, droite, bas, gauche (int): Marges
+        colonnes (int): Nombre de colonnes
+        paysage (bool): Orientation paysage
+
+    Returns:
+        str: Fragment XML w:sectPr
+    """
+    orientation = ' w:orient="landscape"' if paysage else ''
+    nb_colonnes = f' w:num="{colonnes}"' if colonnes > 1 else ''
+    return (
+        f'<w:sectPr><w:pgSz w:w="{largeur}" w:h="{hauteur}"{orientation}/>'
+        f'<w:pgMar w:top="{haut}" w:right="{droite}" w:bottom="{bas}" w:left="{gauche}" '
+        'w:header="720" w:footer="720" w:gutter="0"/>'
+        f'<w:cols{nb_colonnes} w:space="720"/><w:docGrid w:linePitch="360"/></w:sectPr>'
+    )
+
+
+# En-tête d'un sujet : paysage, une colonne, marges de 1,5 cm
+SECTION_ENTETE = section(HAUTEUR_PAGE, LARGEUR_PAGE, MARGE_1_5_CM, MARGE_1_5_CM, MARGE_1_5_CM, MARGE_1_5_CM,
+                         paysage=True)
+# Questions d'un sujet : paysage, deux colonnes, marges latérales de 0,5 pouce
+SECTION_QUESTIONS = section(HAUTEUR_PAGE, LARGEUR_PAGE, MARGE_1_5_CM, MARGE_0_5_POUCE, MARGE_1_5_CM,
+                            MARGE_0_5_POUCE, colonnes=2, paysage=True)
+# Feuille de correction : portrait, marges du modèle par défaut
+SECTION_CORRECTION = section(LARGEUR_PAGE, HAUTEUR_PAGE, 1440, 1800, 1440, 1800)
+
+
+def run(texte, gras=False, taille=None):
+    """
+    Construit un run (w:r) ; les retours à la ligne deviennent des w:br.
+
+    Args:
+        texte (str): Texte du run
+        gras (bool): Texte en gras
+        taille (int): Taille de police en points
+
+    Returns:
+        str: Fragment XML w:r
+    """
+    proprietes = ''
+    if gras or taille:
+        proprietes = '<w:rPr>' + ('<w:b/>' if gras else '') + \
+            (f'<w:sz w:val="{taille * 2}"/>' if taille else '') + '</w:rPr>'
+
+    contenu = '<w:br/>'.join(
+        f'<w:t xml:space="preserve">{escape(ligne)}</w:t>' if ligne else ''
+        for ligne in texte.split('\n')
+    )
+    return f'<w:r>{proprietes}{contenu}</w:r>'
+
+
+def paragraphe(*runs, centre=False):
+    """
+    Construit un paragraphe (w:p).
+
+    Args:
+        runs (str): Fragments w:r du paragraphe
+        centre (bool): Paragraphe centré
+
+    Returns:
+        str: Fragment XML w:p
+    """
+    proprietes = '<w:pPr><w:jc w:val="center"/></w:pPr>' if centre else ''
+    return f'<w:p>{proprietes}{"".join(runs)}</w:p>'
+
+
+def saut_de_section(proprietes):
+    """Paragraphe vide portant les propriétés de la section qu'il termine."""
+    return f'<w:p><w:pPr>{proprietes}</w:pPr></w:p>'
+
+
+class EcrivainDocx:
+    """
+    Écrit un document DOCX en flux : les fragments XML du corps du document
+    sont ajoutés au fur et à mesure et vidés par blocs dans l'archive.
+    """
+    def __init__(self, nom_fichier):
+        """
+        Args:
+            nom_fichier (str): Nom du fichier à générer
+        """
+        self.nom_fichier = nom_fichier
+        self._tampon = []
+        self.taille = 0
+
+    def __enter__(self):
+        self._archive = zipfile.ZipFile(self.nom_fichier, 'w', zipfile.ZIP_DEFLATED)
+        self._archive.writestr('[Content_Types].xml', CONTENT_TYPES)
+        self._archive.writestr('_rels/.rels', RELATIONS)
+        self._archive.writestr('docProps/core.xml', PROPRIETES)
+        self._archive.writestr('word/_rels/document.xml.rels', RELATIONS_DOCUMENT)
+        self._archive.writestr('word/styles.xml', STYLES)
+        self._archive.writestr('word/settings.xml', PARAMETRES)
+        self._flux = self._archive.open('word/document.xml', 'w', force_zip64=True)
+        self.ajouter(DEBUT_DOCUMENT)
+        return self
+
+    def ajouter(self, fragment):
+        """
+        Ajoute un fragment XML au corps du document.
+
+        Args:
+            fragment (str): Fragment XML
+        """
+        self._tampon.append(fragment)
+        if len(self._tampon) >= TAILLE_TAMPON:
+            self._vider()
+
+    def _vider(self):
+        """Écrit les fragments en attente dans l'archive."""
+        donnees = ''.join(self._tampon).encode('utf-8')
+        self._flux.write(donnees)
+        self.taille += len(donnees)
+        self._tampon.clear()
+
+    def terminer(self, proprietes_section):
+        """
+        Termine le document par les propriétés de sa dernière section.
+
+        Args:
+            proprietes_section (str): Fragment XML w:sectPr
+        """
+        self.ajouter(proprietes_section)
+        self.ajouter(FIN_DOCUMENT)
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            if exc_type is None:
+                self._vider()
+            self._flux.close()
+        finally:
+            self._archive.close()
+        return False
+
+
+def ecrire_sujets(generateur, sujets, nom_fichier):
+    """
+    Écrit le fichier DOCX des sujets.
+
+    Args:
+        generateur (GenerateurQCM): Générateur des sujets
+        sujets: Couples (numéro, sujet), par exemple issus de GenerateurQCM.iterer_sujets
+        nom_fichier (str): Nom du fichier à générer
+    """
+    # Le tableau de réponses ne dépend que du nombre de questions
+    numeros = []
+    for i in range(1, generateur.nb_questions + 1):
+        if i == generateur.nb_questions // 2 + 1:
+            numeros.append('<w:r><w:br/></w:r>')  # Saut de ligne à la moitié
+        numeros.append(run(f"{i} "))
+    tableau_reponses = paragraphe(*numeros)
+
+    consignes = paragraphe(
+        run("CONSIGNES :\n", gras=True),
+        run("- Entourez la lettre correspondant à la bonne réponse sur le tableau de réponses ci-dessous.\n"),
+        run("- Une seule réponse est correcte pour chaque question.\n"),
+        run("- Toute rature ou correction sur le tableau sera considérée comme une erreur.")
+    )
+    nom = paragraphe(run("Nom prénom : _______________________________"))
+
+    with EcrivainDocx(nom_fichier) as document:
+        premier = True
+        for num_sujet, (questions, _) in sujets:
+            # Chaque nouveau sujet commence par terminer la section des
+            # questions du sujet précédent
+            if not premier:
+                document.ajouter(saut_de_section(SECTION_QUESTIONS))
+            premier = False
+
+            document.ajouter(paragraphe(run(f"SUJET {num_sujet}", gras=True, taille=16), centre=True))
+            document.ajouter(nom)
+            document.ajouter(consignes)
+            document.ajouter(paragraphe(run(f"Tableau de réponses - Sujet {num_sujet}", gras=True)))
+            document.ajouter(tableau_reponses)
+            document.ajouter(PARAGRAPHE_VIDE)  # Espace
+
+            # Fin de la section d'en-tête, les questions suivent sur deux colonnes
+            document.ajouter(saut_de_section(SECTION_ENTETE))
+
+            for q in questions:
+                document.ajouter(paragraphe(run(f"Question {q['numero']} : {q['question']}", gras=True)))
+                for j, reponse in enumerate(q['reponses']):
+                    lettre = chr(97 + j)  # 'a', 'b', 'c' ou 'd'
+                    document.ajouter(paragraphe(run(f"{lettre}) {reponse}")))
+                document.ajouter(PARAGRAPHE_VIDE)  # Espace entre les questions
+
+        document.terminer(SECTION_QUESTIONS if not premier else SECTION_ENTETE)
+
+
+def ecrire_corrections(generateur, sujets, nom_fichier):
+    """
+    Écrit le fichier DOCX des corrections.
+
+    Args:
+        generateur (GenerateurQCM): Générateur des sujets, dont le suivi des
+            questions est lu une fois tous les sujets parcourus
+        sujets: Couples (numéro, sujet), par exemple issus de GenerateurQCM.iterer_sujets
+        nom_fichier (str): Nom du fichier à générer
+    """
+    with EcrivainDocx(nom_fichier) as document:
+        document.ajouter(paragraphe(run("FEUILLE DE CORRECTION", gras=True, taille=16), centre=True))
+
+        # Écrire les corrections pour chaque sujet
+        for num_sujet, (_, reponses) in sujets:
+            document.ajouter(paragraphe(run(f"Sujet {num_sujet}", gras=True)))
+            document.ajouter(paragraphe(*(run(''.join(reponses[i:i+5]) + ' ')
+                                          for i in range(0, len(reponses), 5))))
+            document.ajouter(PARAGRAPHE_VIDE)  # Espace entre les sujets
+
+        document.ajouter(SAUT_DE_PAGE)
+        document.ajouter(paragraphe(run("INFORMATIONS SUPPLÉMENTAIRES POUR LE CORRECTEUR", gras=True, taille=14),
+                                    centre=True))
+        document.ajouter(PARAGRAPHE_VIDE)
+
+        # Quelles questions initiales ont été intégrées dans chaque sujet
+        document.ajouter(paragraphe(run("Questions initiales intégrées dans chaque sujet :", gras=True)))
+        for num_sujet, indices in generateur.questions_par_sujet.items():
+            indices_str = ', '.join(str(generateur.numero_question(i)) for i in indices)
+            document.ajouter(paragraphe(run(f"Sujet {num_sujet} : questions {indices_str}")))
+
+        document.ajouter(PARAGRAPHE_VIDE)
+
+        # Dans quels sujets apparaît chaque question initiale
+        document.ajouter(paragraphe(run("Sujets dans lesquels apparaît chaque question initiale :", gras=True)))
+        for num_question, sujets_indices in generateur.sujets_par_question.items():
+            if sujets_indices:  # Si la question apparaît dans au moins un sujet
+                sujets_str = ', '.join(str(i) for i in sujets_indices)
+                document.ajouter(paragraphe(run(f"Question {generateur.numero_question(num_question)} : sujets {sujets_str}")))
+
+        document.terminer(SECTION_CORRECTION)
+
+
+def fusionner_docx(fichiers, destination):
+    """
+    Fusionne plusieurs documents DOCX en un seul, dans l'ordre donné.
+
+    Les documents doivent provenir du même moteur de rendu : le paquet du
+    premier (styles, paramètres...) sert de base, et le corps de chaque
+    document est recopié à la suite. La dernière section de chaque document,
+    sauf le dernier, est convertie en saut de section. Un seul document est
+    lu en mémoire à la fois.
+
+    Args:
+        fichiers (list): Chemins des documents à fusionner
+        destination (str): Chemin du document fusionné
+    """
+    with zipfile.ZipFile(fichiers[0]) as modele, \
+            zipfile.ZipFile(destination, 'w', zipfile.ZIP_DEFLATED) as archive:
+        for entree in modele.infolist():
+            if entree.filename != 'word/document.xml':
+                archive.writestr(entree, modele.read(entree))
+
+        with archive.open('word/document.xml', 'w', force_zip64=True) as flux:
+            for rang, fichier in enumerate(fichiers):
+                with zipfile.ZipFile(fichier) as source:
+                    xml = source.read('word/document.xml').decode('utf-8')
+
+                debut = xml.index('<w:body>') + len('<w:body>')
+                fin = xml.rindex('</w:body>')
+                if rang == 0:
+                    flux.write(xml[:debut].encode('utf-8'))
+
+                corps = xml[debut:fin]
+                if rang < len(fichiers) - 1:
+                    # La section finale du document devient un saut de section
+                    position = corps.rindex('<w:sectPr')
+                    corps = corps[:position] + saut_de_section(corps[position:])
+                flux.write(corps.encode('utf-8'))
+
+            flux.write(FIN_DOCUMENT.encode('utf-8'))
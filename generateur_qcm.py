@@ -1,133 +1,547 @@
+import importlib
+import json
 import random
 import os
-from docx import Document
-from docx.shared import Pt, Inches
-from docx.enum.text import WD_ALIGN_PARAGRAPH
-from docx.enum.section import WD_ORIENT, WD_SECTION
-from docx.shared import Cm
+import time
+from collections import deque
+from collections.abc import Mapping, Sequence
+from contextlib import contextmanager
+from banque_compilee import BanqueMemoire, charger_banque
+from index_croise import IndexCroise, QuestionsParSujet, SujetsParQuestion
+from metriques_qcm import Metriques
+from selection_equilibree import FENETRE_RECOUVREMENT, planifier_selection
+from sujets_compacts import NB_REPONSES, SujetsCompacts
+
+# Nom du manifeste des sorties DOCX partitionnées
+FICHIER_MANIFESTE = 'manifeste.json'
+
+# Nombre de lignes non vides d'un bloc : la question, les 4 réponses et la solution
+LIGNES_PAR_BLOC = 6
+
+# Rendus disponibles par format, puis par moteur (le premier est le moteur par
+# défaut). Chaque module n'est importé que lorsqu'il est utilisé et fournit
+# ecrire_sujets(generateur, sujets, nom_fichier) et
+# ecrire_corrections(generateur, sujets, nom_fichier).
+RENDUS = {
+    'docx': {
+        'python-docx': 'rendu_docx',
+        'fast': 'docx_rapide',
+    },
+    'pdf': {
+        'natif': 'rendu_pdf',
+    },
+}
+
+
+class GenerationAnnulee(Exception):
+    """
+    Levée par une fonction de progression pour interrompre la génération.
+    """
+
+
+@contextmanager
+def _ouvrir_source(source):
+    """
+    Ouvre une source de questions et fournit un itérable de lignes.
+    
+    Args:
+        source: Chemin vers un fichier, fichier déjà ouvert ou itérable de lignes
+    """
+    if isinstance(source, (str, bytes, os.PathLike)):
+        with open(source, 'r', encoding='utf-8') as f:
+            yield f
+    else:
+        # Fichier ouvert ou itérable de lignes : l'appelant en garde la maîtrise
+        yield source
+
+
+def _valider_bloc(lignes):
+    """
+    Valide un bloc de 6 lignes et construit la question correspondante.
+    
+    Args:
+        lignes (list): Lignes (déjà nettoyées) du bloc
+        
+    Returns:
+        tuple: (question ou None, message d'erreur ou None)
+    """
+    try:
+        solution = int(lignes[5])
+    except ValueError:
+        return None, f"solution invalide {lignes[5]!r} (entier attendu)"
+    
+    # Vérifier que la solution est valide (entre 1 et 4)
+    if not 1 <= solution <= 4:
+        return None, f"solution {solution} hors de l'intervalle 1-4"
+    
+    return {
+        'question': lignes[0],
+        'reponses': lignes[1:5],
+        'solution': solution
+    }, None
+
+
+def lire_questions(source, erreurs=None):
+    """
+    Lit les questions d'une source en une seule passe et en mémoire bornée.
+    
+    Chaque bloc est formé d'une question, de 4 réponses et du numéro de la
+    solution. Les blocs sont normalement séparés par une ligne vide, mais une
+    ligne vide manquante ne décale pas la lecture des blocs suivants. Un bloc
+    mal formé est signalé dans `erreurs` : un bloc incomplet s'arrête à la
+    ligne vide suivante, un bloc complet mais invalide à sa sixième ligne, et
+    la lecture reprend aussitôt après.
+    
+    Args:
+        source: Chemin vers un fichier, fichier déjà ouvert ou itérable de lignes
+        erreurs (list): Liste recevant les tuples (numéro de ligne, message)
+            des blocs rejetés, ou None pour les ignorer
+        
+    Yields:
+        dict: Question validée (question, réponses et solution)
+    """
+    def signaler(numero_ligne, message):
+        if erreurs is not None:
+            erreurs.append((numero_ligne, message))
+    
+    bloc = []
+    debut_bloc = 0
+    
+    with _ouvrir_source(source) as lignes:
+        for numero_ligne, ligne in enumerate(lignes, start=1):
+            ligne = ligne.strip()
+            
+            if not ligne:
+                # Une ligne vide termine le bloc courant
+                if bloc:
+                    signaler(debut_bloc, f"bloc incomplet ({len(bloc)} lignes au lieu de {LIGNES_PAR_BLOC})")
+                bloc = []
+                continue
+            
+            if not bloc:
+                debut_bloc = numero_ligne
+            bloc.append(ligne)
+            
+            if len(bloc) == LIGNES_PAR_BLOC:
+                question, message = _valider_bloc(bloc)
+                bloc = []
+                if question is None:
+                    # Les limites du bloc sont connues : la lecture reprend à la ligne suivante
+                    signaler(debut_bloc, message)
+                else:
+                    yield question
+        
+        # Bloc inachevé en fin de fichier
+        if bloc:
+            signaler(debut_bloc, f"bloc incomplet ({len(bloc)} lignes au lieu de {LIGNES_PAR_BLOC})")
+
+
+def charger_rendu(format_sortie, moteur=None):
+    """
+    Importe le module de rendu d'un format.
+    
+    Args:
+        format_sortie (str): Format de sortie (clé de RENDUS)
+        moteur (str): Moteur de rendu, ou None pour le moteur par défaut du format
+        
+    Returns:
+        module: Module de rendu
+        
+    Raises:
+        ValueError: Si le format ou le moteur est inconnu
+        ImportError: Si une bibliothèque nécessaire au moteur n'est pas installée
+    """
+    moteurs = RENDUS.get(format_sortie)
+    if moteurs is None:
+        raise ValueError(f"Format de sortie inconnu : {format_sortie}")
+    if moteur is None:
+        moteur = next(iter(moteurs))
+    if moteur not in moteurs:
+        raise ValueError(f"Moteur de rendu inconnu pour le format {format_sortie} : {moteur}")
+    
+    try:
+        return importlib.import_module(moteurs[moteur])
+    except ImportError as e:
+        raise ImportError(f"Le moteur de rendu {format_sortie} '{moteur}' nécessite la bibliothèque "
+                          f"{e.name}, qui n'est pas installée") from e
+
+
+def analyser_numeros(texte, nb_eleves):
+    """
+    Analyse une sélection de numéros de sujets, par exemple « 3,17,10-20 ».
+    
+    Args:
+        texte (str): Numéros et plages (bornes incluses) séparés par des virgules
+        nb_eleves (int): Nombre de sujets de la classe
+        
+    Returns:
+        list: Numéros des sujets, triés et sans doublon
+        
+    Raises:
+        ValueError: Si la sélection est mal formée ou sort de la classe
+    """
+    numeros = set()
+    for morceau in texte.split(','):
+        morceau = morceau.strip()
+        if not morceau:
+            continue
+        debut, _, fin = morceau.partition('-')
+        try:
+            debut = int(debut)
+            fin = int(fin) if fin else debut
+        except ValueError:
+            raise ValueError(f"Sélection de sujets invalide : {morceau}") from None
+        if not 0 <= debut <= fin < nb_eleves:
+            raise ValueError(f"Sélection de sujets invalide : {morceau} (sujets 0 à {nb_eleves - 1})")
+        numeros.update(range(debut, fin + 1))
+    
+    if not numeros:
+        raise ValueError("Aucun sujet sélectionné")
+    return sorted(numeros)
+
+
+def _parcourir(sujets):
+    """
+    Parcourt des sujets fournis sous forme de dictionnaire ou de flux.
+    
+    Args:
+        sujets: Dictionnaire de sujets par numéro, ou itérable de couples
+            (numéro, sujet)
+        
+    Returns:
+        Iterable: Couples (numéro du sujet, (questions, réponses correctes))
+    """
+    return sujets.items() if isinstance(sujets, Mapping) else sujets
+
+
+# Générateur partagé par les processus de génération parallèle
+_generateur_travailleur = None
+
+
+def _initialiser_travailleur(generateur):
+    """
+    Initialise un processus de génération parallèle.
+    
+    Args:
+        generateur (GenerateurQCM): Générateur transmis une seule fois à chaque processus
+    """
+    global _generateur_travailleur
+    _generateur_travailleur = generateur
+
+
+def _tirer_lot(numeros):
+    """
+    Tire un lot de sujets dans un processus de génération parallèle.
+    
+    Args:
+        numeros (range): Numéros des sujets à tirer
+        
+    Returns:
+        list: Tirages (indices, permutations) dans l'ordre des numéros
+    """
+    return [_generateur_travailleur.tirer_sujet(num_sujet) for num_sujet in numeros]
+
+
+def _rendre_partition(tache):
+    """
+    Rend une partition DOCX dans un processus de rendu parallèle.
+    
+    Args:
+        tache (tuple): Arguments de GenerateurQCM._rendre_partition
+        
+    Returns:
+        dict: Entrée du manifeste pour cette partition
+    """
+    return _generateur_travailleur._rendre_partition(*tache)
+
+
+def _entree_partition(index, numeros):
+    """
+    Entrée du manifeste décrivant une partition DOCX.
+    
+    Args:
+        index (int): Rang de la partition
+        numeros (range): Numéros des sujets de la partition
+        
+    Returns:
+        dict: Noms des fichiers et plage de sujets de la partition
+    """
+    return {
+        'sujets': f"qcm_sujets_{index + 1:03d}.docx",
+        'corrections': f"qcm_corrections_{index + 1:03d}.docx",
+        'premier_sujet': numeros[0],
+        'dernier_sujet': numeros[-1]
+    }
+
 
 class GenerateurQCM:
     """
     Classe principale pour générer des QCM à partir d'un fichier de questions.
     """
-    def __init__(self, fichier_questions, nb_eleves, nb_questions, graine):
+    def __init__(self, fichier_questions, nb_eleves, nb_questions, graine, cache=True,
+                 selection='aleatoire', recouvrement_max=None, fenetre=FENETRE_RECOUVREMENT, metriques=None,
+                 progression=None):
         """
         Initialise le générateur de QCM.
         
         Args:
-            fichier_questions (str): Chemin vers le fichier contenant les questions
+            fichier_questions: Chemin vers le fichier contenant les questions,
+                fichier déjà ouvert, itérable de lignes ou banque déjà chargée
+                (BanqueCompilee, ou BanqueSQLite pour un tirage par thème et
+                difficulté), partageable entre plusieurs générateurs
             nb_eleves (int): Nombre d'élèves (donc de sujets à créer)
             nb_questions (int): Nombre de questions par sujet (5, 10, 15 ou 20)
             graine (int): Graine pour la génération aléatoire
+            cache (bool): Utiliser le cache des banques compilées lorsque la
+                source est un chemin de fichier
+            selection (str): Mode de sélection des questions : 'aleatoire'
+                (tirage uniforme) ou 'equilibre' (équilibrage de l'utilisation
+                des questions, voir selection_equilibree)
+            recouvrement_max (int): En mode 'equilibre', nombre maximal de
+                questions communes entre deux sujets voisins (None : sans limite)
+            fenetre (int): En mode 'equilibre', nombre de sujets précédents
+                considérés comme voisins (None : tous les sujets)
+            metriques (Metriques): Mesures à compléter (durée des étapes,
+                compteurs) ; par défaut, de nouvelles mesures sans suivi de la
+                mémoire ni profilage
+            progression: Fonction appelée avec ('sujet', numéro) après chaque
+                sujet produit et ('fichier', chemin) après chaque fichier écrit ;
+                elle peut lever GenerationAnnulee pour interrompre la génération,
+                les fichiers en cours d'écriture étant alors supprimés
         """
+        if selection not in ('aleatoire', 'equilibre'):
+            raise ValueError(f"Mode de sélection inconnu : {selection}")
+        
         self.fichier_questions = fichier_questions
+        self.cache = cache
+        self.selection = selection
+        self.recouvrement_max = recouvrement_max
+        self.fenetre = fenetre
+        self._plan = None
         self.nb_eleves = nb_eleves
         self.nb_questions = nb_questions
         self.graine = graine
-        
-        # Fixer la graine aléatoire
-        random.seed(graine)
+        self.metriques = metriques if metriques is not None else Metriques()
+        self.progression = progression
         
         # Charger les questions
-        self.questions = self.charger_questions()
+        with self.metriques.etape('chargement'):
+            self.questions = self.charger_questions()
+        self.metriques.compter('questions_lues', len(self.questions))
+        self.metriques.compter('questions_rejetees', len(self.erreurs_chargement))
         
         # Vérifier qu'il y a assez de questions
         if len(self.questions) < nb_questions:
             raise ValueError(f"Le fichier ne contient que {len(self.questions)} questions, mais {nb_questions} sont demandées.")
         
+        # Strates de tirage d'une base étiquetée : plages d'indices de la banque
+        # et nombre de questions tirées dans chacune pour chaque sujet
+        self.strates = getattr(self.questions, 'strates', None)
+        if self.strates:
+            if selection == 'equilibre':
+                raise ValueError("La sélection équilibrée ne s'applique pas au tirage par critères")
+            nb_strates = sum(nombre for _, _, nombre in self.strates)
+            if nb_strates != nb_questions:
+                raise ValueError(f"Les critères de tirage donnent {nb_strates} questions par sujet, "
+                                 f"mais {nb_questions} sont demandées.")
+        
         # Pour suivre quelles questions apparaissent dans quels sujets
-        self.questions_par_sujet = {}
-        self.sujets_par_question = {i: [] for i in range(len(self.questions))}
+        self._reinitialiser_suivi()
+        
+        # Sujets déjà comptés : chaque rendu produit à nouveau les sujets, qui
+        # ne sont comptés qu'une fois
+        self._sujets_comptes = bytearray(nb_eleves)
+    
+    def __getstate__(self):
+        # La fonction de progression reste dans le processus principal
+        etat = self.__dict__.copy()
+        etat['progression'] = None
+        return etat
+    
+    def _signaler(self, evenement, valeur):
+        """
+        Transmet l'avancement à la fonction de progression, s'il y en a une.
+        
+        Args:
+            evenement (str): 'sujet' ou 'fichier'
+            valeur: Numéro du sujet produit ou chemin du fichier écrit
+            
+        Raises:
+            GenerationAnnulee: Si la fonction de progression interrompt la génération
+        """
+        if self.progression is not None:
+            self.progression(evenement, valeur)
+    
+    def _compter_sujet(self, num_sujet):
+        """
+        Compte un sujet généré, une seule fois même s'il est produit à nouveau.
+        
+        Args:
+            num_sujet (int): Numéro du sujet
+        """
+        if not self._sujets_comptes[num_sujet]:
+            self._sujets_comptes[num_sujet] = 1
+            self.metriques.compter('sujets_generes')
+    
+    def _reinitialiser_suivi(self):
+        """
+        Vide le suivi des questions utilisées par chaque sujet.
+        
+        Le suivi est conservé dans un index croisé compact ; questions_par_sujet
+        et sujets_par_question en sont des vues en lecture seule.
+        """
+        self.index = IndexCroise(len(self.questions))
+        self.questions_par_sujet = QuestionsParSujet(self.index)
+        self.sujets_par_question = SujetsParQuestion(self.index)
         
     def charger_questions(self):
         """
-        Charge les questions depuis le fichier.
+        Charge les questions depuis la source.
+        
+        Les blocs mal formés ne sont pas retenus : ils sont consignés avec leur
+        numéro de ligne dans self.erreurs_chargement.
+        
+        Lorsque la source est un chemin de fichier et que le cache est activé,
+        la banque compilée correspondante est projetée en mémoire au lieu
+        d'analyser à nouveau le texte. Sinon, les questions lues sont rangées
+        dans une BanqueMemoire, où chaque chaîne n'est conservée qu'une fois.
         
         Returns:
-            list: Liste de dictionnaires contenant les questions, réponses et solution
+            Sequence: Séquence de dictionnaires contenant les questions, réponses et solution
+        """
+        # Banque déjà chargée (BanqueCompilee, BanqueSQLite) : elle expose
+        # les erreurs de son propre chargement
+        if isinstance(self.fichier_questions, Sequence) and hasattr(self.fichier_questions, 'erreurs'):
+            self.erreurs_chargement = self.fichier_questions.erreurs
+            return self.fichier_questions
+        
+        if self.cache and isinstance(self.fichier_questions, (str, os.PathLike)):
+            try:
+                banque = charger_banque(self.fichier_questions)
+            except OSError:
+                # Cache inaccessible (droits, disque plein...) : lecture directe
+                pass
+            else:
+                self.erreurs_chargement = banque.erreurs
+                return banque
+        
+        self.erreurs_chargement = []
+        return BanqueMemoire(lire_questions(self.fichier_questions, self.erreurs_chargement),
+                             self.erreurs_chargement)
+    
+    def _rng_sujet(self, num_sujet):
         """
-        questions = []
+        Crée le générateur aléatoire propre à un sujet.
+        
+        Chaque sujet dispose d'un flux indépendant, dérivé de la graine et de
+        son numéro : le tirage d'un sujet ne dépend ni de l'ordre de génération
+        ni du processus qui le réalise.
         
-        with open(self.fichier_questions, 'r', encoding='utf-8') as f:
-            lignes = f.readlines()
+        Args:
+            num_sujet (int): Numéro du sujet
             
-            i = 0
-            while i < len(lignes):
-                # Si on est à la fin du fichier ou devant une ligne vide, passer
-                if i >= len(lignes) or not lignes[i].strip():
-                    i += 1
-                    continue
-                
-                # Récupérer la question
-                question = lignes[i].strip()
-                
-                # Récupérer les 4 réponses
-                reponses = []
-                for j in range(1, 5):
-                    if i + j < len(lignes) and lignes[i + j].strip():
-                        reponses.append(lignes[i + j].strip())
-                    else:
-                        # Si pas assez de réponses, passer cette question
-                        break
-                
-                # Récupérer la solution
-                if i + 5 < len(lignes) and lignes[i + 5].strip():
-                    try:
-                        solution = int(lignes[i + 5].strip())
-                        
-                        # Vérifier que la solution est valide (entre 1 et 4)
-                        if 1 <= solution <= 4:
-                            # Ajouter la question
-                            questions.append({
-                                'question': question,
-                                'reponses': reponses,
-                                'solution': solution
-                            })
-                    except ValueError:
-                        # Si la solution n'est pas un entier, passer cette question
-                        pass
-                
-                # Passer à la question suivante (question + 4 réponses + solution + ligne vide)
-                i += 7
-        
-        return questions
+        Returns:
+            random.Random: Générateur initialisé pour ce sujet
+        """
+        return random.Random(f"{self.graine}-{num_sujet}")
     
-    def generer_sujet(self, num_sujet):
+    def tirer_sujet(self, num_sujet):
         """
-        Génère un sujet pour un élève.
+        Tire les questions d'un sujet et l'ordre de leurs réponses.
         
         Args:
-            num_sujet (int): Numéro du sujet à générer
+            num_sujet (int): Numéro du sujet à tirer
             
         Returns:
-            tuple: (liste de questions pour ce sujet, 
-                   liste des réponses correctes sous forme de lettres)
+            tuple: (indices des questions dans la banque,
+                   permutation des réponses pour chaque question)
         """
-        # Sélectionner aléatoirement les questions pour ce sujet
-        indices_questions = random.sample(range(len(self.questions)), self.nb_questions)
+        rng = self._rng_sujet(num_sujet)
         
-        # Enregistrer quelles questions apparaissent dans ce sujet
-        self.questions_par_sujet[num_sujet] = indices_questions
+        if self.selection == 'equilibre':
+            # Questions prévues par le plan équilibré, présentées dans un ordre aléatoire
+            debut = num_sujet * self.nb_questions
+            indices_questions = self._plan_selection()[debut:debut + self.nb_questions].tolist()
+            rng.shuffle(indices_questions)
+        elif self.strates:
+            # Questions tirées dans chaque strate, présentées dans un ordre aléatoire
+            indices_questions = [idx for debut, fin, nombre in self.strates
+                                 for idx in rng.sample(range(debut, fin), nombre)]
+            rng.shuffle(indices_questions)
+        else:
+            # Sélectionner aléatoirement les questions pour ce sujet
+            indices_questions = rng.sample(range(len(self.questions)), self.nb_questions)
         
-        # Mettre à jour les sujets dans lesquels chaque question apparaît
-        for idx in indices_questions:
-            self.sujets_par_question[idx].append(num_sujet)
+        # Mélanger l'ordre des réponses de chaque question ; toutes en ont
+        # NB_REPONSES, le texte des questions n'est lu qu'à la construction
+        permutations = []
+        for _ in indices_questions:
+            ordre = list(range(NB_REPONSES))
+            rng.shuffle(ordre)
+            permutations.append(ordre)
         
+        return indices_questions, permutations
+    
+    def _plan_selection(self):
+        """
+        Plan de sélection équilibrée de tous les sujets, calculé une seule fois.
+        
+        Returns:
+            array: Indices des questions de tous les sujets, bout à bout
+        """
+        if self._plan is None:
+            self._plan = planifier_selection(len(self.questions), self.nb_eleves, self.nb_questions, self.graine,
+                                             self.recouvrement_max, self.fenetre)
+        return self._plan
+    
+    def _enregistrer_sujet(self, num_sujet, indices_questions):
+        """
+        Enregistre quelles questions apparaissent dans un sujet.
+        
+        Args:
+            num_sujet (int): Numéro du sujet
+            indices_questions (list): Indices des questions du sujet dans la banque
+        """
+        self.index.ajouter_sujet(num_sujet, indices_questions)
+    
+    def numero_question(self, idx):
+        """
+        Numéro d'une question de la banque dans les informations pour le correcteur.
+        
+        Args:
+            idx (int): Indice de la question dans la banque
+            
+        Returns:
+            int: L'indice lui-même, ou l'identifiant de la question dans la base
+                 pour une banque SQLite (dont les indices dépendent des critères)
+        """
+        identifiant = getattr(self.questions, 'identifiant', None)
+        return idx if identifiant is None else identifiant(idx)
+    
+    def construire_sujet(self, indices_questions, permutations):
+        """
+        Construit le contenu d'un sujet à partir de son tirage.
+        
+        Args:
+            indices_questions (list): Indices des questions dans la banque
+            permutations (list): Ordre des réponses pour chaque question
+            
+        Returns:
+            tuple: (liste de questions pour ce sujet, 
+                   liste des réponses correctes sous forme de lettres)
+        """
         questions_sujet = []
         reponses_correctes = []
         
-        for i, idx in enumerate(indices_questions):
+        for i, (idx, ordre) in enumerate(zip(indices_questions, permutations)):
             question = self.questions[idx]
             
-            # Copier les réponses pour pouvoir les mélanger
-            reponses = question['reponses'].copy()
+            # Réponses dans l'ordre mélangé
+            reponses = [question['reponses'][j] for j in ordre]
             solution_originale = question['solution'] - 1  # Convertir 1-4 en 0-3
             
-            # Mélanger les réponses
-            random.shuffle(reponses)
-            
             # Trouver la nouvelle position de la bonne réponse
-            nouvelle_solution = reponses.index(question['reponses'][solution_originale])
+            nouvelle_solution = ordre.index(solution_originale)
             
             # Convertir l'indice (0-3) en lettre (a-d)
             lettre_solution = chr(97 + nouvelle_solution)  # 'a', 'b', 'c' ou 'd'
@@ -145,278 +559,675 @@ class GenerateurQCM:
         
         return questions_sujet, reponses_correctes
     
-    def generer_sujets(self):
+    def generer_sujet(self, num_sujet):
         """
-        Génère tous les sujets pour tous les élèves.
+        Génère un sujet pour un élève.
         
+        Args:
+            num_sujet (int): Numéro du sujet à générer
+            
         Returns:
-            dict: Dictionnaire de sujets par numéro de sujet
+            tuple: (liste de questions pour ce sujet, 
+                   liste des réponses correctes sous forme de lettres)
         """
-        sujets = {}
+        debut = time.perf_counter()
+        indices_questions, permutations = self.tirer_sujet(num_sujet)
+        self._enregistrer_sujet(num_sujet, indices_questions)
+        sujet = self.construire_sujet(indices_questions, permutations)
         
-        for i in range(self.nb_eleves):
-            sujets[i] = self.generer_sujet(i)
-        
-        return sujets
+        self.metriques.cumuler('generation des sujets', time.perf_counter() - debut)
+        self._compter_sujet(num_sujet)
+        self._signaler('sujet', num_sujet)
+        return sujet
     
-    def generer_fichier_txt(self, sujets, nom_fichier="qcm_sujets.txt"):
+    def sujet(self, num_sujet):
         """
-        Génère un fichier texte contenant tous les sujets.
+        Renvoie un sujet quelconque sans générer les précédents.
+        
+        Chaque sujet ne dépend que de la graine et de son numéro : le résultat
+        est identique à celui d'une génération complète avec le moteur
+        'python'. Le suivi des questions par sujet n'est pas modifié.
+        
+        Avec la sélection équilibrée, les questions d'un sujet dépendent de
+        celles des précédents : le premier appel planifie toute la classe
+        (nb_eleves sujets), les suivants réutilisent ce plan.
         
         Args:
-            sujets (dict): Dictionnaire de sujets par numéro de sujet
-            nom_fichier (str): Nom du fichier à générer
+            num_sujet (int): Numéro du sujet (de 0 à nb_eleves - 1)
+            
+        Returns:
+            tuple: (liste de questions pour ce sujet, 
+                   liste des réponses correctes sous forme de lettres)
+                   
+        Raises:
+            IndexError: Si le numéro ne correspond à aucun sujet de la classe
         """
-        with open(nom_fichier, 'w', encoding='utf-8') as f:
-            for num_sujet, (questions, _) in sujets.items():
-                f.write(f"SUJET {num_sujet}\n")
-                f.write("\nNom prénom : _______________________________\n\n")
-                
-                # Consignes
-                f.write("CONSIGNES :\n")
-                f.write("- Entourez la lettre correspondant à la bonne réponse sur le tableau de réponses ci-dessous.\n")
-                f.write("- Une seule réponse est correcte pour chaque question.\n")
-                f.write("- Toute rature ou correction sur le tableau sera considérée comme une erreur.\n\n")
-                
-                # Tableau de réponses
-                f.write("Tableau de réponses - Sujet " + str(num_sujet) + "\n")
-                for i in range(1, self.nb_questions + 1):
-                    if i == self.nb_questions // 2 + 1:
-                        f.write("\n")  # Saut de ligne après la moitié des questions
-                    f.write(f"{i} ")
-                f.write("\n\n")
-                
-                # Questions
-                for q in questions:
-                    f.write(f"Question {q['numero']} : {q['question']}\n")
-                    for j, reponse in enumerate(q['reponses']):
-                        lettre = chr(97 + j)  # 'a', 'b', 'c' ou 'd'
-                        f.write(f"{lettre}) {reponse}\n")
-                    f.write("\n")
-                
-                f.write("\n---------------------------------------------------\n\n")
+        if not 0 <= num_sujet < self.nb_eleves:
+            raise IndexError(f"Le sujet {num_sujet} n'existe pas (sujets 0 à {self.nb_eleves - 1})")
+        
+        return self.construire_sujet(*self.tirer_sujet(num_sujet))
     
-    def generer_fichier_correction(self, sujets, nom_fichier="qcm_corrections.txt"):
+    def generer_sujets(self, jobs=1, moteur='python', numeros=None):
         """
-        Génère un fichier de correction contenant les réponses correctes pour chaque sujet.
+        Génère tous les sujets pour tous les élèves, ou une sélection de sujets.
+        
+        Les sujets sont conservés sous forme compacte : pour chaque question,
+        son indice dans la banque et le rang de l'ordre de ses réponses (voir
+        sujets_compacts). Leur texte n'est construit qu'au moment où un rendu
+        les parcourt.
+        
+        Avec plusieurs processus, les tirages sont répartis par lots entre les
+        processus ; le résultat est identique quel que soit leur nombre.
+        
+        Le moteur 'numpy' tire tous les sujets d'un coup sous forme de tableaux
+        d'entiers (voir moteur_numpy) ; il produit d'autres sujets que le moteur
+        'python' pour une même graine. Il tire toujours toute la classe, mais
+        seuls les sujets sélectionnés sont conservés et suivis.
         
         Args:
-            sujets (dict): Dictionnaire de sujets par numéro de sujet
-            nom_fichier (str): Nom du fichier à générer
-        """
-        with open(nom_fichier, 'w', encoding='utf-8') as f:
-            # Écrire les corrections pour chaque sujet
-            for num_sujet, (_, reponses) in sujets.items():
-                f.write(f"Sujet {num_sujet}\n")
-                
-                # Écrire les réponses en groupes de 5
-                for i in range(0, len(reponses), 5):
-                    groupe = reponses[i:i+5]
-                    f.write(''.join(groupe) + ' ')
-                f.write("\n\n")
-            
-            # Ajouter les informations supplémentaires pour le correcteur
-            f.write("\n--- Informations supplémentaires pour le correcteur ---\n\n")
+            jobs (int): Nombre de processus de génération (moteur 'python')
+            moteur (str): Moteur de tirage, 'python' ou 'numpy'
+            numeros (Sequence): Numéros des sujets à produire, triés, par exemple
+                issus de analyser_numeros (par défaut tous)
             
-            # Quelles questions initiales ont été intégrées dans chaque sujet
-            for num_sujet, indices in self.questions_par_sujet.items():
-                indices_str = ','.join(str(i) for i in indices)
-                f.write(f"Sujet {num_sujet} : questions {indices_str}\n")
-            
-            f.write("\n")
+        Returns:
+            Mapping: Sujets par numéro de sujet
+        """
+        with self.metriques.etape('generation'):
+            if moteur == 'numpy':
+                return self._generer_sujets_numpy(numeros)
             
-            # Dans quels sujets apparaît chaque question initiale
-            for num_question, sujets_indices in self.sujets_par_question.items():
-                if sujets_indices:  # Si la question apparaît dans au moins un sujet
-                    sujets_str = ','.join(str(i) for i in sujets_indices)
-                    f.write(f"Question {num_question} : sujets {sujets_str}\n")
+            sujets = SujetsCompacts(self, numeros)
+            for _, indices_questions, permutations in self._iterer_tirages(numeros, jobs):
+                sujets.ajouter(indices_questions, permutations)
+            return sujets
     
-    def generer_fichier_docx(self, sujets, nom_fichier="qcm_sujets.docx"):
+    def iterer_sujets(self, numeros=None, jobs=1):
         """
-        Génère un fichier DOCX contenant tous les sujets.
+        Produit les sujets un par un, sans les conserver.
+        
+        Les rendus peuvent consommer ce flux au fur et à mesure : la mémoire
+        occupée ne dépend pas du nombre d'élèves. Le suivi des questions par
+        sujet est réinitialisé à chaque parcours, de sorte qu'un second parcours
+        produit exactement les mêmes sujets et le même suivi.
+        
+        Avec plusieurs processus, les tirages sont répartis par lots entre les
+        processus ; le résultat est identique quel que soit leur nombre.
         
         Args:
-            sujets (dict): Dictionnaire de sujets par numéro de sujet
-            nom_fichier (str): Nom du fichier à générer
-        """
-        document = Document()
-        
-        # Définir la mise en page : paysage, marges réduites
-        section = document.sections[0]
-        section.orientation = WD_ORIENT.LANDSCAPE
-        section.page_width, section.page_height = section.page_height, section.page_width
-        
-        # Réduire les marges
-        section.left_margin = Cm(1.5)
-        section.right_margin = Cm(1.5)
-        section.top_margin = Cm(1.5)
-        section.bottom_margin = Cm(1.5)
-        
-        # Créer les sujets
-        for num_sujet, (questions, _) in sujets.items():
-            # Titre
-            titre = document.add_paragraph()
-            titre.alignment = WD_ALIGN_PARAGRAPH.CENTER
-            titre_run = titre.add_run(f"SUJET {num_sujet}")
-            titre_run.bold = True
-            titre_run.font.size = Pt(16)
-            
-            # Champ Nom/Prénom
-            nom = document.add_paragraph()
-            nom.add_run("Nom prénom : _______________________________")
+            numeros (Sequence): Numéros des sujets à produire, par exemple un
+                range ou une liste issue de analyser_numeros (par défaut tous)
+            jobs (int): Nombre de processus de génération
             
-            # Consignes
-            consignes = document.add_paragraph()
-            consignes.add_run("CONSIGNES :\n").bold = True
-            consignes.add_run("- Entourez la lettre correspondant à la bonne réponse sur le tableau de réponses ci-dessous.\n")
-            consignes.add_run("- Une seule réponse est correcte pour chaque question.\n")
-            consignes.add_run("- Toute rature ou correction sur le tableau sera considérée comme une erreur.")
-            
-            # Tableau de réponses
-            reponses_titre = document.add_paragraph()
-            reponses_titre.add_run(f"Tableau de réponses - Sujet {num_sujet}").bold = True
-            
-            # Ajouter les numéros de question pour le tableau de réponses
-            tableau_reponses = document.add_paragraph()
-            for i in range(1, self.nb_questions + 1):
-                if i == self.nb_questions // 2 + 1:
-                    tableau_reponses.add_run("\n")  # Saut de ligne à la moitié
-                tableau_reponses.add_run(f"{i} ")
+        Yields:
+            tuple: (numéro du sujet, (questions du sujet, réponses correctes))
+        """
+        for num_sujet, indices_questions, permutations in self._iterer_tirages(numeros, jobs):
+            debut = time.perf_counter()
+            sujet = self.construire_sujet(indices_questions, permutations)
+            self.metriques.cumuler('generation des sujets', time.perf_counter() - debut)
+            yield num_sujet, sujet
+    
+    def _iterer_tirages(self, numeros=None, jobs=1):
+        """
+        Tire les sujets un par un et tient le suivi à jour, sans construire leur texte.
+        
+        Args:
+            numeros (Sequence): Numéros des sujets à tirer (par défaut tous)
+            jobs (int): Nombre de processus de génération
             
-            document.add_paragraph()  # Espace
+        Yields:
+            tuple: (numéro du sujet, indices des questions dans la banque,
+                   permutation des réponses pour chaque question)
+        """
+        self._reinitialiser_suivi()
+        
+        if numeros is None:
+            numeros = range(self.nb_eleves)
+        
+        if jobs <= 1 or len(numeros) <= 1:
+            tirages = ((num_sujet, self.tirer_sujet(num_sujet)) for num_sujet in numeros)
+        else:
+            tirages = self._tirer_en_parallele(numeros, jobs)
+        
+        debut = time.perf_counter()
+        for num_sujet, (indices_questions, permutations) in tirages:
+            self._enregistrer_sujet(num_sujet, indices_questions)
+            self.metriques.cumuler('generation des sujets', time.perf_counter() - debut)
+            self._compter_sujet(num_sujet)
+            self._signaler('sujet', num_sujet)
+            yield num_sujet, indices_questions, permutations
+            debut = time.perf_counter()
+    
+    def _tirer_en_parallele(self, numeros, jobs):
+        """
+        Répartit les tirages par lots entre plusieurs processus.
+        
+        Args:
+            numeros (Sequence): Numéros des sujets à tirer
+            jobs (int): Nombre de processus de génération
             
-            # Créer une section à deux colonnes pour les questions
-            section = document.add_section(WD_SECTION.NEW_PAGE)
-            section.orientation = WD_ORIENT.LANDSCAPE
-            section.page_width, section.page_height = section.page_height, section.page_width
-            section.left_margin = Cm(1.5)
-            section.right_margin = Cm(1.5)
-            section.top_margin = Cm(1.5)
-            section.bottom_margin = Cm(1.5)
+        Yields:
+            tuple: (numéro du sujet, (indices des questions, permutations)),
+                   dans l'ordre des numéros
+        """
+        from concurrent.futures import ProcessPoolExecutor
+        
+        # Le plan équilibré est calculé avant d'être transmis aux processus
+        if self.selection == 'equilibre':
+            self._plan_selection()
+        
+        # Des lots de taille moyenne amortissent le coût des échanges entre processus
+        taille_lot = max(1, min(1000, len(numeros) // (jobs * 4)))
+        lots = (numeros[debut:debut + taille_lot] for debut in range(0, len(numeros), taille_lot))
+        
+        with ProcessPoolExecutor(max_workers=jobs, initializer=_initialiser_travailleur,
+                                 initargs=(self,)) as executor:
+            # Fenêtre bornée de lots en cours pour ne pas accumuler les tirages
+            en_cours = deque()
+            for lot in lots:
+                en_cours.append((lot, executor.submit(_tirer_lot, lot)))
+                if len(en_cours) >= jobs * 2:
+                    lot, futur = en_cours.popleft()
+                    yield from zip(lot, futur.result())
+            while en_cours:
+                lot, futur = en_cours.popleft()
+                yield from zip(lot, futur.result())
+    
+    def _generer_sujets_numpy(self, numeros=None):
+        """
+        Génère tous les sujets avec le moteur vectorisé NumPy.
+        
+        Args:
+            numeros (Sequence): Numéros des sujets à conserver, triés (par
+                défaut tous) ; seuls ces sujets sont enregistrés dans le suivi
             
-            # Configurer 2 colonnes
-            section.left_margin = Inches(0.5)
-            section.right_margin = Inches(0.5)
-            section.column_width = Inches(4)
-            section.column_count = 2
+        Returns:
+            LotSujets: Sujets dont le texte est construit à la demande
+        """
+        if self.strates:
+            raise ValueError("Le moteur 'numpy' ne prend pas en charge le tirage par critères")
+        
+        from moteur_numpy import generer_lot, LotSujets
+        
+        # Une banque compilée expose directement ses solutions sous forme d'octets
+        solutions = getattr(self.questions, 'solutions', None)
+        if solutions is None:
+            solutions = [question['solution'] for question in self.questions]
+        
+        # En mode équilibré, le moteur reprend le plan de sélection
+        plan = None
+        if self.selection == 'equilibre':
+            plan = self._plan_selection()
+        
+        selection, permutations, cles = generer_lot(solutions, self.nb_eleves, self.nb_questions, self.graine,
+                                                    selection=plan)
+        
+        if numeros is None:
+            numeros = range(self.nb_eleves)
+        
+        # Comme pour le moteur 'python', chaque génération repart d'un suivi vide
+        self._reinitialiser_suivi()
+        for num_sujet in numeros:
+            self._enregistrer_sujet(num_sujet, selection[num_sujet].tolist())
+            self._compter_sujet(num_sujet)
+        
+        return LotSujets(self, selection, permutations, cles, numeros)
+    
+    def generer_fichiers_docx_partitionnes(self, dossier, taille_partition, jobs=1, moteur='python-docx',
+                                          fusion=False, partitions=None):
+        """
+        Génère les sujets et corrections DOCX en plusieurs fichiers (partitions).
+        
+        Chaque partition regroupe `taille_partition` sujets consécutifs et
+        produit un fichier de sujets et un fichier de corrections. Les
+        partitions sont rendues en parallèle par des processus indépendants,
+        qui régénèrent eux-mêmes leurs sujets. Un manifeste (manifeste.json)
+        indique la plage de sujets de chaque partition.
+        
+        Args:
+            dossier (str): Répertoire de sortie
+            taille_partition (int): Nombre de sujets par fichier
+            jobs (int): Nombre de processus de rendu
+            moteur (str): Moteur de rendu DOCX ('python-docx' ou 'fast')
+            fusion (bool): Fusionner aussi les partitions en un fichier de sujets
+                et un fichier de corrections
+            partitions (set): Rangs des partitions à rendre ; les fichiers des
+                autres partitions, déjà à jour dans le dossier, sont conservés
+                tels quels (None : toutes les partitions)
             
-            # Questions et réponses
-            for q in questions:
-                question_para = document.add_paragraph()
-                question_para.add_run(f"Question {q['numero']} : {q['question']}").bold = True
-                
-                for j, reponse in enumerate(q['reponses']):
-                    lettre = chr(97 + j)  # 'a', 'b', 'c' ou 'd'
-                    reponse_para = document.add_paragraph()
-                    reponse_para.add_run(f"{lettre}) {reponse}")
-                
-                document.add_paragraph()  # Espace entre les questions
+        Returns:
+            dict: Contenu du manifeste
+        """
+        os.makedirs(dossier, exist_ok=True)
+        
+        plages = [range(debut, min(debut + taille_partition, self.nb_eleves))
+                  for debut in range(0, self.nb_eleves, taille_partition)]
+        taches = [(index, numeros, dossier, moteur) for index, numeros in enumerate(plages)
+                  if partitions is None or index in partitions]
+        
+        with self.metriques.etape('ecriture des partitions DOCX'):
+            if jobs <= 1 or len(taches) <= 1:
+                rendues = [self._rendre_partition(*tache) for tache in taches]
+            else:
+                from concurrent.futures import ProcessPoolExecutor
+                with ProcessPoolExecutor(max_workers=jobs, initializer=_initialiser_travailleur,
+                                         initargs=(self,)) as executor:
+                    rendues = list(executor.map(_rendre_partition, taches))
+                # Les fichiers rendus par les processus de travail sont comptés ici
+                for partition in rendues:
+                    for cle in ('sujets', 'corrections'):
+                        self.metriques.ajouter_fichier(os.path.join(dossier, partition[cle]))
+                        self._signaler('fichier', os.path.join(dossier, partition[cle]))
+        
+        rendues = {tache[0]: partition for tache, partition in zip(taches, rendues)}
+        partitions = [rendues.get(index) or _entree_partition(index, numeros) for index, numeros in enumerate(plages)]
+        
+        manifeste = {
+            'nb_eleves': self.nb_eleves,
+            'nb_questions': self.nb_questions,
+            'graine': self.graine,
+            'moteur': moteur,
+            'partitions': partitions
+        }
+        
+        if fusion:
+            from docx_rapide import fusionner_docx
+            manifeste['fusion'] = {'sujets': 'qcm_sujets.docx', 'corrections': 'qcm_corrections.docx'}
+            for cle, nom in manifeste['fusion'].items():
+                with self._etape_ecriture(os.path.join(dossier, nom)):
+                    fusionner_docx([os.path.join(dossier, p[cle]) for p in partitions], os.path.join(dossier, nom))
+        
+        with open(os.path.join(dossier, FICHIER_MANIFESTE), 'w', encoding='utf-8') as f:
+            json.dump(manifeste, f, ensure_ascii=False, indent=2)
+        
+        return manifeste
+    
+    def _rendre_partition(self, index, numeros, dossier, moteur):
+        """
+        Rend les fichiers DOCX d'une partition.
+        
+        Args:
+            index (int): Rang de la partition
+            numeros (range): Numéros des sujets de la partition
+            dossier (str): Répertoire de sortie
+            moteur (str): Moteur de rendu DOCX
             
-            # Ajouter un saut de page après chaque sujet sauf le dernier
-            if num_sujet < self.nb_eleves - 1:
-                document.add_page_break()
+        Returns:
+            dict: Entrée du manifeste pour cette partition
+        """
+        partition = _entree_partition(index, numeros)
+        self.generer_fichier_docx(self.iterer_sujets(numeros), os.path.join(dossier, partition['sujets']), moteur)
+        self.generer_fichier_correction_docx(self.iterer_sujets(numeros),
+                                             os.path.join(dossier, partition['corrections']), moteur)
+        return partition
+    
+    @contextmanager
+    def _etape_ecriture(self, *noms_fichiers):
+        """
+        Mesure l'écriture de fichiers et comptabilise leur taille.
+        
+        Si la génération est annulée ou échoue pendant l'écriture (par exemple
+        un plan de sélection équilibrée impossible, calculé au premier sujet),
+        les fichiers incomplets sont supprimés. Une fois l'étape terminée, tous
+        ses fichiers sont signalés avant qu'une annulation ne soit propagée,
+        pour que l'appelant puisse les supprimer.
         
-        # Sauvegarder le document
-        document.save(nom_fichier)
+        Args:
+            noms_fichiers (str): Fichiers écrits pendant l'étape
+        """
+        try:
+            with self.metriques.etape('ecriture ' + ', '.join(os.path.basename(nom) for nom in noms_fichiers)):
+                yield
+        except BaseException:
+            for nom in noms_fichiers:
+                if os.path.exists(nom):
+                    os.remove(nom)
+            raise
+        
+        annulation = None
+        for nom in noms_fichiers:
+            self.metriques.ajouter_fichier(nom)
+            try:
+                self._signaler('fichier', nom)
+            except GenerationAnnulee as e:
+                annulation = annulation or e
+        if annulation is not None:
+            raise annulation
     
-    def generer_fichier_correction_docx(self, sujets, nom_fichier="qcm_corrections.docx"):
+    def _ecrire_sujet_txt(self, f, num_sujet, questions):
         """
-        Génère un fichier DOCX de correction contenant les réponses correctes pour chaque sujet.
+        Écrit un sujet dans un fichier texte ouvert.
         
         Args:
-            sujets (dict): Dictionnaire de sujets par numéro de sujet
-            nom_fichier (str): Nom du fichier à générer
+            f: Fichier texte ouvert en écriture
+            num_sujet (int): Numéro du sujet
+            questions (list): Questions du sujet
         """
-        document = Document()
+        f.write(f"SUJET {num_sujet}\n")
+        f.write("\nNom prénom : _______________________________\n\n")
         
-        # Titre
-        titre = document.add_paragraph()
-        titre.alignment = WD_ALIGN_PARAGRAPH.CENTER
-        titre_run = titre.add_run("FEUILLE DE CORRECTION")
-        titre_run.bold = True
-        titre_run.font.size = Pt(16)
+        # Consignes
+        f.write("CONSIGNES :\n")
+        f.write("- Entourez la lettre correspondant à la bonne réponse sur le tableau de réponses ci-dessous.\n")
+        f.write("- Une seule réponse est correcte pour chaque question.\n")
+        f.write("- Toute rature ou correction sur le tableau sera considérée comme une erreur.\n\n")
         
-        # Écrire les corrections pour chaque sujet
-        for num_sujet, (_, reponses) in sujets.items():
-            # Titre du sujet
-            sujet_titre = document.add_paragraph()
-            sujet_titre.add_run(f"Sujet {num_sujet}").bold = True
-            
-            # Écrire les réponses
-            reponses_para = document.add_paragraph()
-            for i in range(0, len(reponses), 5):
-                groupe = reponses[i:i+5]
-                reponses_para.add_run(''.join(groupe) + ' ')
-            
-            document.add_paragraph()  # Espace entre les sujets
+        # Tableau de réponses
+        f.write("Tableau de réponses - Sujet " + str(num_sujet) + "\n")
+        for i in range(1, self.nb_questions + 1):
+            if i == self.nb_questions // 2 + 1:
+                f.write("\n")  # Saut de ligne après la moitié des questions
+            f.write(f"{i} ")
+        f.write("\n\n")
         
-        # Ajouter un saut de page pour les informations supplémentaires
-        document.add_page_break()
+        # Questions
+        for q in questions:
+            f.write(f"Question {q['numero']} : {q['question']}\n")
+            for j, reponse in enumerate(q['reponses']):
+                lettre = chr(97 + j)  # 'a', 'b', 'c' ou 'd'
+                f.write(f"{lettre}) {reponse}\n")
+            f.write("\n")
         
-        # Titre pour les informations supplémentaires
-        titre_info = document.add_paragraph()
-        titre_info.alignment = WD_ALIGN_PARAGRAPH.CENTER
-        titre_info_run = titre_info.add_run("INFORMATIONS SUPPLÉMENTAIRES POUR LE CORRECTEUR")
-        titre_info_run.bold = True
-        titre_info_run.font.size = Pt(14)
+        f.write("\n---------------------------------------------------\n\n")
+    
+    def _ecrire_correction_txt(self, f, num_sujet, reponses):
+        """
+        Écrit les réponses correctes d'un sujet dans un fichier texte ouvert.
         
-        document.add_paragraph()  # Espace
+        Args:
+            f: Fichier texte ouvert en écriture
+            num_sujet (int): Numéro du sujet
+            reponses (list): Réponses correctes sous forme de lettres
+        """
+        f.write(f"Sujet {num_sujet}\n")
         
-        # Sous-titre pour les questions par sujet
-        sous_titre1 = document.add_paragraph()
-        sous_titre1.add_run("Questions initiales intégrées dans chaque sujet :").bold = True
+        # Écrire les réponses en groupes de 5
+        for i in range(0, len(reponses), 5):
+            groupe = reponses[i:i+5]
+            f.write(''.join(groupe) + ' ')
+        f.write("\n\n")
+    
+    def _ecrire_informations_txt(self, f):
+        """
+        Écrit les informations supplémentaires pour le correcteur.
+        
+        Args:
+            f: Fichier texte ouvert en écriture
+        """
+        f.write("\n--- Informations supplémentaires pour le correcteur ---\n\n")
         
         # Quelles questions initiales ont été intégrées dans chaque sujet
         for num_sujet, indices in self.questions_par_sujet.items():
-            indices_str = ', '.join(str(i) for i in indices)
-            document.add_paragraph(f"Sujet {num_sujet} : questions {indices_str}")
-        
-        document.add_paragraph()  # Espace
+            indices_str = ','.join(str(self.numero_question(i)) for i in indices)
+            f.write(f"Sujet {num_sujet} : questions {indices_str}\n")
         
-        # Sous-titre pour les sujets par question
-        sous_titre2 = document.add_paragraph()
-        sous_titre2.add_run("Sujets dans lesquels apparaît chaque question initiale :").bold = True
+        f.write("\n")
         
         # Dans quels sujets apparaît chaque question initiale
         for num_question, sujets_indices in self.sujets_par_question.items():
             if sujets_indices:  # Si la question apparaît dans au moins un sujet
-                sujets_str = ', '.join(str(i) for i in sujets_indices)
-                document.add_paragraph(f"Question {num_question} : sujets {sujets_str}")
+                sujets_str = ','.join(str(i) for i in sujets_indices)
+                f.write(f"Question {self.numero_question(num_question)} : sujets {sujets_str}\n")
+    
+    def generer_fichier_txt(self, sujets, nom_fichier="qcm_sujets.txt"):
+        """
+        Génère un fichier texte contenant tous les sujets.
+        
+        Args:
+            sujets: Dictionnaire de sujets par numéro de sujet, ou flux de
+                couples (numéro, sujet) tel que produit par iterer_sujets
+            nom_fichier (str): Nom du fichier à générer
+        """
+        with self._etape_ecriture(nom_fichier), open(nom_fichier, 'w', encoding='utf-8') as f:
+            for num_sujet, (questions, _) in _parcourir(sujets):
+                self._ecrire_sujet_txt(f, num_sujet, questions)
+    
+    def generer_fichier_correction(self, sujets, nom_fichier="qcm_corrections.txt"):
+        """
+        Génère un fichier de correction contenant les réponses correctes pour chaque sujet.
+        
+        Args:
+            sujets: Dictionnaire de sujets par numéro de sujet, ou flux de
+                couples (numéro, sujet) tel que produit par iterer_sujets
+            nom_fichier (str): Nom du fichier à générer
+        """
+        with self._etape_ecriture(nom_fichier), open(nom_fichier, 'w', encoding='utf-8') as f:
+            # Écrire les corrections pour chaque sujet
+            for num_sujet, (_, reponses) in _parcourir(sujets):
+                self._ecrire_correction_txt(f, num_sujet, reponses)
+            
+            # Ajouter les informations supplémentaires pour le correcteur
+            self._ecrire_informations_txt(f)
+    
+    def generer_fichiers_txt(self, sujets, nom_sujets="qcm_sujets.txt", nom_corrections="qcm_corrections.txt"):
+        """
+        Génère en une seule passe le fichier des sujets et celui des corrections.
+        
+        Chaque sujet est écrit dans les deux fichiers dès qu'il est produit :
+        avec le flux d'iterer_sujets, aucun sujet n'est conservé en mémoire.
+        
+        Args:
+            sujets: Dictionnaire de sujets par numéro de sujet, ou flux de
+                couples (numéro, sujet) tel que produit par iterer_sujets
+            nom_sujets (str): Nom du fichier des sujets
+            nom_corrections (str): Nom du fichier des corrections
+        """
+        with self._etape_ecriture(nom_sujets, nom_corrections), \
+                open(nom_sujets, 'w', encoding='utf-8') as f_sujets, \
+                open(nom_corrections, 'w', encoding='utf-8') as f_corrections:
+            for num_sujet, (questions, reponses) in _parcourir(sujets):
+                self._ecrire_sujet_txt(f_sujets, num_sujet, questions)
+                self._ecrire_correction_txt(f_corrections, num_sujet, reponses)
+            
+            # Le suivi est complet une fois tous les sujets produits
+            self._ecrire_informations_txt(f_corrections)
+    
+    def generer_fichier_cles(self, sujets, nom_fichier="qcm_cles.bin"):
+        """
+        Génère le fichier binaire des clés de correction, lu par notation_qcm.
         
-        # Sauvegarder le document
-        document.save(nom_fichier)
+        Args:
+            sujets: Dictionnaire de sujets par numéro de sujet, ou flux de
+                couples (numéro, sujet) tel que produit par iterer_sujets
+            nom_fichier (str): Nom du fichier à générer
+        """
+        from cles_qcm import ecrire_cles
+        with self._etape_ecriture(nom_fichier):
+            ecrire_cles(self, _parcourir(sujets), nom_fichier)
+    
+    def generer_fichier_docx(self, sujets, nom_fichier="qcm_sujets.docx", moteur='python-docx'):
+        """
+        Génère un fichier DOCX contenant tous les sujets.
+        
+        Args:
+            sujets: Dictionnaire de sujets par numéro de sujet, ou flux de
+                couples (numéro, sujet) tel que produit par iterer_sujets
+            nom_fichier (str): Nom du fichier à générer
+            moteur (str): 'python-docx' (voir rendu_docx), ou 'fast' pour écrire
+                directement le WordprocessingML en flux (voir docx_rapide)
+        """
+        rendu = charger_rendu('docx', moteur)
+        with self._etape_ecriture(nom_fichier):
+            rendu.ecrire_sujets(self, _parcourir(sujets), nom_fichier)
+    
+    def generer_fichier_correction_docx(self, sujets, nom_fichier="qcm_corrections.docx", moteur='python-docx'):
+        """
+        Génère un fichier DOCX de correction contenant les réponses correctes pour chaque sujet.
+        
+        Args:
+            sujets: Dictionnaire de sujets par numéro de sujet, ou flux de
+                couples (numéro, sujet) tel que produit par iterer_sujets
+            nom_fichier (str): Nom du fichier à générer
+            moteur (str): 'python-docx' (voir rendu_docx), ou 'fast' pour écrire
+                directement le WordprocessingML en flux (voir docx_rapide)
+        """
+        rendu = charger_rendu('docx', moteur)
+        with self._etape_ecriture(nom_fichier):
+            rendu.ecrire_corrections(self, _parcourir(sujets), nom_fichier)
+    
+    def generer_fichier_pdf(self, sujets, nom_fichier="qcm_sujets.pdf"):
+        """
+        Génère un fichier PDF contenant tous les sujets, page par page (voir rendu_pdf).
+        
+        Args:
+            sujets: Dictionnaire de sujets par numéro de sujet, ou flux de
+                couples (numéro, sujet) tel que produit par iterer_sujets
+            nom_fichier (str): Nom du fichier à générer
+        """
+        rendu = charger_rendu('pdf')
+        with self._etape_ecriture(nom_fichier):
+            rendu.ecrire_sujets(self, _parcourir(sujets), nom_fichier)
+    
+    def generer_fichier_correction_pdf(self, sujets, nom_fichier="qcm_corrections.pdf"):
+        """
+        Génère un fichier PDF de correction contenant les réponses correctes pour chaque sujet.
+        
+        Args:
+            sujets: Dictionnaire de sujets par numéro de sujet, ou flux de
+                couples (numéro, sujet) tel que produit par iterer_sujets
+            nom_fichier (str): Nom du fichier à générer
+        """
+        rendu = charger_rendu('pdf')
+        with self._etape_ecriture(nom_fichier):
+            rendu.ecrire_corrections(self, _parcourir(sujets), nom_fichier)
 
 if __name__ == "__main__":
     import argparse
     
     parser = argparse.ArgumentParser(description='Générateur de QCM')
-    parser.add_argument('fichier_questions', help='Fichier contenant les questions')
+    parser.add_argument('fichier_questions', help='Fichier contenant les questions, ou base SQLite avec --criteres')
     parser.add_argument('--nb_eleves', type=int, default=5, help='Nombre d\'élèves (sujets à créer)')
-    parser.add_argument('--nb_questions', type=int, default=10, choices=[5, 10, 15, 20], 
-                        help='Nombre de questions par sujet (5, 10, 15 ou 20)')
+    parser.add_argument('--nb_questions', type=int, choices=[5, 10, 15, 20], 
+                        help='Nombre de questions par sujet (5, 10, 15 ou 20 ; par défaut 10, ou la somme des critères)')
+    parser.add_argument('--criteres', metavar='THEME:DIFFICULTE:NOMBRE,...',
+                        help="Tirer chaque sujet dans une base SQLite (voir banque_sqlite), par exemple "
+                             "cinema:difficile:5,culture_generale:facile:5 ; '*' accepte tout thème ou difficulté")
     parser.add_argument('--graine', type=int, default=42, help='Graine pour la génération aléatoire')
-    parser.add_argument('--format', choices=['txt', 'docx', 'both'], default='both', 
-                        help='Format de sortie (txt, docx, both)')
+    parser.add_argument('--format', choices=['txt', 'docx', 'pdf', 'both'], default='both', 
+                        help='Format de sortie (txt, docx, pdf, both : txt et docx)')
+    parser.add_argument('--jobs', type=int, default=1,
+                        help='Nombre de processus pour la génération des sujets')
+    parser.add_argument('--moteur', choices=['python', 'numpy'], default='python',
+                        help='Moteur de tirage des sujets (numpy : tirage vectorisé de toute la classe)')
+    parser.add_argument('--docx-engine', choices=list(RENDUS['docx']), default='python-docx',
+                        help='Moteur de rendu DOCX (fast : écriture directe du XML, sans python-docx)')
+    parser.add_argument('--dossier-sortie', default='.',
+                        help='Répertoire des fichiers générés (par défaut : répertoire courant)')
+    parser.add_argument('--partition', type=int, default=0,
+                        help='Nombre de sujets par fichier DOCX (0 : un seul fichier)')
+    parser.add_argument('--fusion', action='store_true',
+                        help='Fusionner les fichiers DOCX partitionnés en un seul fichier')
+    parser.add_argument('--cles', action='store_true',
+                        help='Générer aussi le fichier des clés de correction (qcm_cles.bin) pour la notation automatique')
+    parser.add_argument('--selection', choices=['aleatoire', 'equilibre'], default='aleatoire',
+                        help="Sélection des questions (equilibre : équilibrer l'utilisation des questions)")
+    parser.add_argument('--recouvrement-max', type=int, default=None,
+                        help='Nombre maximal de questions communes entre deux sujets voisins (avec --selection equilibre)')
+    parser.add_argument('--fenetre', type=int, default=FENETRE_RECOUVREMENT,
+                        help='Nombre de sujets précédents considérés comme voisins (0 : tous)')
+    parser.add_argument('--incremental', action='store_true',
+                        help="Avec --partition, ne rendre que les partitions touchées par les questions modifiées "
+                             "depuis la génération précédente dans le même dossier")
+    parser.add_argument('--sujets', metavar='NUMEROS',
+                        help='Ne produire que certains sujets, par exemple 3,17,10-20 (numérotés à partir de 0)')
+    parser.add_argument('--sans-cache', action='store_true',
+                        help='Ne pas utiliser le cache des banques compilées')
+    parser.add_argument('--metrics', metavar='FICHIER',
+                        help='Enregistrer les mesures (durée des étapes, compteurs) dans un fichier JSON')
+    parser.add_argument('--memoire', action='store_true',
+                        help='Mesurer aussi le pic de mémoire de chaque étape (plus lent)')
+    parser.add_argument('--profil', action='store_true',
+                        help='Profiler la génération avec cProfile et afficher les fonctions les plus coûteuses')
     
     args = parser.parse_args()
     
+    if args.sujets and args.partition > 0:
+        parser.error("--sujets ne peut pas être combiné avec --partition")
+    if args.moteur == 'numpy' and args.partition > 0:
+        # Les partitions sont rendues par des processus qui retirent leurs
+        # sujets avec le moteur 'python'
+        parser.error("--moteur numpy ne peut pas être combiné avec --partition")
+    if args.incremental and args.partition <= 0:
+        parser.error("--incremental nécessite --partition")
+    
+    metriques = Metriques(memoire=args.memoire, profil=args.profil)
+    
     try:
+        # Avec des critères, les questions sont tirées dans une base SQLite
+        source = args.fichier_questions
+        if args.criteres:
+            from banque_sqlite import BanqueSQLite, analyser_criteres
+            source = BanqueSQLite(args.fichier_questions, analyser_criteres(args.criteres))
+            if args.nb_questions is None:
+                args.nb_questions = source.nb_questions_sujet
+        elif args.nb_questions is None:
+            args.nb_questions = 10
+        
         # Créer le générateur
-        generateur = GenerateurQCM(args.fichier_questions, args.nb_eleves, args.nb_questions, args.graine)
+        generateur = GenerateurQCM(source, args.nb_eleves, args.nb_questions, args.graine,
+                                   cache=not args.sans_cache, selection=args.selection,
+                                   recouvrement_max=args.recouvrement_max, fenetre=args.fenetre or None,
+                                   metriques=metriques)
+        
+        # Signaler les blocs de questions rejetés
+        for numero_ligne, message in generateur.erreurs_chargement:
+            print(f"Avertissement : ligne {numero_ligne} : {message}")
+        
+        # Sujets demandés : une sélection est produite à l'identique d'une
+        # génération complète, sans générer les autres sujets
+        numeros = analyser_numeros(args.sujets, args.nb_eleves) if args.sujets else None
+        
+        # Les sujets sont tirés une seule fois, dans une étape mesurée à part,
+        # et conservés sous forme compacte : chaque rendu en construit le texte
+        # à la demande. Les partitions DOCX tirent elles-mêmes leurs sujets.
+        sujets = None
+        if args.cles or args.format != 'docx' or args.partition <= 0:
+            sujets = generateur.generer_sujets(jobs=args.jobs, moteur=args.moteur, numeros=numeros)
         
-        # Générer les sujets
-        sujets = generateur.generer_sujets()
+        os.makedirs(args.dossier_sortie, exist_ok=True)
+        sortie = lambda nom: os.path.join(args.dossier_sortie, nom)
         
         # Générer les fichiers
         if args.format in ['txt', 'both']:
-            generateur.generer_fichier_txt(sujets)
-            generateur.generer_fichier_correction(sujets)
-            print(f"Fichiers texte générés : qcm_sujets.txt et qcm_corrections.txt")
+            generateur.generer_fichiers_txt(sujets, sortie("qcm_sujets.txt"), sortie("qcm_corrections.txt"))
+            print(f"Fichiers texte générés : {sortie('qcm_sujets.txt')} et {sortie('qcm_corrections.txt')}")
         
-        if args.format in ['docx', 'both']:
-            generateur.generer_fichier_docx(sujets)
-            generateur.generer_fichier_correction_docx(sujets)
-            print(f"Fichiers DOCX générés : qcm_sujets.docx et qcm_corrections.docx")
+        if args.cles:
+            generateur.generer_fichier_cles(sujets, sortie("qcm_cles.bin"))
+            print(f"Fichier de clés généré : {sortie('qcm_cles.bin')}")
+        
+        if args.format in ['docx', 'both'] and args.incremental:
+            from incremental_qcm import generer_incremental
+            manifeste, rendues = generer_incremental(generateur, args.dossier_sortie, args.partition,
+                                                     jobs=args.jobs, moteur=args.docx_engine, fusion=args.fusion)
+            print(f"Fichiers DOCX générés : {len(rendues)} partitions rendues, "
+                  f"{len(manifeste['partitions']) - len(rendues)} inchangées, voir {sortie(FICHIER_MANIFESTE)}")
+        elif args.format in ['docx', 'both'] and args.partition > 0:
+            manifeste = generateur.generer_fichiers_docx_partitionnes(
+                args.dossier_sortie, args.partition, jobs=args.jobs, moteur=args.docx_engine, fusion=args.fusion)
+            print(f"Fichiers DOCX générés : {len(manifeste['partitions'])} partitions, "
+                  f"voir {sortie(FICHIER_MANIFESTE)}")
+        elif args.format in ['docx', 'both']:
+            generateur.generer_fichier_docx(sujets, sortie("qcm_sujets.docx"), moteur=args.docx_engine)
+            generateur.generer_fichier_correction_docx(sujets, sortie("qcm_corrections.docx"),
+                                                       moteur=args.docx_engine)
+            print(f"Fichiers DOCX générés : {sortie('qcm_sujets.docx')} et {sortie('qcm_corrections.docx')}")
+        
+        if args.format == 'pdf':
+            generateur.generer_fichier_pdf(sujets, sortie("qcm_sujets.pdf"))
+            generateur.generer_fichier_correction_pdf(sujets, sortie("qcm_corrections.pdf"))
+            print(f"Fichiers PDF générés : {sortie('qcm_sujets.pdf')} et {sortie('qcm_corrections.pdf')}")
+        
+        if args.profil:
+            print(metriques.profil_texte())
+        
+        if args.metrics:
+            metriques.sauvegarder(args.metrics)
+            print(f"Mesures enregistrées : {args.metrics}")
         
     except Exception as e:
-        print(f"Erreur : {e}")
\ No newline at end of file
+        print(f"Erreur : {e}")
+    
+    finally:
+        metriques.fermer()
\ No newline at end of file
@@ -0,0 +1,198 @@
+import hashlib
+import json
+import os
+
+from generateur_qcm import FICHIER_MANIFESTE
+from index_croise import IndexCroise
+
+# Répartition des questions dans les sujets lors de la dernière génération
+FICHIER_INDEX = 'qcm_index.bin'
+
+
+def empreintes_questions(questions):
+    """
+    Calcule l'empreinte de chaque question (énoncé, réponses et solution).
+
+    Args:
+        questions (Sequence): Questions de la banque
+
+    Returns:
+        list: Empreintes hexadécimales, dans l'ordre de la banque
+    """
+    empreintes = []
+    for question in questions:
+        contenu = json.dumps([question['question'], list(question['reponses']), question['solution']],
+                             ensure_ascii=False)
+        empreintes.append(hashlib.blake2b(contenu.encode('utf-8'), digest_size=16).hexdigest())
+    return empreintes
+
+
+def parametres_generation(generateur, taille_partition, moteur):
+    """
+    Paramètres dont dépendent la répartition des questions et les fichiers rendus.
+
+    Les sujets ne dépendent du contenu des questions qu'au travers de leur
+    texte : tant que ces paramètres sont inchangés, une question modifiée
+    occupe les mêmes sujets et la même place dans chacun d'eux.
+
+    Args:
+        generateur (GenerateurQCM): Générateur utilisé
+        taille_partition (int): Nombre de sujets par fichier
+        moteur (str): Moteur de rendu DOCX
+
+    Returns:
+        dict: Paramètres sérialisables en JSON
+    """
+    return {
+        'nb_eleves': generateur.nb_eleves,
+        'nb_questions': generateur.nb_questions,
+        'graine': generateur.graine,
+        'selection': generateur.selection,
+        'recouvrement_max': generateur.recouvrement_max,
+        'fenetre': generateur.fenetre,
+        'nb_questions_banque': len(generateur.questions),
+        'taille_partition': taille_partition,
+        'moteur': moteur
+    }
+
+
+def indexer_sujets(generateur):
+    """
+    Construit l'index croisé de tous les sujets, sans les construire ni les rendre.
+
+    Args:
+        generateur (GenerateurQCM): Générateur utilisé
+
+    Returns:
+        IndexCroise: Questions de chaque sujet
+    """
+    index = IndexCroise(len(generateur.questions))
+    for num_sujet in range(generateur.nb_eleves):
+        index.ajouter_sujet(num_sujet, generateur.tirer_sujet(num_sujet)[0])
+    return index
+
+
+def _lire_manifeste(dossier):
+    """
+    Lit le manifeste de la génération précédente.
+
+    Args:
+        dossier (str): Répertoire de sortie
+
+    Returns:
+        dict: Contenu du manifeste, ou None s'il est absent ou illisible
+    """
+    try:
+        with open(os.path.join(dossier, FICHIER_MANIFESTE), encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def partitions_a_rendre(generateur, dossier, taille_partition, moteur, empreintes):
+    """
+    Détermine les partitions à rendre à nouveau depuis la génération précédente.
+
+    Les questions dont l'empreinte a changé sont recherchées dans l'index
+    inverse (question -> sujets) de la génération précédente : seules les
+    partitions contenant l'un de ces sujets, ou dont un fichier manque, sont
+    à rendre.
+
+    Args:
+        generateur (GenerateurQCM): Générateur utilisé
+        dossier (str): Répertoire de sortie
+        taille_partition (int): Nombre de sujets par fichier
+        moteur (str): Moteur de rendu DOCX
+        empreintes (list): Empreintes des questions de la banque actuelle
+
+    Returns:
+        tuple: (rangs des partitions à rendre, ou None s'il faut tout
+               générer, nombre de sujets touchés par des questions modifiées)
+    """
+    manifeste = _lire_manifeste(dossier)
+    if manifeste is None or 'incremental' not in manifeste:
+        return None, generateur.nb_eleves
+
+    suivi = manifeste['incremental']
+    if suivi['parametres'] != parametres_generation(generateur, taille_partition, moteur):
+        return None, generateur.nb_eleves
+
+    try:
+        index = IndexCroise.charger(os.path.join(dossier, suivi['index']))
+    except (OSError, ValueError):
+        return None, generateur.nb_eleves
+
+    sujets = set()
+    for num_question, (avant, apres) in enumerate(zip(suivi['empreintes'], empreintes)):
+        if avant != apres:
+            sujets.update(index.sujets_de_question(num_question))
+
+    partitions = {num_sujet // taille_partition for num_sujet in sujets}
+    for rang, partition in enumerate(manifeste['partitions']):
+        if not all(os.path.exists(os.path.join(dossier, partition[cle])) for cle in ('sujets', 'corrections')):
+            partitions.add(rang)
+    return partitions, len(sujets)
+
+
+def generer_incremental(generateur, dossier, taille_partition, jobs=1, moteur='python-docx', fusion=False):
+    """
+    Génère les sujets et corrections DOCX partitionnés en ne rendant que ce qui a changé.
+
+    Le manifeste conserve l'empreinte de chaque question et l'index croisé des
+    sujets est enregistré à côté des partitions. À la génération suivante dans
+    le même dossier, avec les mêmes paramètres et une banque de même taille,
+    seules les partitions contenant des questions modifiées sont rendues : les
+    autres fichiers sont conservés octet pour octet, et la fusion éventuelle
+    est refaite. Dans tous les autres cas, tout est généré.
+
+    Args:
+        generateur (GenerateurQCM): Générateur utilisé
+        dossier (str): Répertoire de sortie
+        taille_partition (int): Nombre de sujets par fichier
+        jobs (int): Nombre de processus de rendu
+        moteur (str): Moteur de rendu DOCX ('python-docx' ou 'fast')
+        fusion (bool): Fusionner aussi les partitions en un fichier de sujets
+            et un fichier de corrections
+
+    Returns:
+        tuple: (contenu du manifeste, rangs des partitions rendues)
+    """
+    os.makedirs(dossier, exist_ok=True)
+    chemin_manifeste = os.path.join(dossier, FICHIER_MANIFESTE)
+    empreintes = empreintes_questions(generateur.questions)
+
+    with generateur.metriques.etape('recherche des partitions modifiees'):
+        partitions, nb_sujets = partitions_a_rendre(generateur, dossier, taille_partition, moteur, empreintes)
+    generateur.metriques.compter('sujets_modifies', nb_sujets)
+
+    nb_partitions = -(-generateur.nb_eleves // taille_partition)
+    rendues = sorted(range(nb_partitions) if partitions is None else partitions)
+    generateur.metriques.compter('partitions_rendues', len(rendues))
+    generateur.metriques.compter('partitions_reutilisees', nb_partitions - len(rendues))
+
+    fusion_a_jour = not fusion or all(os.path.exists(os.path.join(dossier, nom))
+                                      for nom in ('qcm_sujets.docx', 'qcm_corrections.docx'))
+    if not rendues and fusion_a_jour:
+        return _lire_manifeste(dossier), rendues
+
+    # Un manifeste périmé ne doit pas survivre à une génération interrompue
+    if os.path.exists(chemin_manifeste):
+        os.remove(chemin_manifeste)
+
+    if partitions is None:
+        with generateur.metriques.etape('indexation des sujets'):
+            index = indexer_sujets(generateur)
+        index.sauvegarder(os.path.join(dossier, FICHIER_INDEX))
+
+    manifeste = generateur.generer_fichiers_docx_partitionnes(dossier, taille_partition, jobs=jobs, moteur=moteur,
+                                                              fusion=fusion, partitions=set(rendues))
+
+    manifeste['incremental'] = {
+        'parametres': parametres_generation(generateur, taille_partition, moteur),
+        'empreintes': empreintes,
+        'index': FICHIER_INDEX
+    }
+    with open(chemin_manifeste, 'w', encoding='utf-8') as f:
+        json.dump(manifeste, f, ensure_ascii=False, indent=2)
+
+    return manifeste, rendues
@@ -0,0 +1,268 @@
+import struct
+import sys
+from array import array
+from bisect import bisect_left
+from collections.abc import Mapping
+
+# Signature et version du format binaire de l'index
+MAGIC = b'QCMX'
+VERSION = 1
+
+# En-tête : signature, version, ordre des octets, nombre de questions de la
+# banque, nombre de sujets et nombre total d'indices (32 octets)
+ENTETE = struct.Struct('<4sHHQQQ')
+
+
+def _ordre_octets():
+    """Code de l'ordre des octets natif, stocké dans l'en-tête."""
+    return 0 if sys.byteorder == 'little' else 1
+
+
+class IndexCroise:
+    """
+    Index croisé compact entre sujets et questions de la banque.
+
+    Les questions de chaque sujet sont rangées bout à bout dans un tableau
+    d'indices, délimitées par un tableau de décalages (format CSR). L'index
+    inverse (question -> sujets) est construit en une seule passe, à la
+    première interrogation, selon le même format.
+    """
+    def __init__(self, nb_questions_banque):
+        """
+        Args:
+            nb_questions_banque (int): Nombre de questions de la banque
+        """
+        self.nb_questions_banque = nb_questions_banque
+        self.numeros = array('q')
+        self.decalages = array('Q', [0])
+        self.indices = array('I')
+        self._inverse = None
+        self._lignes = None
+        self._trie = True
+
+    def __len__(self):
+        return len(self.numeros)
+
+    def ajouter_sujet(self, num_sujet, indices_questions):
+        """
+        Ajoute les questions d'un sujet à l'index.
+
+        Args:
+            num_sujet (int): Numéro du sujet
+            indices_questions (list): Indices des questions dans la banque
+        """
+        if self.numeros and num_sujet < self.numeros[-1]:
+            self._trie = False
+        self.numeros.append(num_sujet)
+        self.indices.extend(indices_questions)
+        self.decalages.append(len(self.indices))
+        self._inverse = None
+        self._lignes = None
+
+    def _ligne(self, num_sujet):
+        """
+        Rang d'un sujet dans l'index.
+
+        Args:
+            num_sujet (int): Numéro du sujet
+
+        Returns:
+            int: Rang du sujet
+
+        Raises:
+            KeyError: Si le sujet n'est pas dans l'index
+        """
+        if self._trie:
+            ligne = bisect_left(self.numeros, num_sujet)
+            if ligne < len(self.numeros) and self.numeros[ligne] == num_sujet:
+                return ligne
+            raise KeyError(num_sujet)
+
+        if self._lignes is None:
+            self._lignes = {num: ligne for ligne, num in enumerate(self.numeros)}
+        return self._lignes[num_sujet]
+
+    def questions_du_sujet(self, num_sujet):
+        """
+        Questions de la banque intégrées dans un sujet.
+
+        Args:
+            num_sujet (int): Numéro du sujet
+
+        Returns:
+            list: Indices des questions, dans l'ordre du sujet
+        """
+        ligne = self._ligne(num_sujet)
+        return self.indices[self.decalages[ligne]:self.decalages[ligne + 1]].tolist()
+
+    def _construire_inverse(self):
+        """Construit l'index question -> sujets par un tri par dénombrement."""
+        comptes = array('Q', bytes(8 * (self.nb_questions_banque + 1)))
+        for idx in self.indices:
+            comptes[idx + 1] += 1
+
+        # Décalages cumulés
+        for q in range(self.nb_questions_banque):
+            comptes[q + 1] += comptes[q]
+        decalages = array('Q', comptes)
+
+        # Placement des rangs de sujets ; les sujets restent dans leur ordre d'ajout
+        lignes = array('I', bytes(4 * len(self.indices)))
+        position = comptes
+        ligne = 0
+        fin_ligne = self.decalages[1] if len(self.decalages) > 1 else 0
+        for k, idx in enumerate(self.indices):
+            while k >= fin_ligne:
+                ligne += 1
+                fin_ligne = self.decalages[ligne + 1]
+            lignes[position[idx]] = ligne
+            position[idx] += 1
+
+        self._inverse = (decalages, lignes)
+
+    def sujets_de_question(self, num_question):
+        """
+        Sujets dans lesquels apparaît une question de la banque.
+
+        Args:
+            num_question (int): Indice de la question dans la banque
+
+        Returns:
+            list: Numéros des sujets, dans l'ordre de génération
+        """
+        if not 0 <= num_question < self.nb_questions_banque:
+            raise KeyError(num_question)
+        if self._inverse is None:
+            self._construire_inverse()
+
+        decalages, lignes = self._inverse
+        return [self.numeros[ligne] for ligne in lignes[decalages[num_question]:decalages[num_question + 1]]]
+
+    def items_sujets(self):
+        """
+        Parcourt les sujets dans leur ordre d'ajout.
+
+        Yields:
+            tuple: (numéro du sujet, indices de ses questions)
+        """
+        for ligne, num_sujet in enumerate(self.numeros):
+            yield num_sujet, self.indices[self.decalages[ligne]:self.decalages[ligne + 1]].tolist()
+
+    def items_questions(self):
+        """
+        Parcourt toutes les questions de la banque, utilisées ou non.
+
+        Yields:
+            tuple: (indice de la question, numéros des sujets qui la contiennent)
+        """
+        for num_question in range(self.nb_questions_banque):
+            yield num_question, self.sujets_de_question(num_question)
+
+    def to_bytes(self):
+        """
+        Sérialise l'index sous forme binaire.
+
+        Returns:
+            bytes: En-tête suivi des numéros, décalages et indices
+        """
+        return b''.join((
+            ENTETE.pack(MAGIC, VERSION, _ordre_octets(), self.nb_questions_banque, len(self.numeros),
+                        len(self.indices)),
+            self.numeros.tobytes(),
+            self.decalages.tobytes(),
+            self.indices.tobytes()
+        ))
+
+    @classmethod
+    def from_bytes(cls, donnees):
+        """
+        Reconstruit un index sérialisé par to_bytes.
+
+        Args:
+            donnees (bytes): Index sérialisé
+
+        Returns:
+            IndexCroise: Index reconstruit
+        """
+        magic, version, ordre, nb_questions_banque, nb_sujets, nb_indices = ENTETE.unpack_from(donnees)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("Format d'index croisé non reconnu")
+
+        index = cls(nb_questions_banque)
+        index.decalages = array('Q')
+        position = ENTETE.size
+        for tableau, nombre in ((index.numeros, nb_sujets), (index.decalages, nb_sujets + 1),
+                                (index.indices, nb_indices)):
+            fin = position + nombre * tableau.itemsize
+            tableau.frombytes(donnees[position:fin])
+            if ordre != _ordre_octets():
+                tableau.byteswap()
+            position = fin
+
+        index._trie = all(a <= b for a, b in zip(index.numeros, index.numeros[1:]))
+        return index
+
+    def sauvegarder(self, chemin):
+        """
+        Enregistre l'index dans un fichier binaire.
+
+        Args:
+            chemin (str): Chemin du fichier
+        """
+        with open(chemin, 'wb') as f:
+            f.write(self.to_bytes())
+
+    @classmethod
+    def charger(cls, chemin):
+        """
+        Charge un index enregistré par sauvegarder.
+
+        Args:
+            chemin (str): Chemin du fichier
+
+        Returns:
+            IndexCroise: Index chargé
+        """
+        with open(chemin, 'rb') as f:
+            return cls.from_bytes(f.read())
+
+
+class QuestionsParSujet(Mapping):
+    """Vue numéro de sujet -> indices de ses questions sur un IndexCroise."""
+    def __init__(self, index):
+        self.index = index
+
+    def __getitem__(self, num_sujet):
+        return self.index.questions_du_sujet(num_sujet)
+
+    def __iter__(self):
+        return iter(self.index.numeros)
+
+    def __len__(self):
+        return len(self.index)
+
+    def items(self):
+        return self.index.items_sujets()
+
+
+class SujetsParQuestion(Mapping):
+    """
+    Vue indice de question -> numéros des sujets sur un IndexCroise.
+
+    Toutes les questions de la banque en sont des clés, y compris celles qui
+    n'apparaissent dans aucun sujet (liste vide).
+    """
+    def __init__(self, index):
+        self.index = index
+
+    def __getitem__(self, num_question):
+        return self.index.sujets_de_question(num_question)
+
+    def __iter__(self):
+        return iter(range(self.index.nb_questions_banque))
+
+    def __len__(self):
+        return self.index.nb_questions_banque
+
+    def items(self):
+        return self.index.items_questions()
@@ -0,0 +1,399 @@
+"""
+Génération par lots : toutes les classes décrites dans un manifeste (YAML ou
+JSON) sont générées en une seule exécution.
+
+Chaque banque de questions distincte n'est analysée qu'une fois : elle est
+compilée dans le cache (voir banque_compilee) puis projetée en mémoire par
+chaque processus de travail. Les classes sont réparties sur un pool de
+processus ; les fichiers d'une classe sont écrits dans un répertoire
+temporaire qui ne remplace le répertoire de la classe qu'une fois complet.
+Un rapport (rapport_lot.json) résume l'issue et la durée de chaque classe.
+
+Exemple de manifeste (YAML) :
+
+    sorties: fin_de_trimestre
+    defauts:
+      nb_questions: 10
+      formats: [txt, docx]
+    classes:
+      - nom: 3A
+        banque: QCM_cinema.txt
+        nb_eleves: 28
+        graine: 1
+      - nom: 3B
+        banque: QCM_culture_generale.txt
+        nb_eleves: 31
+        graine: 2
+        formats: [pdf, cles]
+"""
+import json
+import os
+import shutil
+import tempfile
+import time
+
+from banque_compilee import BanqueCompilee, charger_banque
+from generateur_qcm import GenerateurQCM
+from metriques_qcm import Metriques
+
+# Fichiers produits pour chaque format d'une classe
+FORMATS = {
+    'txt': ('qcm_sujets.txt', 'qcm_corrections.txt'),
+    'docx': ('qcm_sujets.docx', 'qcm_corrections.docx'),
+    'pdf': ('qcm_sujets.pdf', 'qcm_corrections.pdf'),
+    'cles': ('qcm_cles.bin',),
+}
+
+# Paramètres d'une classe et valeurs par défaut (nom, banque et nb_eleves
+# sont obligatoires ; dossier vaut par défaut le nom de la classe)
+PARAMETRES_DEFAUT = {
+    'nb_questions': 10,
+    'graine': 42,
+    'formats': ['txt', 'docx'],
+    'moteur_docx': 'fast',
+    'selection': 'aleatoire',
+    'criteres': None,
+}
+PARAMETRES_OBLIGATOIRES = ('nom', 'banque', 'nb_eleves')
+
+FICHIER_RAPPORT = 'rapport_lot.json'
+
+# Banques ouvertes par chaque processus de travail
+_banques_travailleur = {}
+
+
+def lire_manifeste(chemin):
+    """
+    Lit un manifeste et prépare la liste des classes à générer.
+
+    Args:
+        chemin (str): Fichier YAML (.yaml, .yml) ou JSON
+
+    Returns:
+        list: Tâches (une par classe), voir preparer_taches
+
+    Raises:
+        ImportError: Si le manifeste est en YAML et que PyYAML n'est pas installé
+        ValueError: Si le manifeste est invalide
+    """
+    with open(chemin, encoding='utf-8') as f:
+        if chemin.endswith(('.yaml', '.yml')):
+            try:
+                import yaml
+            except ImportError as e:
+                raise ImportError("La lecture d'un manifeste YAML nécessite la bibliothèque PyYAML, "
+                                  "qui n'est pas installée (un manifeste JSON peut être utilisé)") from e
+            donnees = yaml.safe_load(f)
+        else:
+            donnees = json.load(f)
+
+    return preparer_taches(donnees, os.path.dirname(os.path.abspath(chemin)))
+
+
+def preparer_taches(donnees, racine='.'):
+    """
+    Valide le contenu d'un manifeste et complète chaque classe avec les valeurs par défaut.
+
+    Args:
+        donnees (dict): Contenu du manifeste : 'classes' (liste), et
+            éventuellement 'defauts' (paramètres communs) et 'sorties'
+            (répertoire parent des répertoires de classe)
+        racine (str): Répertoire par rapport auquel les chemins relatifs sont résolus
+
+    Returns:
+        list: Dictionnaires des paramètres de chaque classe, avec des chemins absolus
+
+    Raises:
+        ValueError: Si le manifeste est invalide
+    """
+    if not isinstance(donnees, dict) or not isinstance(donnees.get('classes'), list) or not donnees['classes']:
+        raise ValueError("Le manifeste doit contenir une liste 'classes' non vide")
+
+    inconnues = set(donnees) - {'classes', 'defauts', 'sorties'}
+    if inconnues:
+        raise ValueError(f"Clés inconnues dans le manifeste : {', '.join(sorted(inconnues))}")
+
+    defauts = {**PARAMETRES_DEFAUT, **(donnees.get('defauts') or {})}
+    sorties = os.path.join(racine, donnees.get('sorties') or '.')
+    autorises = set(PARAMETRES_DEFAUT) | set(PARAMETRES_OBLIGATOIRES) | {'dossier'}
+
+    taches = []
+    dossiers = set()
+    for rang, classe in enumerate(donnees['classes'], start=1):
+        tache = {**defauts, **classe}
+        inconnues = set(tache) - autorises
+        if inconnues:
+            raise ValueError(f"Classe {rang} : paramètres inconnus : {', '.join(sorted(inconnues))}")
+        manquants = [nom for nom in PARAMETRES_OBLIGATOIRES if nom not in tache]
+        if manquants:
+            raise ValueError(f"Classe {rang} : paramètres manquants : {', '.join(manquants)}")
+
+        tache['nom'] = str(tache['nom'])
+        if isinstance(tache['formats'], str):
+            tache['formats'] = [tache['formats']]
+        formats_inconnus = [f for f in tache['formats'] if f not in FORMATS]
+        if formats_inconnus:
+            raise ValueError(f"Classe {tache['nom']} : formats inconnus : {', '.join(formats_inconnus)} "
+                             f"(possibles : {', '.join(FORMATS)})")
+
+        # Critères en une chaîne (« cinema:facile:5,... ») ou en liste YAML de critères
+        criteres = tache['criteres']
+        if isinstance(criteres, list) and all(isinstance(critere, str) for critere in criteres):
+            criteres = ','.join(criteres)
+        if criteres is not None and not isinstance(criteres, str):
+            raise ValueError(f"Classe {tache['nom']} : 'criteres' doit être une chaîne ou une liste de "
+                             f"critères theme:difficulte:nombre")
+        if criteres:
+            from banque_sqlite import analyser_criteres
+            try:
+                analyser_criteres(criteres)
+            except ValueError as e:
+                raise ValueError(f"Classe {tache['nom']} : {e}") from None
+        tache['criteres'] = criteres or None
+
+        tache['banque'] = os.path.abspath(os.path.join(racine, tache['banque']))
+        tache['dossier'] = os.path.abspath(os.path.join(sorties, str(tache.get('dossier') or tache['nom'])))
+        if tache['dossier'] in dossiers:
+            raise ValueError(f"Classe {tache['nom']} : le répertoire {tache['dossier']} est déjà utilisé")
+        dossiers.add(tache['dossier'])
+        taches.append(tache)
+
+    return taches
+
+
+def compiler_banques(taches, afficher=print):
+    """
+    Compile une seule fois chaque banque de questions distincte.
+
+    Les classes tirées dans une base SQLite (paramètre 'criteres') ouvrent
+    directement la base.
+
+    Args:
+        taches (list): Tâches issues de preparer_taches ; le chemin de la
+            banque compilée est ajouté à chacune ('banque_compilee')
+        afficher: Fonction d'affichage de la progression
+
+    Returns:
+        dict: Message d'erreur par banque qui n'a pas pu être chargée
+    """
+    compilees = {}
+    erreurs = {}
+    for tache in taches:
+        source = tache['banque']
+        if tache['criteres'] or source in erreurs:
+            continue
+        if source not in compilees:
+            try:
+                banque = charger_banque(source)
+            except Exception as e:
+                erreurs[source] = str(e)
+                continue
+            compilees[source] = banque.chemin
+            afficher(f"Banque {source} : {len(banque)} questions")
+            banque.fermer()
+        tache['banque_compilee'] = compilees[source]
+    return erreurs
+
+
+def _ouvrir_banque(tache):
+    """
+    Ouvre la banque d'une classe, une seule fois par processus de travail.
+
+    Args:
+        tache (dict): Paramètres de la classe
+
+    Returns:
+        Sequence: Banque compilée, ou BanqueSQLite si la classe a des critères
+    """
+    cle = (tache['banque'], tache['criteres'])
+    banque = _banques_travailleur.get(cle)
+    if banque is None:
+        if tache['criteres']:
+            from banque_sqlite import BanqueSQLite, analyser_criteres
+            banque = BanqueSQLite(tache['banque'], analyser_criteres(tache['criteres']))
+        else:
+            try:
+                banque = BanqueCompilee(tache['banque_compilee'])
+            except OSError:
+                # Banque évincée du cache entre-temps : la recompiler
+                banque = charger_banque(tache['banque'])
+        _banques_travailleur[cle] = banque
+    return banque
+
+
+def _remplacer_dossier(temporaire, dossier):
+    """
+    Met en place le répertoire complet d'une classe à la place de l'ancien.
+
+    Args:
+        temporaire (str): Répertoire contenant les nouveaux fichiers
+        dossier (str): Répertoire de la classe
+    """
+    ancien = None
+    if os.path.exists(dossier):
+        ancien = temporaire + '.ancien'
+        os.rename(dossier, ancien)
+    os.rename(temporaire, dossier)
+    if ancien is not None:
+        shutil.rmtree(ancien, ignore_errors=True)
+
+
+def generer_classe(tache):
+    """
+    Génère tous les fichiers d'une classe (exécuté dans un processus de travail).
+
+    Les fichiers sont écrits dans un répertoire temporaire voisin, qui ne
+    remplace le répertoire de la classe qu'une fois tous les fichiers
+    écrits : en cas d'erreur, les fichiers d'une génération précédente
+    restent intacts.
+
+    Args:
+        tache (dict): Paramètres de la classe, issus de preparer_taches
+
+    Returns:
+        dict: Résultat de la classe (statut, durée, fichiers, compteurs)
+    """
+    debut = time.perf_counter()
+    resultat = {'nom': tache['nom'], 'dossier': tache['dossier'], 'banque': tache['banque'],
+                'nb_eleves': tache['nb_eleves'], 'statut': 'ok'}
+
+    parent = os.path.dirname(tache['dossier'])
+    temporaire = None
+    try:
+        os.makedirs(parent, exist_ok=True)
+        temporaire = tempfile.mkdtemp(prefix=f".{os.path.basename(tache['dossier'])}-", dir=parent)
+        sortie = lambda nom: os.path.join(temporaire, nom)
+
+        metriques = Metriques()
+        generateur = GenerateurQCM(_ouvrir_banque(tache), tache['nb_eleves'], tache['nb_questions'],
+                                   tache['graine'], selection=tache['selection'], metriques=metriques)
+        formats = tache['formats']
+
+        if 'txt' in formats:
+            generateur.generer_fichiers_txt(generateur.iterer_sujets(), *map(sortie, FORMATS['txt']))
+        if 'docx' in formats:
+            nom_sujets, nom_corrections = map(sortie, FORMATS['docx'])
+            generateur.generer_fichier_docx(generateur.iterer_sujets(), nom_sujets, moteur=tache['moteur_docx'])
+            generateur.generer_fichier_correction_docx(generateur.iterer_sujets(), nom_corrections,
+                                                       moteur=tache['moteur_docx'])
+        if 'pdf' in formats:
+            nom_sujets, nom_corrections = map(sortie, FORMATS['pdf'])
+            generateur.generer_fichier_pdf(generateur.iterer_sujets(), nom_sujets)
+            generateur.generer_fichier_correction_pdf(generateur.iterer_sujets(), nom_corrections)
+        if 'cles' in formats:
+            generateur.generer_fichier_cles(generateur.iterer_sujets(), *map(sortie, FORMATS['cles']))
+
+        _remplacer_dossier(temporaire, tache['dossier'])
+        temporaire = None
+
+    except Exception as e:
+        resultat.update(statut='erreur', message=str(e))
+
+    else:
+        resultat.update(fichiers=sorted(os.path.basename(chemin) for chemin in metriques.fichiers),
+                        questions_rejetees=len(generateur.erreurs_chargement),
+                        octets_ecrits=metriques.compteurs.get('octets_ecrits', 0),
+                        etapes={entree['nom']: entree['temps'] for entree in metriques.etapes
+                                if entree['niveau'] == 0})
+
+    finally:
+        if temporaire is not None:
+            shutil.rmtree(temporaire, ignore_errors=True)
+
+    resultat['temps'] = round(time.perf_counter() - debut, 3)
+    return resultat
+
+
+def executer_lot(taches, jobs=1, afficher=print):
+    """
+    Génère toutes les classes d'un lot.
+
+    Args:
+        taches (list): Tâches issues de preparer_taches
+        jobs (int): Nombre de processus de travail
+        afficher: Fonction d'affichage de la progression
+
+    Returns:
+        list: Résultats des classes, dans l'ordre du manifeste
+    """
+    erreurs = compiler_banques(taches, afficher)
+
+    resultats = [None] * len(taches)
+
+    def noter(rang, resultat):
+        resultats[rang] = resultat
+        etat = 'ok' if resultat['statut'] == 'ok' else f"erreur : {resultat['message']}"
+        afficher(f"{resultat['nom']:24} {resultat['temps']:8.2f} s  {etat}")
+
+    a_generer = []
+    for rang, tache in enumerate(taches):
+        if tache['banque'] in erreurs and not tache['criteres']:
+            noter(rang, {'nom': tache['nom'], 'dossier': tache['dossier'], 'banque': tache['banque'],
+                         'nb_eleves': tache['nb_eleves'], 'statut': 'erreur',
+                         'message': erreurs[tache['banque']], 'temps': 0.0})
+        else:
+            a_generer.append(rang)
+
+    if jobs <= 1 or len(a_generer) <= 1:
+        for rang in a_generer:
+            noter(rang, generer_classe(taches[rang]))
+    else:
+        from concurrent.futures import ProcessPoolExecutor, as_completed
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            futurs = {executor.submit(generer_classe, taches[rang]): rang for rang in a_generer}
+            for futur in as_completed(futurs):
+                noter(futurs[futur], futur.result())
+
+    return resultats
+
+
+def ecrire_rapport(chemin, resultats, temps_total, jobs):
+    """
+    Écrit le rapport d'un lot.
+
+    Args:
+        chemin (str): Fichier JSON du rapport
+        resultats (list): Résultats des classes
+        temps_total (float): Durée totale du lot, en secondes
+        jobs (int): Nombre de processus de travail utilisés
+    """
+    rapport = {
+        'temps_total': round(temps_total, 3),
+        'jobs': jobs,
+        'classes_generees': sum(1 for r in resultats if r['statut'] == 'ok'),
+        'classes_en_erreur': sum(1 for r in resultats if r['statut'] != 'ok'),
+        'classes': resultats
+    }
+    with open(chemin, 'w', encoding='utf-8') as f:
+        json.dump(rapport, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+
+    parser = argparse.ArgumentParser(description="Génère toutes les classes décrites dans un manifeste")
+    parser.add_argument('manifeste', help="Manifeste YAML ou JSON décrivant les classes")
+    parser.add_argument('--jobs', type=int, default=os.cpu_count() or 1,
+                        help="Nombre de processus de travail (par défaut : nombre de processeurs)")
+    parser.add_argument('--rapport', help=f"Fichier du rapport (par défaut : {FICHIER_RAPPORT} à côté du manifeste)")
+
+    args = parser.parse_args()
+
+    try:
+        taches = lire_manifeste(args.manifeste)
+    except Exception as e:
+        print(f"Erreur : {e}")
+        sys.exit(2)
+
+    debut = time.perf_counter()
+    resultats = executer_lot(taches, args.jobs)
+    temps_total = time.perf_counter() - debut
+
+    chemin_rapport = args.rapport or os.path.join(os.path.dirname(os.path.abspath(args.manifeste)), FICHIER_RAPPORT)
+    ecrire_rapport(chemin_rapport, resultats, temps_total, args.jobs)
+
+    nb_erreurs = sum(1 for r in resultats if r['statut'] != 'ok')
+    print(f"{len(resultats) - nb_erreurs} classes générées, {nb_erreurs} en erreur, en {temps_total:.2f} s ; "
+          f"rapport : {chemin_rapport}")
+    sys.exit(1 if nb_erreurs else 0)
@@ -0,0 +1,200 @@
+import io
+import json
+import os
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+
+class Metriques:
+    """
+    Mesures d'une exécution du générateur : durée (et éventuellement pic de
+    mémoire) de chaque étape, temps cumulés et compteurs.
+
+    Le suivi des allocations (tracemalloc) et le profilage (cProfile) ralentissent
+    l'exécution : ils ne sont actifs que sur demande.
+    """
+    def __init__(self, memoire=False, profil=False):
+        """
+        Args:
+            memoire (bool): Mesurer le pic de mémoire de chaque étape (tracemalloc)
+            profil (bool): Profiler les étapes avec cProfile
+        """
+        self.memoire = memoire
+        self.profileur = None
+        if profil:
+            import cProfile
+            self.profileur = cProfile.Profile()
+        self.etapes = []
+        self.cumuls = {}
+        self.compteurs = {}
+        self.fichiers = {}
+
+        # Pics de mémoire des étapes en cours, de la plus externe à la plus interne
+        self._pics = []
+        self._profondeur = 0
+        self._tracemalloc_demarre = False
+
+    def __reduce__(self):
+        # Les processus de travail reçoivent des mesures vierges, sans profileur
+        return (Metriques, ())
+
+    @contextmanager
+    def etape(self, nom):
+        """
+        Mesure une étape. Les étapes peuvent être imbriquées.
+
+        Args:
+            nom (str): Nom de l'étape
+        """
+        entree = {'nom': nom, 'niveau': self._profondeur, 'temps': None}
+        self.etapes.append(entree)
+
+        if self.memoire:
+            self._entrer_memoire()
+        if self.profileur is not None and self._profondeur == 0:
+            self.profileur.enable()
+
+        self._profondeur += 1
+        debut = time.perf_counter()
+        try:
+            yield entree
+        finally:
+            entree['temps'] = round(time.perf_counter() - debut, 6)
+            self._profondeur -= 1
+
+            if self.profileur is not None and self._profondeur == 0:
+                self.profileur.disable()
+            if self.memoire:
+                entree['memoire_pic'] = self._sortir_memoire()
+
+    def _entrer_memoire(self):
+        """Commence la mesure du pic de mémoire d'une étape."""
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._tracemalloc_demarre = True
+
+        # Le pic atteint jusqu'ici revient à l'étape englobante
+        if self._pics:
+            self._pics[-1] = max(self._pics[-1], tracemalloc.get_traced_memory()[1])
+        tracemalloc.reset_peak()
+        self._pics.append(0)
+
+    def _sortir_memoire(self):
+        """
+        Termine la mesure du pic de mémoire d'une étape.
+
+        Returns:
+            int: Pic de mémoire allouée pendant l'étape, en octets
+        """
+        pic = max(self._pics.pop(), tracemalloc.get_traced_memory()[1])
+        if self._pics:
+            self._pics[-1] = max(self._pics[-1], pic)
+        tracemalloc.reset_peak()
+        return pic
+
+    def cumuler(self, nom, duree):
+        """
+        Ajoute une durée à un temps cumulé (par exemple la génération des
+        sujets, répartie sur toute l'écriture d'un flux).
+
+        Args:
+            nom (str): Nom du temps cumulé
+            duree (float): Durée à ajouter, en secondes
+        """
+        self.cumuls[nom] = self.cumuls.get(nom, 0.0) + duree
+
+    def compter(self, nom, valeur=1):
+        """
+        Incrémente un compteur.
+
+        Args:
+            nom (str): Nom du compteur
+            valeur (int): Valeur à ajouter
+        """
+        self.compteurs[nom] = self.compteurs.get(nom, 0) + valeur
+
+    def ajouter_fichier(self, chemin):
+        """
+        Comptabilise un fichier écrit.
+
+        Args:
+            chemin (str): Chemin du fichier
+        """
+        taille = os.path.getsize(chemin)
+        self.fichiers[chemin] = taille
+        self.compter('fichiers_ecrits')
+        self.compter('octets_ecrits', taille)
+
+    def profil_texte(self, nb_lignes=25):
+        """
+        Fonctions les plus coûteuses selon le profilage.
+
+        Args:
+            nb_lignes (int): Nombre de fonctions affichées
+
+        Returns:
+            str: Statistiques cProfile triées par temps cumulé, ou chaîne vide
+        """
+        if self.profileur is None:
+            return ''
+        import pstats
+        flux = io.StringIO()
+        pstats.Stats(self.profileur, stream=flux).sort_stats('cumulative').print_stats(nb_lignes)
+        return flux.getvalue()
+
+    def en_dict(self):
+        """
+        Returns:
+            dict: Toutes les mesures, sérialisables en JSON
+        """
+        donnees = {
+            'etapes': self.etapes,
+            'cumuls': {nom: round(duree, 6) for nom, duree in self.cumuls.items()},
+            'compteurs': self.compteurs,
+            'fichiers': self.fichiers
+        }
+        if self.profileur is not None:
+            donnees['profil'] = self.profil_texte()
+        return donnees
+
+    def sauvegarder(self, chemin):
+        """
+        Écrit les mesures dans un fichier JSON.
+
+        Args:
+            chemin (str): Chemin du fichier
+        """
+        with open(chemin, 'w', encoding='utf-8') as f:
+            json.dump(self.en_dict(), f, ensure_ascii=False, indent=2)
+
+    def rapport(self):
+        """
+        Résumé lisible des mesures.
+
+        Returns:
+            str: Étapes, temps cumulés et compteurs, une mesure par ligne
+        """
+        lignes = ["Étapes :"]
+        for entree in self.etapes:
+            nom = '  ' * entree['niveau'] + entree['nom']
+            ligne = f"  {nom:44} {entree['temps'] or 0:9.3f} s"
+            if entree.get('memoire_pic') is not None:
+                ligne += f" {entree['memoire_pic'] / 1e6:9.1f} Mo"
+            lignes.append(ligne)
+
+        if self.cumuls:
+            lignes.append("Temps cumulés :")
+            lignes.extend(f"  {nom:44} {duree:9.3f} s" for nom, duree in self.cumuls.items())
+
+        if self.compteurs:
+            lignes.append("Compteurs :")
+            lignes.extend(f"  {nom:44} {valeur:>9}" for nom, valeur in self.compteurs.items())
+
+        return '\n'.join(lignes)
+
+    def fermer(self):
+        """Arrête le suivi des allocations s'il a été démarré par ces mesures."""
+        if self._tracemalloc_demarre:
+            tracemalloc.stop()
+            self._tracemalloc_demarre = False
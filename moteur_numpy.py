@@ -0,0 +1,154 @@
+import hashlib
+from bisect import bisect_left
+from collections.abc import Mapping
+
+import numpy as np
+
+# Nombre de réponses proposées pour chaque question
+NB_REPONSES = 4
+
+# Nombre maximal de clés aléatoires tirées à la fois lors de la sélection par
+# tri (borne la mémoire temporaire)
+TAILLE_BLOC_CLES = 1 << 22
+
+
+def _rng(graine):
+    """
+    Crée le générateur NumPy associé à une graine.
+
+    Args:
+        graine (int): Graine pour la génération aléatoire (éventuellement négative)
+
+    Returns:
+        numpy.random.Generator: Générateur initialisé
+    """
+    empreinte = hashlib.sha256(str(graine).encode('utf-8')).digest()
+    return np.random.default_rng(int.from_bytes(empreinte[:8], 'little'))
+
+
+def _selection_par_rejet(rng, nb_banque, nb_eleves, nb_questions):
+    """
+    Tire les questions de chaque sujet par tirage avec remise, en retirant les
+    seules lignes contenant un doublon. Adapté aux grandes banques.
+    """
+    selection = rng.integers(0, nb_banque, size=(nb_eleves, nb_questions), dtype=np.int64)
+    a_retirer = np.arange(nb_eleves)
+
+    while True:
+        triees = np.sort(selection[a_retirer], axis=1)
+        doublons = (triees[:, 1:] == triees[:, :-1]).any(axis=1)
+        a_retirer = a_retirer[doublons]
+        if not len(a_retirer):
+            return selection
+        selection[a_retirer] = rng.integers(0, nb_banque, size=(len(a_retirer), nb_questions), dtype=np.int64)
+
+
+def _selection_par_tri(rng, nb_banque, nb_eleves, nb_questions):
+    """
+    Tire les questions de chaque sujet en triant des clés aléatoires, par blocs
+    de lignes. Adapté aux petites banques.
+    """
+    selection = np.empty((nb_eleves, nb_questions), dtype=np.int64)
+    lignes_par_bloc = max(1, TAILLE_BLOC_CLES // nb_banque)
+
+    for debut in range(0, nb_eleves, lignes_par_bloc):
+        fin = min(debut + lignes_par_bloc, nb_eleves)
+        cles = rng.random((fin - debut, nb_banque))
+        # Les nb_questions plus petites clés, rangées par ordre croissant
+        premieres = np.argpartition(cles, nb_questions - 1, axis=1)[:, :nb_questions]
+        ordre = np.argsort(np.take_along_axis(cles, premieres, axis=1), axis=1)
+        selection[debut:fin] = np.take_along_axis(premieres, ordre, axis=1)
+
+    return selection
+
+
+def generer_lot(solutions, nb_eleves, nb_questions, graine, selection=None):
+    """
+    Tire tous les sujets d'une classe en une seule fois.
+
+    Args:
+        solutions: Solutions (1-4) des questions de la banque
+        nb_eleves (int): Nombre de sujets à tirer
+        nb_questions (int): Nombre de questions par sujet
+        graine (int): Graine pour la génération aléatoire
+        selection: Questions de chaque sujet, bout à bout, déjà choisies (par
+            exemple par selection_equilibree), ou None pour un tirage uniforme
+
+    Returns:
+        tuple: (matrice de sélection nb_eleves × nb_questions des indices de
+               questions dans la banque,
+               tenseur nb_eleves × nb_questions × 4 des permutations de réponses,
+               matrice nb_eleves × nb_questions des bonnes réponses (0-3))
+    """
+    solutions = np.asarray(solutions, dtype=np.int8)
+    nb_banque = len(solutions)
+    rng = _rng(graine)
+
+    if selection is not None:
+        # Ordre des questions mélangé dans chaque sujet
+        selection = np.asarray(selection, dtype=np.int64).reshape(nb_eleves, nb_questions)
+        ordre = np.argsort(rng.random((nb_eleves, nb_questions)), axis=1)
+        selection = np.take_along_axis(selection, ordre, axis=1)
+    elif nb_questions * 4 <= nb_banque:
+        selection = _selection_par_rejet(rng, nb_banque, nb_eleves, nb_questions)
+    else:
+        selection = _selection_par_tri(rng, nb_banque, nb_eleves, nb_questions)
+
+    permutations = np.argsort(rng.random((nb_eleves, nb_questions, NB_REPONSES)), axis=2).astype(np.int8)
+
+    # Position de la bonne réponse après mélange
+    solutions_originales = solutions[selection] - 1
+    cles = np.argmax(permutations == solutions_originales[..., None], axis=2).astype(np.int8)
+
+    return selection, permutations, cles
+
+
+class LotSujets(Mapping):
+    """
+    Sujets tirés par le moteur NumPy, conservés sous forme de tableaux d'entiers.
+
+    Se parcourt comme les SujetsCompacts du moteur Python (voir sujets_compacts) :
+    le texte d'un sujet n'est construit qu'au moment où un rendu le demande.
+    """
+    def __init__(self, generateur, selection, permutations, cles, numeros=None):
+        """
+        Args:
+            generateur (GenerateurQCM): Générateur dont la banque fournit le texte
+            selection (numpy.ndarray): Matrice de sélection des questions
+            permutations (numpy.ndarray): Tenseur des permutations de réponses
+            cles (numpy.ndarray): Matrice des bonnes réponses (0-3)
+            numeros (Sequence): Numéros des sujets conservés, triés (par défaut
+                tous les sujets tirés)
+        """
+        self.generateur = generateur
+        self.selection = selection
+        self.permutations = permutations
+        self.cles = cles
+        self.numeros = range(len(selection)) if numeros is None else numeros
+
+    def __len__(self):
+        return len(self.numeros)
+
+    def __iter__(self):
+        return iter(self.numeros)
+
+    def __getitem__(self, num_sujet):
+        rang = bisect_left(self.numeros, num_sujet)
+        if rang == len(self.numeros) or self.numeros[rang] != num_sujet:
+            raise KeyError(num_sujet)
+
+        questions_sujet, _ = self.generateur.construire_sujet(
+            self.selection[num_sujet].tolist(),
+            self.permutations[num_sujet].tolist()
+        )
+        reponses_correctes = [chr(97 + c) for c in self.cles[num_sujet].tolist()]
+        return questions_sujet, reponses_correctes
+
+    def lettres(self):
+        """
+        Bonnes réponses des sujets conservés sous forme de lettres.
+
+        Returns:
+            numpy.ndarray: Matrice (nombre de sujets) × nb_questions d'octets 'a'-'d'
+        """
+        return (self.cles[np.asarray(self.numeros)] + ord('a')).astype(np.uint8)
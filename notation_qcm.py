@@ -0,0 +1,294 @@
+import csv
+import json
+import os
+from itertools import islice
+
+import numpy as np
+
+from cles_qcm import FichierCles
+
+# Code d'une question sans réponse (ou avec une réponse illisible)
+SANS_REPONSE = 255
+
+# Nombre de copies notées à la fois
+TAILLE_LOT = 10000
+
+# Conversion des caractères de réponse en codes 0-3
+_CODES = np.full(256, SANS_REPONSE, dtype=np.uint8)
+for _i, _lettre in enumerate('abcd'):
+    _CODES[ord(_lettre)] = _i
+    _CODES[ord(_lettre.upper())] = _i
+
+
+def _lire_copie(copie, numero_ligne):
+    """
+    Extrait une copie d'une ligne du fichier de réponses.
+
+    Args:
+        copie (dict): Ligne lue (CSV ou JSON)
+        numero_ligne (int): Numéro de la ligne, identifiant par défaut de l'élève
+
+    Returns:
+        tuple: (identifiant de l'élève, numéro du sujet, réponses)
+
+    Raises:
+        ValueError: Si la ligne est mal formée
+    """
+    if not isinstance(copie, dict):
+        raise ValueError("objet attendu")
+    for cle in ('sujet', 'reponses'):
+        if copie.get(cle) is None:
+            raise ValueError(f"valeur {cle} manquante")
+    if not isinstance(copie['reponses'], str):
+        raise ValueError(f"réponses invalides {copie['reponses']!r}")
+    try:
+        sujet = int(copie['sujet'])
+    except (TypeError, ValueError):
+        raise ValueError(f"sujet invalide {copie['sujet']!r}") from None
+    return copie.get('eleve') or numero_ligne, sujet, copie['reponses']
+
+
+def lire_reponses(chemin, erreurs=None):
+    """
+    Lit les réponses des élèves au fil de l'eau.
+
+    Le fichier est au format CSV (colonnes sujet, reponses et éventuellement
+    eleve) ou JSON Lines (un objet par ligne avec les mêmes clés), selon son
+    extension. Les réponses sont une suite de lettres a-d, les espaces étant
+    ignorés ; tout autre caractère (par exemple '-') marque une question sans
+    réponse. Une ligne mal formée est ignorée et signalée dans `erreurs`.
+
+    Args:
+        chemin (str): Chemin du fichier de réponses
+        erreurs (list): Liste de tuples (numéro de ligne, message), complétée
+            avec les lignes ignorées
+
+    Yields:
+        tuple: (identifiant de l'élève, numéro du sujet, réponses)
+    """
+    if erreurs is None:
+        erreurs = []
+
+    with open(chemin, 'r', encoding='utf-8', newline='') as f:
+        if os.path.splitext(chemin)[1].lower() in ('.jsonl', '.json'):
+            lignes = ((numero_ligne, ligne) for numero_ligne, ligne in enumerate(f, start=1) if ligne.strip())
+            lire = json.loads
+        else:
+            lignes = enumerate(csv.DictReader(f), start=2)
+            lire = None
+
+        for numero_ligne, ligne in lignes:
+            try:
+                yield _lire_copie(lire(ligne) if lire else ligne, numero_ligne)
+            except ValueError as e:
+                erreurs.append((f"ligne {numero_ligne}", str(e)))
+
+
+class Notation:
+    """
+    Notation automatique des copies à partir des clés de correction.
+
+    Les copies sont notées par lots, sous forme de matrices. Les statistiques
+    par question de la banque (taux de réussite et discrimination) sont
+    accumulées au fur et à mesure, sans conserver les copies.
+    """
+    def __init__(self, cles):
+        """
+        Args:
+            cles (FichierCles): Clés de correction des sujets
+        """
+        self.cles = cles
+        self.nb_questions = cles.nb_questions
+
+        enregistrements = np.frombuffer(
+            cles.enregistrements,
+            dtype=np.dtype([('numero', '<i8'), ('cles', 'u1', (cles.nb_questions,))])
+        )
+        self._numeros = enregistrements['numero']
+        self._cles = enregistrements['cles']
+        self._ordre = np.argsort(self._numeros, kind='stable')
+
+        # Questions de la banque de chaque sujet, dans l'ordre des enregistrements :
+        # chaque enregistrement est retrouvé dans l'index par son numéro de sujet
+        numeros_index = np.frombuffer(cles.index.numeros, dtype=np.int64)
+        questions_index = np.frombuffer(cles.index.indices, dtype=np.uint32).reshape(-1, cles.nb_questions)
+        ordre_index = np.argsort(numeros_index, kind='stable')
+        lignes = np.zeros(len(self._numeros), dtype=np.int64)
+        if len(ordre_index):
+            positions = np.searchsorted(numeros_index, self._numeros, sorter=ordre_index)
+            lignes = ordre_index[np.minimum(positions, len(ordre_index) - 1)]
+        if len(self._numeros) and (not len(ordre_index) or (numeros_index[lignes] != self._numeros).any()):
+            raise ValueError(f"Index croisé incomplet dans le fichier de clés : {cles.chemin}")
+        self._questions = questions_index[lignes]
+
+        # Accumulateurs par question de la banque : présentations, réussites,
+        # somme, somme des carrés et somme des produits du score restant (score
+        # total moins la question elle-même)
+        nb_banque = cles.index.nb_questions_banque
+        self.presentations = np.zeros(nb_banque)
+        self.reussites = np.zeros(nb_banque)
+        self._somme_reste = np.zeros(nb_banque)
+        self._somme_reste_carre = np.zeros(nb_banque)
+        self._somme_produit = np.zeros(nb_banque)
+
+        self.nb_copies = 0
+        self.erreurs = []
+
+    def _lignes(self, sujets):
+        """
+        Rangs des sujets dans le fichier de clés.
+
+        Args:
+            sujets (numpy.ndarray): Numéros des sujets
+
+        Returns:
+            numpy.ndarray: Rangs, ou -1 pour un sujet inconnu
+        """
+        if not len(self._ordre):
+            return np.full(len(sujets), -1)
+
+        positions = np.searchsorted(self._numeros, sujets, sorter=self._ordre)
+        positions = np.minimum(positions, len(self._ordre) - 1)
+        lignes = self._ordre[positions]
+        return np.where(self._numeros[lignes] == sujets, lignes, -1)
+
+    def noter_lot(self, copies):
+        """
+        Note un lot de copies.
+
+        Args:
+            copies (list): Tuples (élève, numéro du sujet, réponses)
+
+        Returns:
+            list: Tuples (élève, numéro du sujet, score) des copies notées
+        """
+        sujets = np.array([sujet for _, sujet, _ in copies], dtype=np.int64)
+        lignes = self._lignes(sujets)
+
+        valides = lignes >= 0
+        for (eleve, sujet, _), valide in zip(copies, valides):
+            if not valide:
+                self.erreurs.append((eleve, f"sujet {sujet} inconnu"))
+        if not valides.any():
+            return []
+
+        copies = [copie for copie, valide in zip(copies, valides) if valide]
+        lignes = lignes[valides]
+
+        # Réponses ramenées à une longueur fixe puis converties en codes
+        k = self.nb_questions
+        texte = b''.join(
+            reponses.replace(' ', '').encode('ascii', 'replace')[:k].ljust(k, b'-')
+            for _, _, reponses in copies
+        )
+        reponses = _CODES[np.frombuffer(texte, dtype=np.uint8)].reshape(-1, k)
+
+        justes = reponses == self._cles[lignes]
+        scores = justes.sum(axis=1)
+
+        # Statistiques par question de la banque
+        questions = self._questions[lignes].ravel()
+        x = justes.ravel().astype(np.float64)
+        reste = (scores[:, None] - justes).ravel().astype(np.float64)
+        nb_banque = len(self.presentations)
+        self.presentations += np.bincount(questions, minlength=nb_banque)
+        self.reussites += np.bincount(questions, weights=x, minlength=nb_banque)
+        self._somme_reste += np.bincount(questions, weights=reste, minlength=nb_banque)
+        self._somme_reste_carre += np.bincount(questions, weights=reste * reste, minlength=nb_banque)
+        self._somme_produit += np.bincount(questions, weights=x * reste, minlength=nb_banque)
+
+        self.nb_copies += len(copies)
+        return [(eleve, sujet, int(score)) for (eleve, sujet, _), score in zip(copies, scores)]
+
+    def noter(self, copies, taille_lot=TAILLE_LOT):
+        """
+        Note un flux de copies, lot par lot.
+
+        Args:
+            copies: Itérable de tuples (élève, numéro du sujet, réponses)
+            taille_lot (int): Nombre de copies notées à la fois
+
+        Yields:
+            tuple: (élève, numéro du sujet, score)
+        """
+        copies = iter(copies)
+        while True:
+            lot = list(islice(copies, taille_lot))
+            if not lot:
+                return
+            yield from self.noter_lot(lot)
+
+    def statistiques(self):
+        """
+        Statistiques des questions de la banque présentées au moins une fois.
+
+        La difficulté est le taux de réussite ; la discrimination est la
+        corrélation (point-bisériale) entre la réussite à la question et le
+        score obtenu aux autres questions.
+
+        Les questions sont désignées comme dans les informations pour le
+        correcteur : par leur indice dans la banque, ou par leur identifiant
+        dans la base pour une banque SQLite.
+
+        Returns:
+            list: Dictionnaires (question, presentations, taux_reussite, discrimination)
+        """
+        n = self.presentations
+        with np.errstate(divide='ignore', invalid='ignore'):
+            taux = self.reussites / n
+            covariance = n * self._somme_produit - self.reussites * self._somme_reste
+            variance_x = n * self.reussites - self.reussites ** 2
+            variance_y = n * self._somme_reste_carre - self._somme_reste ** 2
+            discrimination = covariance / np.sqrt(variance_x * variance_y)
+
+        return [
+            {
+                'question': self.cles.identifiant(int(q)),
+                'presentations': int(n[q]),
+                'taux_reussite': round(float(taux[q]), 4),
+                'discrimination': round(float(discrimination[q]), 4) if np.isfinite(discrimination[q]) else None
+            }
+            for q in np.flatnonzero(n)
+        ]
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Notation automatique des copies de QCM')
+    parser.add_argument('fichier_cles', help='Fichier de clés de correction (qcm_cles.bin)')
+    parser.add_argument('fichier_reponses', help='Réponses des élèves (CSV ou JSON Lines)')
+    parser.add_argument('--scores', default='qcm_scores.csv', help='Fichier des scores par élève')
+    parser.add_argument('--statistiques', default='qcm_statistiques.csv',
+                        help='Fichier des statistiques par question de la banque')
+    parser.add_argument('--taille-lot', type=int, default=TAILLE_LOT, help='Nombre de copies notées à la fois')
+
+    args = parser.parse_args()
+
+    try:
+        notation = Notation(FichierCles(args.fichier_cles))
+
+        # Les scores sont écrits au fil de la notation
+        total = 0
+        with open(args.scores, 'w', encoding='utf-8', newline='') as f:
+            ecrivain = csv.writer(f)
+            ecrivain.writerow(['eleve', 'sujet', 'score', 'sur'])
+            for eleve, sujet, score in notation.noter(lire_reponses(args.fichier_reponses, notation.erreurs),
+                                                        args.taille_lot):
+                ecrivain.writerow([eleve, sujet, score, notation.nb_questions])
+                total += score
+
+        with open(args.statistiques, 'w', encoding='utf-8', newline='') as f:
+            ecrivain = csv.DictWriter(f, fieldnames=['question', 'presentations', 'taux_reussite', 'discrimination'])
+            ecrivain.writeheader()
+            ecrivain.writerows(notation.statistiques())
+
+        for eleve, message in notation.erreurs:
+            print(f"Avertissement : copie {eleve} : {message}")
+
+        if notation.nb_copies:
+            print(f"{notation.nb_copies} copies notées, moyenne {total / notation.nb_copies:.2f} / {notation.nb_questions}")
+        print(f"Fichiers générés : {args.scores} et {args.statistiques}")
+
+    except Exception as e:
+        print(f"Erreur : {e}")
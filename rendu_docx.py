@@ -0,0 +1,245 @@
+"""
+Rendu DOCX avec python-docx : le document est construit en mémoire puis
+enregistré.
+"""
+from docx import Document
+from docx.enum.section import WD_ORIENT, WD_SECTION
+from docx.enum.text import WD_ALIGN_PARAGRAPH
+from docx.oxml import OxmlElement
+from docx.oxml.ns import qn
+from docx.shared import Cm, Inches, Pt
+
+# Page Letter en paysage, comme les sections du moteur DOCX rapide
+LARGEUR_PAYSAGE, HAUTEUR_PAYSAGE = Inches(11), Inches(8.5)
+
+
+def _mettre_en_paysage(section):
+    """
+    Met une section en paysage sur une page Letter.
+
+    Les dimensions sont fixées explicitement : une nouvelle section hérite
+    de celles de la précédente, qui sont peut-être déjà en paysage.
+
+    Args:
+        section (docx.section.Section): Section à modifier
+    """
+    section.orientation = WD_ORIENT.LANDSCAPE
+    section.page_width = LARGEUR_PAYSAGE
+    section.page_height = HAUTEUR_PAYSAGE
+
+
+def _definir_colonnes(section, nombre):
+    """
+    Définit le nombre de colonnes d'une section python-docx.
+
+    python-docx n'expose pas cette propriété : on modifie directement
+    l'élément w:cols de la section.
+
+    Args:
+        section (docx.section.Section): Section à modifier
+        nombre (int): Nombre de colonnes
+    """
+    colonnes = section._sectPr.find(qn('w:cols'))
+    if colonnes is None:
+        colonnes = OxmlElement('w:cols')
+        section._sectPr.append(colonnes)
+    if nombre > 1:
+        colonnes.set(qn('w:num'), str(nombre))
+    else:
+        colonnes.attrib.pop(qn('w:num'), None)
+    colonnes.set(qn('w:space'), '720')
+
+
+def construire_sujets(generateur, sujets):
+    """
+    Construit le document contenant tous les sujets.
+
+    Args:
+        generateur (GenerateurQCM): Générateur des sujets
+        sujets: Couples (numéro, sujet), par exemple issus de GenerateurQCM.iterer_sujets
+
+    Returns:
+        Document: Document construit
+    """
+    document = Document()
+
+    # Définir la mise en page : paysage, marges réduites
+    section = document.sections[0]
+    _mettre_en_paysage(section)
+
+    # Réduire les marges
+    section.left_margin = Cm(1.5)
+    section.right_margin = Cm(1.5)
+    section.top_margin = Cm(1.5)
+    section.bottom_margin = Cm(1.5)
+
+    # Créer les sujets
+    premier = True
+    for num_sujet, (questions, _) in sujets:
+        # Chaque nouveau sujet commence sur une nouvelle page, dans une
+        # section à une colonne qui termine celle des questions précédentes
+        if not premier:
+            section = document.add_section(WD_SECTION.NEW_PAGE)
+            _definir_colonnes(section, 1)
+            section.left_margin = Cm(1.5)
+            section.right_margin = Cm(1.5)
+        premier = False
+
+        # Titre
+        titre = document.add_paragraph()
+        titre.alignment = WD_ALIGN_PARAGRAPH.CENTER
+        titre_run = titre.add_run(f"SUJET {num_sujet}")
+        titre_run.bold = True
+        titre_run.font.size = Pt(16)
+
+        # Champ Nom/Prénom
+        nom = document.add_paragraph()
+        nom.add_run("Nom prénom : _______________________________")
+
+        # Consignes
+        consignes = document.add_paragraph()
+        consignes.add_run("CONSIGNES :\n").bold = True
+        consignes.add_run("- Entourez la lettre correspondant à la bonne réponse sur le tableau de réponses ci-dessous.\n")
+        consignes.add_run("- Une seule réponse est correcte pour chaque question.\n")
+        consignes.add_run("- Toute rature ou correction sur le tableau sera considérée comme une erreur.")
+
+        # Tableau de réponses
+        reponses_titre = document.add_paragraph()
+        reponses_titre.add_run(f"Tableau de réponses - Sujet {num_sujet}").bold = True
+
+        # Ajouter les numéros de question pour le tableau de réponses
+        tableau_reponses = document.add_paragraph()
+        for i in range(1, generateur.nb_questions + 1):
+            if i == generateur.nb_questions // 2 + 1:
+                tableau_reponses.add_run("\n")  # Saut de ligne à la moitié
+            tableau_reponses.add_run(f"{i} ")
+
+        document.add_paragraph()  # Espace
+
+        # Créer une section à deux colonnes pour les questions
+        section = document.add_section(WD_SECTION.NEW_PAGE)
+        _mettre_en_paysage(section)
+        section.left_margin = Cm(1.5)
+        section.right_margin = Cm(1.5)
+        section.top_margin = Cm(1.5)
+        section.bottom_margin = Cm(1.5)
+
+        # Configurer 2 colonnes
+        section.left_margin = Inches(0.5)
+        section.right_margin = Inches(0.5)
+        _definir_colonnes(section, 2)
+
+        # Questions et réponses
+        for q in questions:
+            question_para = document.add_paragraph()
+            question_para.add_run(f"Question {q['numero']} : {q['question']}").bold = True
+
+            for j, reponse in enumerate(q['reponses']):
+                lettre = chr(97 + j)  # 'a', 'b', 'c' ou 'd'
+                reponse_para = document.add_paragraph()
+                reponse_para.add_run(f"{lettre}) {reponse}")
+
+            document.add_paragraph()  # Espace entre les questions
+
+    return document
+
+
+def construire_corrections(generateur, sujets):
+    """
+    Construit le document de correction.
+
+    Args:
+        generateur (GenerateurQCM): Générateur des sujets, dont le suivi des
+            questions est lu une fois tous les sujets parcourus
+        sujets: Couples (numéro, sujet), par exemple issus de GenerateurQCM.iterer_sujets
+
+    Returns:
+        Document: Document construit
+    """
+    document = Document()
+
+    # Titre
+    titre = document.add_paragraph()
+    titre.alignment = WD_ALIGN_PARAGRAPH.CENTER
+    titre_run = titre.add_run("FEUILLE DE CORRECTION")
+    titre_run.bold = True
+    titre_run.font.size = Pt(16)
+
+    # Écrire les corrections pour chaque sujet
+    for num_sujet, (_, reponses) in sujets:
+        # Titre du sujet
+        sujet_titre = document.add_paragraph()
+        sujet_titre.add_run(f"Sujet {num_sujet}").bold = True
+
+        # Écrire les réponses
+        reponses_para = document.add_paragraph()
+        for i in range(0, len(reponses), 5):
+            groupe = reponses[i:i+5]
+            reponses_para.add_run(''.join(groupe) + ' ')
+
+        document.add_paragraph()  # Espace entre les sujets
+
+    # Ajouter un saut de page pour les informations supplémentaires
+    document.add_page_break()
+
+    # Titre pour les informations supplémentaires
+    titre_info = document.add_paragraph()
+    titre_info.alignment = WD_ALIGN_PARAGRAPH.CENTER
+    titre_info_run = titre_info.add_run("INFORMATIONS SUPPLÉMENTAIRES POUR LE CORRECTEUR")
+    titre_info_run.bold = True
+    titre_info_run.font.size = Pt(14)
+
+    document.add_paragraph()  # Espace
+
+    # Sous-titre pour les questions par sujet
+    sous_titre1 = document.add_paragraph()
+    sous_titre1.add_run("Questions initiales intégrées dans chaque sujet :").bold = True
+
+    # Quelles questions initiales ont été intégrées dans chaque sujet
+    for num_sujet, indices in generateur.questions_par_sujet.items():
+        indices_str = ', '.join(str(generateur.numero_question(i)) for i in indices)
+        document.add_paragraph(f"Sujet {num_sujet} : questions {indices_str}")
+
+    document.add_paragraph()  # Espace
+
+    # Sous-titre pour les sujets par question
+    sous_titre2 = document.add_paragraph()
+    sous_titre2.add_run("Sujets dans lesquels apparaît chaque question initiale :").bold = True
+
+    # Dans quels sujets apparaît chaque question initiale
+    for num_question, sujets_indices in generateur.sujets_par_question.items():
+        if sujets_indices:  # Si la question apparaît dans au moins un sujet
+            sujets_str = ', '.join(str(i) for i in sujets_indices)
+            document.add_paragraph(f"Question {generateur.numero_question(num_question)} : sujets {sujets_str}")
+
+    return document
+
+
+def ecrire_sujets(generateur, sujets, nom_fichier):
+    """
+    Écrit le fichier DOCX des sujets.
+
+    Args:
+        generateur (GenerateurQCM): Générateur des sujets
+        sujets: Couples (numéro, sujet), par exemple issus de GenerateurQCM.iterer_sujets
+        nom_fichier (str): Nom du fichier à générer
+    """
+    with generateur.metriques.etape('construction du document'):
+        document = construire_sujets(generateur, sujets)
+    with generateur.metriques.etape('enregistrement du document'):
+        document.save(nom_fichier)
+
+
+def ecrire_corrections(generateur, sujets, nom_fichier):
+    """
+    Écrit le fichier DOCX des corrections.
+
+    Args:
+        generateur (GenerateurQCM): Générateur des sujets
+        sujets: Couples (numéro, sujet), par exemple issus de GenerateurQCM.iterer_sujets
+        nom_fichier (str): Nom du fichier à générer
+    """
+    with generateur.metriques.etape('construction du document'):
+        document = construire_corrections(generateur, sujets)
+    with generateur.metriques.etape('enregistrement du document'):
+        document.save(nom_fichier)
@@ -0,0 +1,437 @@
+"""
+Rendu PDF natif : les pages sont écrites directement dans le fichier, au fil
+des sujets, sans bibliothèque externe.
+
+La mise en page reprend celle des rendus DOCX (rendu_docx) : pour chaque
+sujet, une page d'en-tête (titre, consignes, tableau de réponses) puis les
+questions sur deux colonnes, en paysage sur une page Letter. Les polices
+standard Helvetica (encodage WinAnsi) ne sont pas incorporées : elles sont
+déclarées une seule fois et partagées par toutes les pages. Chaque page est écrite dès qu'elle
+est remplie ; seule la position de chaque objet reste en mémoire.
+"""
+import unicodedata
+import zlib
+from array import array
+from functools import lru_cache
+
+# Page Letter, en points, comme les rendus DOCX
+LARGEUR_PAGE = 612.0
+HAUTEUR_PAGE = 792.0
+
+# Marges et espacement des colonnes, comme les sections du rendu DOCX :
+# 1,5 cm pour l'en-tête et les corrections, 0,5 pouce pour les questions
+MARGE_EN_TETE = 42.52
+MARGE_QUESTIONS = 36.0
+ESPACE_COLONNES = 36.0
+
+# Hauteur d'une ligne (en multiple de la taille de police) et espace après
+# chaque paragraphe, en points
+INTERLIGNE = 1.2
+ESPACE_PARAGRAPHE = 4.0
+
+# Polices standard, par nom de ressource
+NORMAL = 'F1'
+GRAS = 'F2'
+POLICES = {NORMAL: 'Helvetica', GRAS: 'Helvetica-Bold'}
+
+# Chasses des caractères ASCII 32 à 126 (millièmes de la taille de police),
+# d'après les métriques Adobe des polices standard
+CHASSES = {
+    NORMAL: array('H', [
+        278, 278, 355, 556, 556, 889, 667, 191, 333, 333, 389, 584, 278, 333, 278, 278,
+        556, 556, 556, 556, 556, 556, 556, 556, 556, 556, 278, 278, 584, 584, 584, 556,
+        1015, 667, 667, 722, 722, 667, 611, 778, 722, 278, 500, 667, 556, 833, 722, 778,
+        667, 778, 722, 667, 611, 722, 667, 944, 667, 667, 611, 278, 278, 278, 469, 556,
+        333, 556, 556, 500, 556, 556, 278, 556, 556, 222, 222, 500, 222, 833, 556, 556,
+        556, 556, 333, 500, 278, 556, 500, 722, 500, 500, 500, 334, 260, 334, 584]),
+    GRAS: array('H', [
+        278, 333, 474, 556, 556, 889, 722, 238, 333, 333, 389, 584, 278, 333, 278, 278,
+        556, 556, 556, 556, 556, 556, 556, 556, 556, 556, 333, 333, 584, 584, 584, 611,
+        975, 722, 722, 722, 722, 667, 611, 778, 722, 278, 556, 722, 611, 833, 722, 778,
+        667, 778, 722, 667, 611, 722, 667, 944, 667, 667, 611, 333, 278, 333, 584, 556,
+        333, 556, 611, 556, 611, 556, 333, 611, 611, 278, 278, 556, 278, 889, 611, 611,
+        611, 611, 389, 556, 333, 611, 556, 778, 556, 556, 500, 389, 280, 389, 584]),
+}
+
+# Chasses (normal, gras) des autres caractères courants ; les lettres
+# accentuées prennent la chasse de leur lettre de base
+CHASSES_AUTRES = {
+    '\xa0': (278, 278), '«': (556, 556), '»': (556, 556), '°': (400, 400),
+    '‘': (222, 278), '’': (222, 278), '“': (333, 500), '”': (333, 500),
+    '–': (556, 556), '—': (1000, 1000), '…': (1000, 1000), '€': (556, 556), '•': (350, 350),
+    'œ': (944, 944), 'Œ': (1000, 1000), 'æ': (889, 889), 'Æ': (1000, 1000), 'ß': (611, 611),
+}
+
+# Catalogue, arbre des pages, polices et ressources partagées
+OBJET_CATALOGUE = 1
+OBJET_PAGES = 2
+OBJET_RESSOURCES = 5
+
+
+def _chasse(caractere, police):
+    """Chasse d'un caractère, en millièmes de la taille de police."""
+    code = ord(caractere)
+    if 32 <= code < 127:
+        return CHASSES[police][code - 32]
+    if caractere in CHASSES_AUTRES:
+        return CHASSES_AUTRES[caractere][police == GRAS]
+    base = ord(unicodedata.normalize('NFD', caractere)[0])
+    return CHASSES[police][base - 32] if 32 <= base < 127 else 556
+
+
+@lru_cache(maxsize=1 << 16)
+def _chasse_mot(mot, police):
+    """Chasse d'un mot : les mêmes mots reviennent dans tous les sujets."""
+    return sum(_chasse(c, police) for c in mot)
+
+
+def largeur_texte(texte, police, taille):
+    """
+    Largeur d'un texte sur une ligne.
+
+    Args:
+        texte (str): Texte
+        police (str): NORMAL ou GRAS
+        taille (float): Taille de police, en points
+
+    Returns:
+        float: Largeur en points
+    """
+    mots = texte.split(' ')
+    return (sum(_chasse_mot(mot, police) for mot in mots) + (len(mots) - 1) * CHASSES[police][0]) * taille / 1000
+
+
+@lru_cache(maxsize=1 << 16)
+def couper_lignes(texte, police, taille, largeur_max):
+    """
+    Répartit un texte en lignes d'une largeur maximale.
+
+    Les mêmes énoncés et réponses reviennent d'un sujet à l'autre : le
+    découpage est mémorisé.
+
+    Args:
+        texte (str): Texte d'un paragraphe
+        police (str): NORMAL ou GRAS
+        taille (float): Taille de police, en points
+        largeur_max (float): Largeur disponible, en points
+
+    Returns:
+        tuple: Lignes du paragraphe (au moins une, éventuellement vide)
+    """
+    # Largeurs en millièmes de la taille de police
+    limite = largeur_max * 1000 / taille
+    espace = CHASSES[police][0]
+
+    lignes = []
+    for morceau in texte.split('\n'):
+        mots_ligne = []
+        largeur = 0
+        for mot in morceau.split(' '):
+            chasse = _chasse_mot(mot, police)
+            if not mots_ligne or largeur + espace + chasse > limite:
+                if mots_ligne:
+                    lignes.append(' '.join(mots_ligne))
+                mots_ligne = [mot]
+                largeur = chasse
+                # Mot plus large qu'une ligne : coupé entre deux caractères
+                if chasse > limite:
+                    mots_ligne, largeur = [''], 0
+                    for caractere in mot:
+                        if mots_ligne[0] and largeur + _chasse(caractere, police) > limite:
+                            lignes.append(mots_ligne[0])
+                            mots_ligne, largeur = [''], 0
+                        mots_ligne[0] += caractere
+                        largeur += _chasse(caractere, police)
+            else:
+                mots_ligne.append(mot)
+                largeur += espace + chasse
+        lignes.append(' '.join(mots_ligne))
+    return tuple(lignes)
+
+
+def _chaine(texte):
+    """Chaîne littérale PDF d'un texte, encodé en WinAnsi (cp1252)."""
+    donnees = texte.encode('cp1252', 'replace')
+    return b'(' + donnees.replace(b'\\', b'\\\\').replace(b'(', b'\\(').replace(b')', b'\\)') + b')'
+
+
+class EcriturePDF:
+    """
+    Fichier PDF écrit au fil de l'eau : chaque objet est écrit dès qu'il est
+    complet, et seule sa position est conservée pour la table des références.
+    """
+    def __init__(self, nom_fichier):
+        """
+        Args:
+            nom_fichier (str): Nom du fichier à générer
+        """
+        self.fichier = open(nom_fichier, 'wb')
+        self.position = 0
+        self.positions = array('Q', [0] * OBJET_RESSOURCES)
+        self.pages = array('Q')
+
+        self._ecrire(b'%PDF-1.4\n%\xe2\xe3\xcf\xd3\n')
+        polices = []
+        for numero, (nom, police) in enumerate(POLICES.items(), start=OBJET_PAGES + 1):
+            self._objet(numero, b'<< /Type /Font /Subtype /Type1 /BaseFont /%s /Encoding /WinAnsiEncoding >>'
+                        % police.encode())
+            polices.append(b'/%s %d 0 R' % (nom.encode(), numero))
+        self._objet(OBJET_RESSOURCES, b'<< /Font << %s >> >>' % b' '.join(polices))
+
+    def _ecrire(self, donnees):
+        self.fichier.write(donnees)
+        self.position += len(donnees)
+
+    def _nouvel_objet(self):
+        """Réserve un numéro d'objet."""
+        self.positions.append(0)
+        return len(self.positions)
+
+    def _objet(self, numero, contenu):
+        """Écrit un objet complet."""
+        self.positions[numero - 1] = self.position
+        self._ecrire(b'%d 0 obj\n%s\nendobj\n' % (numero, contenu))
+
+    def ajouter_page(self, largeur, hauteur, operations):
+        """
+        Écrit une page et son contenu compressé.
+
+        Args:
+            largeur (float): Largeur de la page, en points
+            hauteur (float): Hauteur de la page, en points
+            operations (list): Opérations de dessin de la page
+        """
+        contenu = zlib.compress(b'\n'.join(operations))
+        numero_contenu = self._nouvel_objet()
+        self._objet(numero_contenu, b'<< /Length %d /Filter /FlateDecode >>\nstream\n%s\nendstream'
+                    % (len(contenu), contenu))
+
+        numero_page = self._nouvel_objet()
+        self._objet(numero_page, b'<< /Type /Page /Parent %d 0 R /MediaBox [0 0 %.2f %.2f] /Resources %d 0 R '
+                    b'/Contents %d 0 R >>' % (OBJET_PAGES, largeur, hauteur, OBJET_RESSOURCES, numero_contenu))
+        self.pages.append(numero_page)
+
+    def fermer(self):
+        """Écrit l'arbre des pages, le catalogue et la table des références, puis ferme le fichier."""
+        try:
+            kids = b' '.join(b'%d 0 R' % numero for numero in self.pages)
+            self._objet(OBJET_PAGES, b'<< /Type /Pages /Kids [%s] /Count %d >>' % (kids, len(self.pages)))
+            self._objet(OBJET_CATALOGUE, b'<< /Type /Catalog /Pages %d 0 R >>' % OBJET_PAGES)
+
+            debut_table = self.position
+            self._ecrire(b'xref\n0 %d\n0000000000 65535 f \n' % (len(self.positions) + 1))
+            for position in self.positions:
+                self._ecrire(b'%010d 00000 n \n' % position)
+            self._ecrire(b'trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n'
+                         % (len(self.positions) + 1, OBJET_CATALOGUE, debut_table))
+        finally:
+            self.fichier.close()
+
+
+class Flux:
+    """
+    Texte continu réparti en colonnes puis en pages.
+    """
+    def __init__(self, pdf, largeur, hauteur, marge, nb_colonnes=1):
+        """
+        Args:
+            pdf (EcriturePDF): Fichier dans lequel les pages sont écrites
+            largeur (float): Largeur des pages, en points
+            hauteur (float): Hauteur des pages, en points
+            marge (float): Marges, en points
+            nb_colonnes (int): Nombre de colonnes
+        """
+        self.pdf = pdf
+        self.largeur = largeur
+        self.hauteur = hauteur
+        self.marge = marge
+        self.nb_colonnes = nb_colonnes
+        self.largeur_colonne = (largeur - 2 * marge - (nb_colonnes - 1) * ESPACE_COLONNES) / nb_colonnes
+        self.operations = None
+        self.colonne = 0
+        self.y = 0
+
+    @property
+    def x(self):
+        """Bord gauche de la colonne en cours."""
+        return self.marge + self.colonne * (self.largeur_colonne + ESPACE_COLONNES)
+
+    @property
+    def haut(self):
+        """Position du haut des colonnes."""
+        return self.hauteur - self.marge
+
+    def nouvelle_page(self):
+        """Termine la page en cours et en commence une nouvelle."""
+        self.terminer()
+        self.operations = []
+        self.colonne = 0
+        self.y = self.haut
+
+    def _colonne_suivante(self):
+        if self.colonne + 1 < self.nb_colonnes:
+            self.colonne += 1
+            self.y = self.haut
+        else:
+            self.nouvelle_page()
+
+    def reserver(self, hauteur):
+        """
+        Passe à la colonne suivante si la hauteur demandée ne tient pas dans
+        la colonne en cours (et tiendrait dans une colonne vide).
+
+        Args:
+            hauteur (float): Hauteur nécessaire, en points
+        """
+        if self.operations is None:
+            self.nouvelle_page()
+        elif hauteur > self.y - self.marge and self.y < self.haut and hauteur <= self.haut - self.marge:
+            self._colonne_suivante()
+
+    def ecrire(self, paragraphes, centre=False):
+        """
+        Écrit des paragraphes, gardés dans une même colonne s'ils y tiennent.
+
+        Args:
+            paragraphes (list): Triplets (texte, police, taille)
+            centre (bool): Centrer les lignes dans la colonne
+        """
+        blocs = [(couper_lignes(texte, police, taille, self.largeur_colonne), police, taille)
+                 for texte, police, taille in paragraphes]
+        self.reserver(sum(len(lignes) * taille * INTERLIGNE + ESPACE_PARAGRAPHE for lignes, _, taille in blocs))
+
+        for lignes, police, taille in blocs:
+            for ligne in lignes:
+                if taille * INTERLIGNE > self.y - self.marge:
+                    self._colonne_suivante()
+                self.y -= taille * INTERLIGNE
+                if ligne:
+                    x = self.x
+                    if centre:
+                        x += (self.largeur_colonne - largeur_texte(ligne, police, taille)) / 2
+                    self.texte(x, self.y + taille * 0.25, ligne, police, taille)
+            self.y -= ESPACE_PARAGRAPHE
+
+    def texte(self, x, y, texte, police, taille):
+        """Place un texte sur la page en cours (y : ligne de base)."""
+        self.operations.append(b'BT /%s %g Tf %.2f %.2f Td %s Tj ET'
+                               % (police.encode(), taille, x, y, _chaine(texte)))
+
+    def cadre(self, x, y, largeur, hauteur):
+        """Trace un rectangle sur la page en cours (x, y : coin inférieur gauche)."""
+        self.operations.append(b'%.2f %.2f %.2f %.2f re S' % (x, y, largeur, hauteur))
+
+    def terminer(self):
+        """Écrit la page en cours, s'il y en a une."""
+        if self.operations is not None:
+            self.pdf.ajouter_page(self.largeur, self.hauteur, self.operations)
+            self.operations = None
+
+
+def _tableau_reponses(flux, nb_questions):
+    """
+    Trace le tableau de réponses d'un sujet : une case par question, avec
+    son numéro et les lettres à entourer, sur deux rangées comme dans le
+    rendu DOCX.
+
+    Args:
+        flux (Flux): Flux de la page d'en-tête
+        nb_questions (int): Nombre de questions du sujet
+    """
+    moitie = nb_questions // 2
+    rangees = [range(1, moitie + 1), range(moitie + 1, nb_questions + 1)]
+    largeur_case = min(72.0, flux.largeur_colonne / max(len(rangee) for rangee in rangees))
+    hauteur_numero, hauteur_lettres = 16.0, 22.0
+
+    for rangee in rangees:
+        if not rangee:
+            continue
+        flux.reserver(hauteur_numero + hauteur_lettres + 8)
+        haut = flux.y
+        for colonne, numero in enumerate(rangee):
+            x = flux.x + colonne * largeur_case
+            flux.cadre(x, haut - hauteur_numero, largeur_case, hauteur_numero)
+            flux.cadre(x, haut - hauteur_numero - hauteur_lettres, largeur_case, hauteur_lettres)
+
+            etiquette = str(numero)
+            flux.texte(x + (largeur_case - largeur_texte(etiquette, GRAS, 10)) / 2, haut - 12, etiquette, GRAS, 10)
+            lettres = 'a   b   c   d'
+            flux.texte(x + (largeur_case - largeur_texte(lettres, NORMAL, 11)) / 2,
+                       haut - hauteur_numero - 15, lettres, NORMAL, 11)
+        flux.y = haut - hauteur_numero - hauteur_lettres - 8
+
+
+def ecrire_sujets(generateur, sujets, nom_fichier):
+    """
+    Écrit le fichier PDF des sujets.
+
+    Args:
+        generateur (GenerateurQCM): Générateur des sujets
+        sujets: Couples (numéro, sujet), par exemple issus de GenerateurQCM.iterer_sujets
+        nom_fichier (str): Nom du fichier à générer
+    """
+    pdf = EcriturePDF(nom_fichier)
+    try:
+        for num_sujet, (questions, _) in sujets:
+            # Page d'en-tête, à une colonne
+            en_tete = Flux(pdf, HAUTEUR_PAGE, LARGEUR_PAGE, MARGE_EN_TETE)
+            en_tete.ecrire([(f"SUJET {num_sujet}", GRAS, 16)], centre=True)
+            en_tete.ecrire([("Nom prénom : _______________________________", NORMAL, 11)])
+            en_tete.ecrire([
+                ("CONSIGNES :", GRAS, 11),
+                ("- Entourez la lettre correspondant à la bonne réponse sur le tableau de réponses ci-dessous.\n"
+                 "- Une seule réponse est correcte pour chaque question.\n"
+                 "- Toute rature ou correction sur le tableau sera considérée comme une erreur.", NORMAL, 11)
+            ])
+            en_tete.ecrire([(f"Tableau de réponses - Sujet {num_sujet}", GRAS, 11)])
+            _tableau_reponses(en_tete, generateur.nb_questions)
+            en_tete.terminer()
+
+            # Questions et réponses sur deux colonnes
+            corps = Flux(pdf, HAUTEUR_PAGE, LARGEUR_PAGE, MARGE_QUESTIONS, nb_colonnes=2)
+            for q in questions:
+                paragraphes = [(f"Question {q['numero']} : {q['question']}", GRAS, 11)]
+                paragraphes.extend((f"{chr(97 + j)}) {reponse}", NORMAL, 11) for j, reponse in enumerate(q['reponses']))
+                paragraphes.append(('', NORMAL, 11))  # Espace entre les questions
+                corps.ecrire(paragraphes)
+            corps.terminer()
+    finally:
+        pdf.fermer()
+
+
+def ecrire_corrections(generateur, sujets, nom_fichier):
+    """
+    Écrit le fichier PDF des corrections.
+
+    Args:
+        generateur (GenerateurQCM): Générateur des sujets, dont le suivi des
+            questions est lu une fois tous les sujets parcourus
+        sujets: Couples (numéro, sujet), par exemple issus de GenerateurQCM.iterer_sujets
+        nom_fichier (str): Nom du fichier à générer
+    """
+    pdf = EcriturePDF(nom_fichier)
+    try:
+        flux = Flux(pdf, LARGEUR_PAGE, HAUTEUR_PAGE, MARGE_EN_TETE)
+        flux.ecrire([("FEUILLE DE CORRECTION", GRAS, 16)], centre=True)
+
+        # Réponses de chaque sujet, par groupes de 5
+        for num_sujet, (_, reponses) in sujets:
+            groupes = ' '.join(''.join(reponses[i:i + 5]) for i in range(0, len(reponses), 5))
+            flux.ecrire([(f"Sujet {num_sujet}", GRAS, 11), (groupes, NORMAL, 11)])
+
+        # Informations supplémentaires, sur une nouvelle page
+        flux.nouvelle_page()
+        flux.ecrire([("INFORMATIONS SUPPLÉMENTAIRES POUR LE CORRECTEUR", GRAS, 14), ('', NORMAL, 11)], centre=True)
+
+        flux.ecrire([("Questions initiales intégrées dans chaque sujet :", GRAS, 11)])
+        for num_sujet, indices in generateur.questions_par_sujet.items():
+            flux.ecrire([(f"Sujet {num_sujet} : questions {', '.join(str(generateur.numero_question(i)) for i in indices)}", NORMAL, 11)])
+
+        flux.ecrire([('', NORMAL, 11), ("Sujets dans lesquels apparaît chaque question initiale :", GRAS, 11)])
+        for num_question, sujets_indices in generateur.sujets_par_question.items():
+            if sujets_indices:  # Si la question apparaît dans au moins un sujet
+                flux.ecrire([(f"Question {generateur.numero_question(num_question)} : sujets {', '.join(str(i) for i in sujets_indices)}",
+                              NORMAL, 11)])
+        flux.terminer()
+    finally:
+        pdf.fermer()
@@ -0,0 +1,88 @@
+import heapq
+import random
+from array import array
+from collections import deque
+
+# Nombre de sujets voisins (sujets précédents) avec lesquels le recouvrement
+# est limité par défaut
+FENETRE_RECOUVREMENT = 64
+
+
+def planifier_selection(nb_banque, nb_eleves, nb_questions, graine, recouvrement_max=None,
+                        fenetre=FENETRE_RECOUVREMENT):
+    """
+    Choisit les questions de chaque sujet en équilibrant leur utilisation.
+
+    Chaque sujet reçoit les questions les moins utilisées jusque-là (tas
+    indexé sur le nombre d'utilisations, départagé aléatoirement). Si un
+    recouvrement maximal est demandé, une question est écartée pour le sujet
+    en cours dès qu'elle porterait à plus de `recouvrement_max` le nombre de
+    questions communes avec l'un des sujets voisins. Ces recouvrements sont
+    tenus à jour de façon incrémentale, question par question, sans comparer
+    les sujets deux à deux.
+
+    Args:
+        nb_banque (int): Nombre de questions de la banque
+        nb_eleves (int): Nombre de sujets
+        nb_questions (int): Nombre de questions par sujet
+        graine (int): Graine pour la génération aléatoire
+        recouvrement_max (int): Nombre maximal de questions communes entre deux
+            sujets voisins, ou None pour ne pas le limiter
+        fenetre (int): Nombre de sujets précédents considérés comme voisins,
+            ou None pour les considérer tous (coût quadratique en nb_eleves)
+
+    Returns:
+        array: Indices des questions de tous les sujets, bout à bout
+            (nb_questions indices par sujet, dans l'ordre des sujets)
+
+    Raises:
+        ValueError: Si le recouvrement maximal ne peut pas être respecté
+    """
+    rng = random.Random(f"{graine}-equilibre")
+
+    utilisations = [0] * nb_banque
+    tas = [(0, rng.random(), q) for q in range(nb_banque)]
+    heapq.heapify(tas)
+
+    # Sujets récents contenant chaque question (pour le calcul des recouvrements)
+    sujets_recents = [deque() for _ in range(nb_banque)] if recouvrement_max is not None else None
+
+    plan = array('I')
+    for num_sujet in range(nb_eleves):
+        choisies = []
+        ecartees = []
+        recouvrements = {}
+        premier_voisin = 0 if fenetre is None else num_sujet - fenetre
+
+        while len(choisies) < nb_questions:
+            if not tas:
+                raise ValueError(
+                    f"Impossible de respecter un recouvrement maximal de {recouvrement_max} questions "
+                    f"pour le sujet {num_sujet} : augmentez la limite ou le nombre de questions de la banque."
+                )
+            entree = heapq.heappop(tas)
+            q = entree[2]
+
+            if sujets_recents is not None:
+                recents = sujets_recents[q]
+                while recents and recents[0] < premier_voisin:
+                    recents.popleft()
+                if any(recouvrements.get(s, 0) >= recouvrement_max for s in recents):
+                    ecartees.append(entree)
+                    continue
+                for s in recents:
+                    recouvrements[s] = recouvrements.get(s, 0) + 1
+
+            choisies.append(q)
+
+        for q in choisies:
+            utilisations[q] += 1
+            heapq.heappush(tas, (utilisations[q], rng.random(), q))
+            if sujets_recents is not None:
+                sujets_recents[q].append(num_sujet)
+        for entree in ecartees:
+            heapq.heappush(tas, entree)
+
+        plan.extend(choisies)
+
+    return plan
@@ -0,0 +1,549 @@
+"""
+Service local de génération de QCM.
+
+Le service garde les banques de questions chargées (projetées en mémoire et
+identifiées par l'empreinte de leur contenu) et conserve les derniers fichiers
+produits dans un cache LRU borné en taille. Les générations sont confiées à
+un pool de processus de travail.
+
+Points d'accès (HTTP, sur localhost ou sur un socket Unix) :
+    GET  /etat      État du service (banques chargées, cache)
+    GET  /banques   Banques chargées
+    POST /banques   Charge une banque : contenu du fichier de questions, ou
+                    objet JSON {"chemin": ...} pour un fichier local chargé
+                    au démarrage ou situé sous le répertoire racine
+    POST /generer   Produit un fichier : objet JSON {"banque", "nb_eleves",
+                    "nb_questions", "graine", "artefact", "moteur_docx"}
+"""
+import json
+import os
+import socketserver
+import tempfile
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from banque_compilee import BanqueCompilee, charger_banque, charger_contenu, compiler_banque
+from generateur_qcm import GenerateurQCM
+
+# Taille maximale par défaut du cache des fichiers produits (en octets)
+TAILLE_MAX_RESULTATS = 64 * 1024 * 1024
+
+# Taille maximale d'une requête (en octets)
+TAILLE_MAX_REQUETE = 64 * 1024 * 1024
+
+TYPE_DOCX = 'application/vnd.openxmlformats-officedocument.wordprocessingml.document'
+
+# Fichiers pouvant être produits, avec leur type de contenu
+ARTEFACTS = {
+    'sujets.txt': 'text/plain; charset=utf-8',
+    'corrections.txt': 'text/plain; charset=utf-8',
+    'sujets.docx': TYPE_DOCX,
+    'corrections.docx': TYPE_DOCX,
+    'sujets.pdf': 'application/pdf',
+    'corrections.pdf': 'application/pdf',
+    'cles.bin': 'application/octet-stream',
+}
+
+# Banques ouvertes par chaque processus de travail, par chemin du fichier compilé
+_banques_travailleur = {}
+
+
+def produire_artefact(banque, nb_eleves, nb_questions, graine, artefact, moteur_docx='fast'):
+    """
+    Génère un fichier et renvoie son contenu.
+
+    Args:
+        banque (BanqueCompilee): Banque de questions
+        nb_eleves (int): Nombre de sujets
+        nb_questions (int): Nombre de questions par sujet
+        graine (int): Graine pour la génération aléatoire
+        artefact (str): Fichier à produire (clé de ARTEFACTS)
+        moteur_docx (str): Moteur de rendu DOCX
+
+    Returns:
+        bytes: Contenu du fichier
+    """
+    generateur = GenerateurQCM(banque, nb_eleves, nb_questions, graine)
+    sujets = generateur.iterer_sujets()
+
+    with tempfile.TemporaryDirectory() as dossier:
+        chemin = os.path.join(dossier, artefact)
+        if artefact == 'sujets.txt':
+            generateur.generer_fichier_txt(sujets, chemin)
+        elif artefact == 'corrections.txt':
+            generateur.generer_fichier_correction(sujets, chemin)
+        elif artefact == 'sujets.docx':
+            generateur.generer_fichier_docx(sujets, chemin, moteur=moteur_docx)
+        elif artefact == 'corrections.docx':
+            generateur.generer_fichier_correction_docx(sujets, chemin, moteur=moteur_docx)
+        elif artefact == 'sujets.pdf':
+            generateur.generer_fichier_pdf(sujets, chemin)
+        elif artefact == 'corrections.pdf':
+            generateur.generer_fichier_correction_pdf(sujets, chemin)
+        else:
+            generateur.generer_fichier_cles(sujets, chemin)
+
+        with open(chemin, 'rb') as f:
+            return f.read()
+
+
+def _produire(chemin_banque, *parametres):
+    """
+    Génère un fichier dans un processus de travail.
+
+    La banque est ouverte au premier usage puis reste projetée en mémoire
+    pour les requêtes suivantes.
+
+    Args:
+        chemin_banque (str): Chemin de la banque compilée
+        parametres: Paramètres de produire_artefact après la banque
+
+    Returns:
+        bytes: Contenu du fichier
+    """
+    banque = _banques_travailleur.get(chemin_banque)
+    if banque is None:
+        banque = _banques_travailleur[chemin_banque] = BanqueCompilee(chemin_banque)
+    return produire_artefact(banque, *parametres)
+
+
+class CacheResultats:
+    """
+    Cache LRU des fichiers produits, borné par la taille totale de leur contenu.
+    """
+    def __init__(self, taille_max=TAILLE_MAX_RESULTATS):
+        """
+        Args:
+            taille_max (int): Taille totale maximale en octets
+        """
+        self.taille_max = taille_max
+        self.taille = 0
+        self.succes = 0
+        self.echecs = 0
+        self._entrees = OrderedDict()
+        self._verrou = threading.Lock()
+
+    def obtenir(self, cle):
+        """
+        Args:
+            cle (tuple): Clé du fichier
+
+        Returns:
+            bytes: Contenu du fichier, ou None s'il n'est pas en cache
+        """
+        with self._verrou:
+            contenu = self._entrees.get(cle)
+            if contenu is None:
+                self.echecs += 1
+                return None
+            self._entrees.move_to_end(cle)
+            self.succes += 1
+            return contenu
+
+    def ajouter(self, cle, contenu):
+        """
+        Ajoute un fichier, en évinçant les moins récemment utilisés si besoin.
+
+        Args:
+            cle (tuple): Clé du fichier
+            contenu (bytes): Contenu du fichier
+        """
+        if len(contenu) > self.taille_max:
+            return
+
+        with self._verrou:
+            if cle in self._entrees:
+                return
+            self._entrees[cle] = contenu
+            self.taille += len(contenu)
+            while self.taille > self.taille_max:
+                _, ancien = self._entrees.popitem(last=False)
+                self.taille -= len(ancien)
+
+    def etat(self):
+        """
+        Returns:
+            dict: Nombre d'entrées, taille et taux de succès du cache
+        """
+        with self._verrou:
+            return {'entrees': len(self._entrees), 'octets': self.taille, 'taille_max': self.taille_max,
+                    'succes': self.succes, 'echecs': self.echecs}
+
+
+class ServiceQCM:
+    """
+    Génération de QCM à la demande, avec banques résidentes et cache des résultats.
+    """
+    def __init__(self, jobs=None, taille_cache=TAILLE_MAX_RESULTATS, repertoire=None, racine=None):
+        """
+        Args:
+            jobs (int): Nombre de processus de travail (par défaut, un par
+                processeur ; 0 pour générer dans le thread de la requête)
+            taille_cache (int): Taille maximale du cache des résultats en octets
+            repertoire (str): Répertoire du cache des banques compilées
+            racine (str): Répertoire dont les fichiers de questions peuvent être
+                chargés par chemin depuis une requête (par défaut, seuls les
+                fichiers chargés au démarrage le peuvent)
+        """
+        self.repertoire = repertoire
+        self.racine = os.path.realpath(racine) if racine is not None else None
+        self.banques = {}
+
+        # Fichiers chargés par ajouter_banque, et empreintes des banques lues
+        # sur le disque, dont les lignes rejetées ne sont pas renvoyées
+        self._chemins = set()
+        self._locales = set()
+        self.cache = CacheResultats(taille_cache)
+        self.executor = ProcessPoolExecutor(max_workers=jobs or os.cpu_count()) if jobs != 0 else None
+
+        # Générations en cours, pour qu'une même demande simultanée ne soit calculée qu'une fois
+        self._en_cours = {}
+        self._verrou = threading.Lock()
+
+    def ajouter_banque(self, chemin=None, contenu=None):
+        """
+        Charge une banque de questions et la garde en mémoire.
+
+        Args:
+            chemin (str): Chemin d'un fichier de questions
+            contenu (bytes): Contenu d'un fichier de questions, à défaut de chemin
+
+        Returns:
+            BanqueCompilee: Banque chargée, identifiée par son empreinte
+        """
+        if chemin is not None:
+            banque = charger_banque(chemin, self.repertoire)
+        else:
+            banque = charger_contenu(contenu, self.repertoire)
+
+        with self._verrou:
+            if chemin is not None:
+                self._chemins.add(os.path.realpath(chemin))
+                self._locales.add(banque.empreinte)
+            # Une banque déjà connue reste celle en service
+            if banque.empreinte in self.banques:
+                banque.fermer()
+            else:
+                self.banques[banque.empreinte] = banque
+            return self.banques[banque.empreinte]
+
+    def ajouter_banque_demandee(self, chemin):
+        """
+        Charge une banque désignée par son chemin dans une requête.
+
+        Seuls les fichiers déjà chargés par ajouter_banque (au démarrage) ou
+        situés sous le répertoire racine sont acceptés.
+
+        Args:
+            chemin (str): Chemin d'un fichier de questions
+
+        Returns:
+            BanqueCompilee: Banque chargée, identifiée par son empreinte
+
+        Raises:
+            PermissionError: Si le fichier n'est pas autorisé
+        """
+        reel = os.path.realpath(chemin)
+        with self._verrou:
+            autorise = reel in self._chemins
+        if not autorise and self.racine is not None:
+            autorise = os.path.commonpath([self.racine, reel]) == self.racine
+        if not autorise:
+            raise PermissionError(f"Chemin non autorisé : {chemin}")
+        return self.ajouter_banque(chemin=reel)
+
+    def erreurs_banque(self, banque):
+        """
+        Blocs rejetés d'une banque, tels que renvoyés aux clients.
+
+        Pour une banque lue sur le disque, seuls les numéros de ligne sont
+        donnés : les messages peuvent reprendre le contenu du fichier.
+
+        Args:
+            banque (BanqueCompilee): Banque chargée
+
+        Returns:
+            list: Tuples (numéro de ligne, message)
+        """
+        if banque.empreinte in self._locales:
+            return [(ligne, "bloc rejeté") for ligne, _ in banque.erreurs]
+        return banque.erreurs
+
+    def generer(self, empreinte, nb_eleves, nb_questions, graine, artefact, moteur_docx='fast'):
+        """
+        Produit un fichier, depuis le cache si possible.
+
+        Args:
+            empreinte (str): Empreinte de la banque
+            nb_eleves (int): Nombre de sujets
+            nb_questions (int): Nombre de questions par sujet
+            graine (int): Graine pour la génération aléatoire
+            artefact (str): Fichier à produire (clé de ARTEFACTS)
+            moteur_docx (str): Moteur de rendu DOCX
+
+        Returns:
+            bytes: Contenu du fichier
+
+        Raises:
+            KeyError: Si la banque n'est pas chargée
+            ValueError: Si les paramètres sont invalides
+        """
+        if artefact not in ARTEFACTS:
+            raise ValueError(f"Fichier inconnu : {artefact} (possibles : {', '.join(ARTEFACTS)})")
+        if nb_eleves < 1:
+            raise ValueError("Le nombre d'élèves doit être positif")
+        if nb_questions < 1:
+            raise ValueError("Le nombre de questions doit être positif")
+
+        banque = self.banques.get(empreinte)
+        if banque is None:
+            raise KeyError(f"Banque non chargée : {empreinte}")
+        if nb_questions > len(banque):
+            raise ValueError(f"La banque ne contient que {len(banque)} questions, "
+                             f"mais {nb_questions} sont demandées.")
+
+        # Le moteur DOCX n'intervient que dans les fichiers DOCX
+        moteur = moteur_docx if artefact.endswith('.docx') else None
+        cle = (empreinte, nb_eleves, nb_questions, graine, artefact, moteur)
+        contenu = self.cache.obtenir(cle)
+        if contenu is not None:
+            return contenu
+
+        with self._verrou:
+            futur = self._en_cours.get(cle)
+            proprietaire = futur is None
+            if proprietaire:
+                futur = self._en_cours[cle] = Future()
+
+        if not proprietaire:
+            return futur.result()
+
+        try:
+            parametres = (nb_eleves, nb_questions, graine, artefact, moteur_docx)
+            if self.executor is None:
+                contenu = produire_artefact(banque, *parametres)
+            else:
+                self._restaurer_fichier(banque)
+                try:
+                    contenu = self.executor.submit(_produire, banque.chemin, *parametres).result()
+                except FileNotFoundError:
+                    # Fichier évincé entre la vérification et son ouverture
+                    self._restaurer_fichier(banque)
+                    contenu = self.executor.submit(_produire, banque.chemin, *parametres).result()
+            self.cache.ajouter(cle, contenu)
+            futur.set_result(contenu)
+            return contenu
+        except BaseException as e:
+            futur.set_exception(e)
+            raise
+        finally:
+            with self._verrou:
+                del self._en_cours[cle]
+
+    def _restaurer_fichier(self, banque):
+        """
+        Recrée le fichier compilé d'une banque s'il a été évincé du cache disque.
+
+        Les processus de travail rouvrent la banque par son chemin ; le service
+        garde sa propre projection, encore lisible après la suppression du
+        fichier, et réécrit le fichier à partir de celle-ci.
+
+        Args:
+            banque (BanqueCompilee): Banque chargée par le service
+        """
+        if os.path.exists(banque.chemin):
+            return
+        with self._verrou:
+            if not os.path.exists(banque.chemin):
+                os.makedirs(os.path.dirname(banque.chemin), exist_ok=True)
+                compiler_banque(banque, banque.erreurs, banque.chemin)
+
+    def etat(self):
+        """
+        Returns:
+            dict: Banques chargées et état du cache des résultats
+        """
+        return {'banques': self.decrire_banques(), 'cache': self.cache.etat()}
+
+    def decrire_banques(self):
+        """
+        Returns:
+            list: Empreinte, nombre de questions et erreurs de chaque banque chargée
+        """
+        with self._verrou:
+            banques = list(self.banques.items())
+        return [{'empreinte': empreinte, 'nb_questions': len(banque), 'erreurs': self.erreurs_banque(banque)}
+                for empreinte, banque in banques]
+
+    def fermer(self):
+        """Arrête les processus de travail et libère les banques."""
+        if self.executor is not None:
+            self.executor.shutdown()
+        for banque in self.banques.values():
+            banque.fermer()
+        self.banques.clear()
+
+
+def _parametre(demande, nom):
+    """
+    Lit un paramètre obligatoire d'une requête JSON.
+
+    Raises:
+        ValueError: Si le paramètre est absent
+    """
+    if not isinstance(demande, dict) or nom not in demande:
+        raise ValueError(f"Paramètre manquant : {nom}")
+    return demande[nom]
+
+
+class GestionnaireRequetes(BaseHTTPRequestHandler):
+    """
+    Traduit les requêtes HTTP en appels au service (self.server.service).
+    """
+    protocol_version = 'HTTP/1.1'
+
+    def address_string(self):
+        # Les clients d'un socket Unix n'ont pas d'adresse
+        return self.client_address[0] if self.client_address else 'local'
+
+    def log_message(self, format, *args):
+        if self.server.journal:
+            super().log_message(format, *args)
+
+    def _repondre(self, statut, contenu, type_contenu='application/json; charset=utf-8'):
+        """Envoie une réponse complète."""
+        if not isinstance(contenu, bytes):
+            contenu = json.dumps(contenu, ensure_ascii=False).encode('utf-8')
+        self.send_response(statut)
+        self.send_header('Content-Type', type_contenu)
+        self.send_header('Content-Length', str(len(contenu)))
+        self.end_headers()
+        self.wfile.write(contenu)
+
+    def _lire_corps(self):
+        """Lit le corps de la requête."""
+        taille = int(self.headers.get('Content-Length') or 0)
+        if taille > TAILLE_MAX_REQUETE:
+            raise ValueError(f"Requête trop volumineuse ({taille} octets)")
+        return self.rfile.read(taille)
+
+    def do_GET(self):
+        service = self.server.service
+        if self.path == '/etat':
+            self._repondre(200, service.etat())
+        elif self.path == '/banques':
+            self._repondre(200, service.decrire_banques())
+        else:
+            self._repondre(404, {'erreur': f"Chemin inconnu : {self.path}"})
+
+    def do_POST(self):
+        service = self.server.service
+        try:
+            corps = self._lire_corps()
+
+            if self.path == '/banques':
+                if self.headers.get('Content-Type', '').startswith('application/json'):
+                    banque = service.ajouter_banque_demandee(_parametre(json.loads(corps), 'chemin'))
+                else:
+                    banque = service.ajouter_banque(contenu=corps)
+                self._repondre(200, {'empreinte': banque.empreinte, 'nb_questions': len(banque),
+                                     'erreurs': service.erreurs_banque(banque)})
+
+            elif self.path == '/generer':
+                demande = json.loads(corps)
+                if not isinstance(demande, dict):
+                    raise ValueError("La demande doit être un objet JSON")
+                artefact = demande.get('artefact', 'sujets.txt')
+                contenu = service.generer(
+                    _parametre(demande, 'banque'),
+                    int(demande.get('nb_eleves', 5)),
+                    int(demande.get('nb_questions', 10)),
+                    int(demande.get('graine', 42)),
+                    artefact,
+                    demande.get('moteur_docx', 'fast')
+                )
+                self._repondre(200, contenu, ARTEFACTS[artefact])
+
+            else:
+                self._repondre(404, {'erreur': f"Chemin inconnu : {self.path}"})
+
+        except KeyError as e:
+            self._repondre(404, {'erreur': e.args[0]})
+        except PermissionError as e:
+            self._repondre(403, {'erreur': str(e)})
+        except (ValueError, TypeError, OSError) as e:
+            self._repondre(400, {'erreur': str(e)})
+        except Exception as e:
+            self._repondre(500, {'erreur': str(e)})
+
+
+class ServeurUnix(socketserver.ThreadingUnixStreamServer):
+    """Serveur HTTP sur un socket Unix."""
+    daemon_threads = True
+
+
+def creer_serveur(service, hote='127.0.0.1', port=8765, socket_unix=None, journal=False):
+    """
+    Crée le serveur HTTP du service.
+
+    Args:
+        service (ServiceQCM): Service à exposer
+        hote (str): Adresse d'écoute
+        port (int): Port d'écoute (0 pour un port libre choisi par le système)
+        socket_unix (str): Chemin d'un socket Unix, à la place de hote et port
+        journal (bool): Journaliser les requêtes sur la sortie d'erreur
+
+    Returns:
+        socketserver.BaseServer: Serveur prêt à être lancé par serve_forever()
+    """
+    if socket_unix is not None:
+        if os.path.exists(socket_unix):
+            os.remove(socket_unix)
+        serveur = ServeurUnix(socket_unix, GestionnaireRequetes)
+    else:
+        serveur = ThreadingHTTPServer((hote, port), GestionnaireRequetes)
+        serveur.daemon_threads = True
+
+    serveur.service = service
+    serveur.journal = journal
+    return serveur
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Service local de génération de QCM')
+    parser.add_argument('--hote', default='127.0.0.1', help="Adresse d'écoute (par défaut : 127.0.0.1)")
+    parser.add_argument('--port', type=int, default=8765, help="Port d'écoute (par défaut : 8765)")
+    parser.add_argument('--socket', help='Écouter sur un socket Unix plutôt que sur un port')
+    parser.add_argument('--jobs', type=int, default=None,
+                        help='Nombre de processus de génération (par défaut : un par processeur)')
+    parser.add_argument('--taille-cache', type=int, default=TAILLE_MAX_RESULTATS // (1024 * 1024),
+                        help='Taille maximale du cache des fichiers produits, en Mo')
+    parser.add_argument('--banque', action='append', default=[],
+                        help='Fichier de questions à charger au démarrage (option répétable)')
+    parser.add_argument('--racine',
+                        help='Répertoire dont les fichiers de questions peuvent être chargés par chemin '
+                             '(par défaut, seuls ceux de --banque)')
+    parser.add_argument('--journal', action='store_true', help='Afficher les requêtes reçues')
+
+    args = parser.parse_args()
+
+    service = ServiceQCM(jobs=args.jobs, taille_cache=args.taille_cache * 1024 * 1024, racine=args.racine)
+    try:
+        for chemin in args.banque:
+            banque = service.ajouter_banque(chemin=chemin)
+            print(f"Banque chargée : {chemin} ({len(banque)} questions, empreinte {banque.empreinte})")
+
+        serveur = creer_serveur(service, args.hote, args.port, args.socket, args.journal)
+        print(f"Service à l'écoute sur {args.socket or f'http://{args.hote}:{args.port}'}")
+        try:
+            serveur.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            serveur.server_close()
+    finally:
+        service.fermer()
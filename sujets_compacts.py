@@ -0,0 +1,84 @@
+from array import array
+from bisect import bisect_left
+from collections.abc import Mapping
+from itertools import permutations as _permutations
+
+# Nombre de réponses proposées pour chaque question
+NB_REPONSES = 4
+
+# Les 24 ordres possibles des réponses d'une question : un sujet ne retient
+# que le rang de l'ordre tiré dans cette table
+PERMUTATIONS = tuple(_permutations(range(NB_REPONSES)))
+RANGS_PERMUTATIONS = {ordre: rang for rang, ordre in enumerate(PERMUTATIONS)}
+
+
+class SujetsCompacts(Mapping):
+    """
+    Sujets tirés par le moteur Python, conservés sous forme de tableaux d'entiers.
+
+    Chaque question d'un sujet se réduit à son indice dans la banque (4 octets)
+    et au rang de l'ordre de ses réponses (1 octet). Se parcourt comme un
+    dictionnaire de sujets par numéro : le texte d'un sujet n'est construit,
+    à partir des chaînes de la banque, qu'au moment où un rendu le demande.
+    """
+    def __init__(self, generateur, numeros=None):
+        """
+        Args:
+            generateur (GenerateurQCM): Générateur dont la banque fournit le texte
+            numeros (Sequence): Numéros des sujets, triés, dans l'ordre où ils
+                sont ajoutés (par défaut tous les sujets de la classe)
+        """
+        self.generateur = generateur
+        self.numeros = range(generateur.nb_eleves) if numeros is None else numeros
+        self.nb_questions = generateur.nb_questions
+        self.questions = array('I')
+        self.permutations = bytearray()
+
+    def ajouter(self, indices_questions, permutations):
+        """
+        Ajoute le tirage du sujet suivant dans self.numeros.
+
+        Args:
+            indices_questions (list): Indices des questions dans la banque
+            permutations (list): Ordre des réponses pour chaque question
+        """
+        self.questions.extend(indices_questions)
+        self.permutations.extend(RANGS_PERMUTATIONS[tuple(ordre)] for ordre in permutations)
+
+    def tirage(self, num_sujet):
+        """
+        Tirage d'un sujet, tel que renvoyé par GenerateurQCM.tirer_sujet.
+
+        Args:
+            num_sujet (int): Numéro du sujet
+
+        Returns:
+            tuple: (indices des questions dans la banque,
+                   permutation des réponses pour chaque question)
+        """
+        debut = self._rang(num_sujet) * self.nb_questions
+        fin = debut + self.nb_questions
+        return self.questions[debut:fin].tolist(), [PERMUTATIONS[rang] for rang in self.permutations[debut:fin]]
+
+    def _rang(self, num_sujet):
+        """Rang d'un sujet parmi les sujets ajoutés."""
+        rang = bisect_left(self.numeros, num_sujet, 0, len(self))
+        if rang == len(self) or self.numeros[rang] != num_sujet:
+            raise KeyError(num_sujet)
+        return rang
+
+    def __len__(self):
+        return len(self.permutations) // self.nb_questions
+
+    def __iter__(self):
+        return iter(self.numeros[:len(self)])
+
+    def __contains__(self, num_sujet):
+        try:
+            self._rang(num_sujet)
+        except (KeyError, TypeError):
+            return False
+        return True
+
+    def __getitem__(self, num_sujet):
+        return self.generateur.construire_sujet(*self.tirage(num_sujet))